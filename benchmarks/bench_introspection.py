@@ -0,0 +1,107 @@
+"""
+BENCHMARK - Schema Introspection
+
+Compares the legacy per-table loop (3 PRAGMA round-trips per table) with
+DatabaseConnector.introspect() (bulk pragma_table_info / pragma_foreign_key_list).
+
+Usage:
+    python benchmarks/bench_introspection.py [n_tables ...]
+    python benchmarks/bench_introspection.py 100 1000 3000
+"""
+
+import os
+import sys
+import time
+import asyncio
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nl2sql_agents.db.connector import DatabaseConnector
+from nl2sql_agents.models.schemas import ColumnMetaData, TableMetaData
+
+COLUMNS_PER_TABLE = 12
+
+def build_db(path: str, n_tables: int) -> None:
+    conn = sqlite3.connect(path)
+    ddl = []
+    for i in range(n_tables):
+        cols = [f"id INTEGER PRIMARY KEY"]
+        cols += [f"col_{c} TEXT" for c in range(COLUMNS_PER_TABLE - 2)]
+        if i > 0:
+            cols.append(f"parent_id INTEGER REFERENCES t_{i - 1:05d}(id)")
+        else:
+            cols.append("parent_id INTEGER")
+        ddl.append(f"CREATE TABLE t_{i:05d} ({', '.join(cols)});")
+    conn.executescript("\n".join(ddl))
+    conn.commit()
+    conn.close()
+
+async def legacy_introspect(connector: DatabaseConnector) -> list[TableMetaData]:
+    """The original per-table loop, kept here as the baseline"""
+    db_name = os.path.splitext(os.path.basename(connector.db_path))[0]
+    result = []
+
+    async with connector.pool.acquire() as db:
+        async with db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        ) as cursor:
+            tables = [row["name"] for row in await cursor.fetchall()]
+
+        for table_name in tables:
+            async with db.execute(f"PRAGMA table_info('{table_name}')") as cursor:
+                columns = [dict(row) for row in await cursor.fetchall()]
+            async with db.execute(f"PRAGMA foreign_key_list('{table_name}')") as cursor:
+                fk_map = {row["from"]: (row["table"], row["to"]) for row in await cursor.fetchall()}
+            async with db.execute(f"PRAGMA table_info('{table_name}')") as cursor:
+                pk_cols = {row["name"] for row in await cursor.fetchall() if row["pk"]}
+
+            build_cols = []
+            for col in columns:
+                fk_target = fk_map.get(col["name"])
+                build_cols.append(ColumnMetaData(
+                    column_name=col["name"],
+                    data_type=col["type"] or "TEXT",
+                    nullable=not col["notnull"],
+                    is_primary_key=col["name"] in pk_cols,
+                    is_foreign_key=fk_target is not None,
+                    reference_table=fk_target[0] if fk_target else None,
+                    reference_column=fk_target[1] if fk_target else None,
+                ))
+            result.append(TableMetaData(table_name=table_name, schema_name=db_name, columns=build_cols))
+
+    return result
+
+async def timed(fn, repeat: int = 3) -> tuple[float, list[TableMetaData]]:
+    best, out = float("inf"), []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = await fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+async def run(n_tables: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite")
+        build_db(path, n_tables)
+
+        connector = DatabaseConnector(path, pool_size=1)
+        try:
+            legacy_s, legacy = await timed(lambda: legacy_introspect(connector))
+            bulk_s, bulk = await timed(connector.introspect)
+        finally:
+            await connector.close()
+
+        assert [t.model_dump() for t in legacy] == [t.model_dump() for t in bulk], "results differ"
+        print(
+            f"tables={n_tables:>6}  columns={n_tables * COLUMNS_PER_TABLE:>7}  "
+            f"per-table={legacy_s * 1000:9.1f}ms  bulk={bulk_s * 1000:9.1f}ms  "
+            f"speedup={legacy_s / bulk_s:5.1f}x"
+        )
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [100, 1000, 3000]
+    for n in sizes:
+        asyncio.run(run(n))
@@ -0,0 +1,114 @@
+"""
+BENCHMARK - Keyword Agent fuzzy matching
+
+Compares the legacy loop (SequenceMatcher for every keyword x table/column name)
+with KeywordIndex (trigram postings + quick_ratio bounds, built once per schema version)
+and checks that both produce the same scores.
+
+Usage:
+    python benchmarks/bench_keyword.py [n_columns ...]
+    python benchmarks/bench_keyword.py 1000 10000 100000
+"""
+
+import os
+import sys
+import time
+import random
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nl2sql_agents.agents.discovery.keyword_agent import KeywordAgent
+from nl2sql_agents.agents.discovery.keyword_index import KeywordIndex
+from nl2sql_agents.models.schemas import ColumnMetaData, TableMetaData
+
+COLUMNS_PER_TABLE = 10
+TOLERANCE = 1e-4
+
+QUERIES = [
+    "show me the total revenue per customer for last month",
+    "which employees manage the most projects",
+    "list invoices with unpaid balance by region",
+    "average order amount by product category and supplier",
+    "how many shipments were delayed in warehouse transfers",
+]
+
+WORDS = [
+    "customer", "order", "invoice", "product", "category", "supplier", "employee",
+    "project", "region", "shipment", "warehouse", "transfer", "payment", "balance",
+    "amount", "revenue", "account", "address", "status", "created", "updated",
+    "manager", "department", "ledger", "budget", "contract", "vendor", "item",
+    "price", "discount", "tax", "currency", "country", "city", "phone", "email",
+]
+
+def build_tables(n_columns: int, seed: int = 0) -> list[TableMetaData]:
+    rng = random.Random(seed)
+    tables = []
+    for i in range(max(1, n_columns // COLUMNS_PER_TABLE)):
+        table_name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{i}"
+        columns = [
+            ColumnMetaData(
+                column_name="id" if c == 0 else f"{rng.choice(WORDS)}_{rng.choice(WORDS)}",
+                data_type="INTEGER" if c == 0 else "TEXT",
+                is_primary_key=c == 0,
+            )
+            for c in range(COLUMNS_PER_TABLE)
+        ]
+        tables.append(TableMetaData(table_name=table_name, schema_name="bench", columns=columns))
+    return tables
+
+def legacy_score(tables: list[TableMetaData], keywords: list[str]) -> dict[str, float]:
+    """The original KeywordAgent._score_table loop, kept here as the baseline"""
+    def fuzzy(keyword: str, target: str) -> float:
+        if keyword in target:
+            return 1.0
+        return SequenceMatcher(None, keyword, target).ratio()
+
+    scores = {}
+    for table in tables:
+        if not keywords:
+            scores[table.table_name] = 0.0
+            continue
+        candidates = [table.table_name.lower()] + [c.column_name.lower() for c in table.columns]
+        best = [max(fuzzy(kw, cand) for cand in candidates) for kw in keywords]
+        scores[table.table_name] = round(sum(best) / len(best), 4)
+    return scores
+
+def run(n_columns: int) -> None:
+    tables = build_tables(n_columns)
+    agent = KeywordAgent()
+    keyword_sets = [agent._extract_keywords(q) for q in QUERIES]
+
+    start = time.perf_counter()
+    legacy = [legacy_score(tables, kws) for kws in keyword_sets]
+    legacy_ms = (time.perf_counter() - start) * 1000 / len(QUERIES)
+
+    start = time.perf_counter()
+    index = KeywordIndex(tables)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    cold = [index.score(kws) for kws in keyword_sets]
+    cold_ms = (time.perf_counter() - start) * 1000 / len(QUERIES)
+
+    start = time.perf_counter()
+    warm = [index.score(kws) for kws in keyword_sets]
+    warm_ms = (time.perf_counter() - start) * 1000 / len(QUERIES)
+
+    max_diff = max(
+        abs(old[name] - new[name])
+        for old, new in zip(legacy * 2, cold + warm)
+        for name in old
+    )
+    assert max_diff <= TOLERANCE, f"scores diverge by {max_diff}"
+
+    print(
+        f"{n_columns:>7} columns | legacy {legacy_ms:9.1f} ms/query | "
+        f"index build {build_ms:8.1f} ms, cold {cold_ms:8.1f} ms/query, warm {warm_ms:7.1f} ms/query | "
+        f"max diff {max_diff:.1e}"
+    )
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+    for n in sizes:
+        run(n)
@@ -0,0 +1,130 @@
+"""
+BENCHMARK - LLM client construction / connection reuse
+
+Runs against a local stub OpenAI-compatible server that counts TCP connections
+(every new connection is a TLS handshake against a real https endpoint; the stub can
+simulate that cost with --connect-ms).
+
+Modes:
+- per_call:       provider.chat_model(...) per call (the old BaseAgent._get_llm)
+- per_call_fresh: per_call with a fresh HTTP client each time, i.e. no default-client
+                  cache in langchain-openai / openai (older versions)
+- registry:       llm/clients.py (shared client + keep-alive pool, params bound per call)
+
+Usage:
+    python benchmarks/bench_llm_clients.py [--calls 150] [--fanout 15] [--connect-ms 0]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nl2sql_agents.config.settings import LLMProvider
+from nl2sql_agents.llm import clients
+from langchain_core.messages import HumanMessage, SystemMessage
+
+RESPONSE = {
+    "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": "stub",
+    "choices": [{"index": 0, "finish_reason": "stop",
+                 "message": {"role": "assistant", "content": "SELECT 1"}}],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+}
+
+class StubServer:
+    def __init__(self, connect_ms: float) -> None:
+        self.connect_ms = connect_ms
+        self.connections = 0
+        self.requests = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        if self.connect_ms:
+            await asyncio.sleep(self.connect_ms / 1000)  # stand-in for a TLS handshake
+        body = json.dumps(RESPONSE).encode()
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode("latin-1").split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                await reader.readexactly(length)
+                self.requests += 1
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Connection: keep-alive\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+MESSAGES = [SystemMessage(content="You are a SQL expert."), HumanMessage(content="Count the singers.")]
+
+async def call(mode: str, provider: LLMProvider) -> None:
+    if mode == "per_call":
+        llm = provider.chat_model(temperature=0.0, max_tokens=100)
+        await llm.ainvoke(MESSAGES)
+    elif mode == "per_call_fresh":
+        async with httpx.AsyncClient() as http:
+            llm = provider.chat_model(temperature=0.0, max_tokens=100, http_async_client=http)
+            await llm.ainvoke(MESSAGES)
+    else:
+        await clients.bound_chat_model(provider, 0.0, 100).ainvoke(MESSAGES)
+
+async def run_mode(mode: str, n_calls: int, fanout: int, connect_ms: float) -> None:
+    stub = StubServer(connect_ms)
+    server = await asyncio.start_server(stub.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    provider = LLMProvider(api_key="stub", base_url=f"http://127.0.0.1:{port}/v1", default_model="stub")
+
+    start = time.perf_counter()
+    for _ in range(n_calls // fanout):
+        await asyncio.gather(*[call(mode, provider) for _ in range(fanout)])
+    elapsed = time.perf_counter() - start
+
+    await clients.close_clients()
+    server.close()
+    await server.wait_closed()
+
+    print(
+        f"{mode:>15} | {stub.requests:4d} calls | {stub.connections:4d} connections | "
+        f"{elapsed * 1000 / stub.requests:6.2f} ms/call | total {elapsed:6.2f} s"
+    )
+
+def construction_overhead(n: int = 500) -> None:
+    provider = LLMProvider(api_key="stub", base_url="http://127.0.0.1:9/v1", default_model="stub")
+
+    start = time.perf_counter()
+    for _ in range(n):
+        provider.chat_model(temperature=0.0, max_tokens=100)
+    per_call_us = (time.perf_counter() - start) * 1e6 / n
+
+    start = time.perf_counter()
+    for _ in range(n):
+        clients.bound_chat_model(provider, 0.0, 100)
+    registry_us = (time.perf_counter() - start) * 1e6 / n
+
+    print(f"client setup per call: per_call {per_call_us:7.1f} us | registry {registry_us:7.1f} us")
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=150)
+    parser.add_argument("--fanout", type=int, default=15, help="concurrent calls per 'question'")
+    parser.add_argument("--connect-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    construction_overhead()
+    for mode in ("per_call", "per_call_fresh", "registry"):
+        await run_mode(mode, args.calls, args.fanout, args.connect_ms)
+
+if __name__ == "__main__":
+    asyncio.run(main())
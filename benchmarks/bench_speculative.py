@@ -0,0 +1,134 @@
+"""
+BENCHMARK - staged vs streaming (speculative best-of-N) generation + validation
+
+Stubs BaseAgent.call_llm with log-normal latencies (heavy tail, like real LLM calls)
+and runs the two PIPELINE_MODE paths end to end, without a connector (syntax, logic
+and performance are LLM checks):
+- staged:    generator.generate() (all N) -> validator.validate() (batched review)
+- streaming: generator.stream() -> validator.validate_stream(), early stop
+
+A fraction of generated candidates (--bad) fails the logic check, so streaming
+sometimes has to wait for a second candidate.
+
+Usage:
+    python benchmarks/bench_speculative.py [--runs 100] [--gen-ms 1500] [--check-ms 400] [--bad 0.2] [--wait-for 1]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import random
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nl2sql_agents.agents.base_agent import BaseAgent
+from nl2sql_agents.agents.query_generator import QueryGeneratorAgent
+from nl2sql_agents.agents.validator.batch_validator import BatchValidator
+from nl2sql_agents.agents.validator.validator_agent import ValidatorAgent
+from nl2sql_agents.agents.validator.logic_validator import LogicValidator
+from nl2sql_agents.models.schemas import FormattedSchema
+
+GOOD = "SELECT name FROM singer WHERE country = 'France' LIMIT 10"
+BAD = "SELECT name FROM singer WHERE country = 'Frence' LIMIT 10"
+
+class Stub:
+    def __init__(self, gen_ms: float, check_ms: float, bad: float, sigma: float = 0.6) -> None:
+        self.gen_ms = gen_ms
+        self.check_ms = check_ms
+        self.bad = bad
+        self.sigma = sigma
+        self.calls = {"generator": 0, "validator": 0, "cancelled": 0}
+
+    def _latency(self, median_ms: float) -> float:
+        return median_ms * random.lognormvariate(0, self.sigma) / 1000
+
+    def install(self) -> None:
+        stub = self
+
+        async def call_llm(agent, messages, temperature=0.3, max_tokens=2048) -> str:
+            generator = isinstance(agent, QueryGeneratorAgent)
+            stub.calls["generator" if generator else "validator"] += 1
+            try:
+                await asyncio.sleep(stub._latency(stub.gen_ms if generator else stub.check_ms))
+            except asyncio.CancelledError:
+                stub.calls["cancelled"] += 1
+                raise
+
+            if generator:
+                # a distinct SQL per call so deduplication does not blur the comparison
+                sql = BAD if random.random() < stub.bad else GOOD
+                return f"{sql} OFFSET {stub.calls['generator']}"
+            content = messages[-1]["content"]
+            if isinstance(agent, BatchValidator):
+                ids = range(1, content.count("\nCandidate ") + 2)
+                return json.dumps({"candidates": [
+                    {"id": i, "syntax": "PASS", "performance": "PASS",
+                     "logic": "FAIL: misspelled literal" if f"Candidate {i}:\n{BAD}" in content else "PASS"}
+                    for i in ids
+                ]})
+            if isinstance(agent, LogicValidator) and BAD in content:
+                return "FAIL: misspelled literal"
+            return "PASS"
+
+        BaseAgent.call_llm = call_llm
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+async def run(mode: str, args: argparse.Namespace) -> tuple[list[float], dict, int]:
+    random.seed(1)
+    stub = Stub(args.gen_ms, args.check_ms, args.bad)
+    stub.install()
+
+    generator = QueryGeneratorAgent()
+    validator = ValidatorAgent()
+    if validator.batch is None:
+        validator.batch = BatchValidator()
+    schema = FormattedSchema(
+        content="CREATE TABLE singer (singer_id INTEGER PRIMARY KEY, name TEXT, country TEXT);",
+        table_names=["singer"],
+        token_estimate=20
+    )
+
+    latencies: list[float] = []
+    passed = 0
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        if mode == "staged":
+            generation = await generator.generate(schema, "Singers from France")
+            result = await validator.validate(generation, "Singers from France")
+        else:
+            result = await validator.validate_stream(
+                generator.stream(schema, "Singers from France"), "Singers from France", wait_for=args.wait_for
+            )
+        latencies.append((time.perf_counter() - start) * 1000)
+        passed += result.passed
+    return latencies, stub.calls, passed
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--gen-ms", type=float, default=1500)
+    parser.add_argument("--check-ms", type=float, default=400)
+    parser.add_argument("--bad", type=float, default=0.2)
+    parser.add_argument("--wait-for", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'gen calls':>10} {'val calls':>10} {'cancelled':>10} {'passed':>7}")
+    for mode in ("staged", "streaming"):
+        latencies, calls, passed = await run(mode, args)
+        print(
+            f"{mode:<10} {percentile(latencies, 0.5):>8.0f} {percentile(latencies, 0.95):>8.0f} "
+            f"{statistics.mean(latencies):>8.0f} {calls['generator'] / args.runs:>10.2f} "
+            f"{calls['validator'] / args.runs:>10.2f} {calls['cancelled'] / args.runs:>10.2f} {passed:>7}"
+        )
+
+if __name__ == "__main__":
+    logging.disable()
+    asyncio.run(main())
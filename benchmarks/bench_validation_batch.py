@@ -0,0 +1,115 @@
+"""
+BENCHMARK - batched vs per-check LLM validation
+
+Runs ValidatorAgent without a connector (syntax, logic and performance all go to the
+LLM, the N_CANDIDATES x 3 calls case) against a stubbed BaseAgent.call_llm that
+counts requests and prompt tokens, in both VALIDATION_LLM_MODE settings:
+- per_check: one call per candidate per check
+- batch:     one BatchValidator call for all candidates
+--unparsable makes that fraction of batch responses garbage to exercise the fallback.
+
+Usage:
+    python benchmarks/bench_validation_batch.py [--candidates 3] [--questions 20] [--unparsable 0]
+"""
+
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nl2sql_agents.llm.tokens import count_tokens, load_encoding
+from nl2sql_agents.agents.base_agent import BaseAgent
+from nl2sql_agents.agents.validator.batch_validator import BatchValidator
+from nl2sql_agents.agents.validator.validator_agent import ValidatorAgent
+from nl2sql_agents.models.schemas import GenerationResult, SQLCandidate
+
+QUESTIONS = [
+    ("How many singers are from France?", "SELECT COUNT(*) FROM singer WHERE country = 'France'"),
+    ("List the names of stadiums with capacity over 5000",
+     "SELECT name FROM stadium WHERE capacity > 5000 ORDER BY name"),
+    ("Which singer performed in the most concerts?",
+     "SELECT s.name, COUNT(*) AS n FROM singer s JOIN singer_in_concert sc ON sc.singer_id = s.singer_id "
+     "GROUP BY s.singer_id ORDER BY n DESC LIMIT 1"),
+    ("Average age of singers per country",
+     "SELECT country, AVG(age) FROM singer GROUP BY country"),
+]
+
+class Counter:
+    def __init__(self, unparsable: float) -> None:
+        self.unparsable = unparsable
+        self.requests = 0
+        self.prompt_tokens = 0
+
+    def install(self) -> None:
+        counter = self
+
+        async def call_llm(agent, messages, temperature=0.3, max_tokens=2048) -> str:
+            counter.requests += 1
+            counter.prompt_tokens += sum(count_tokens(m["content"], agent.model_name) for m in messages)
+            if not isinstance(agent, BatchValidator):
+                return "PASS"
+            if random.random() < counter.unparsable:
+                return "I think they all look fine."
+            n = messages[-1]["content"].count("\nCandidate ") + 1
+            return json.dumps({"candidates": [
+                {"id": i, "syntax": "PASS", "logic": "PASS", "performance": "WARN: no LIMIT"}
+                for i in range(1, n + 1)
+            ]})
+
+        BaseAgent.call_llm = call_llm
+
+async def run(mode: str, n_candidates: int, n_questions: int, unparsable: float) -> dict:
+    counter = Counter(unparsable)
+    counter.install()
+
+    agent = ValidatorAgent()
+    load_encoding(agent.logic.model_name)
+    if mode == "per_check":
+        agent.batch = None
+    elif agent.batch is None:
+        agent.batch = BatchValidator()
+
+    saved = 0
+    for q in range(n_questions):
+        question, sql = QUESTIONS[q % len(QUESTIONS)]
+        generation = GenerationResult(candidates=[
+            SQLCandidate(sql=sql.replace("SELECT", "SELECT" + " " * (i + 1), 1), temperature=0.3, prompt_variant=f"v{i}")
+            for i in range(n_candidates)
+        ])
+        result = await agent.validate(generation, question)
+        saved += result.prompt_tokens_saved
+
+    return {
+        "requests": counter.requests / n_questions,
+        "prompt_tokens": counter.prompt_tokens / n_questions,
+        "reported_tokens_saved": saved / n_questions,
+        "fallbacks": agent.stats["batch_fallbacks"],
+    }
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=3)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--unparsable", type=float, default=0.0)
+    args = parser.parse_args()
+    random.seed(0)
+
+    base = await run("per_check", args.candidates, args.questions, 0.0)
+    batch = await run("batch", args.candidates, args.questions, args.unparsable)
+
+    print(f"{args.candidates} candidates, {args.questions} questions (per question):")
+    print(f"{'mode':<10} {'requests':>9} {'prompt tokens':>14} {'fallbacks':>10}")
+    for name, r in (("per_check", base), ("batch", batch)):
+        print(f"{name:<10} {r['requests']:>9.1f} {r['prompt_tokens']:>14.0f} {r['fallbacks']:>10}")
+    print(
+        f"batch: {1 - batch['requests'] / base['requests']:.0%} fewer requests, "
+        f"{1 - batch['prompt_tokens'] / base['prompt_tokens']:.0%} fewer prompt tokens "
+        f"(validator reports ~{batch['reported_tokens_saved']:.0f} tokens saved per question)"
+    )
+
+if __name__ == "__main__":
+    asyncio.run(main())
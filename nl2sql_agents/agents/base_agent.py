@@ -2,8 +2,12 @@
 BASE AGNET - Abstract Interface for all LLM agents.
 
 hanldes:
-- Async LLM calls via ChatOpenAI (langhcain-openai)
+- Async LLM calls via ChatOpenAI (langhcain-openai), shared per provider/model (llm/clients.py)
 - provider-aware: each agent recieves an LLM provider
+- response cache (cache/llm_cache.py): `cache_responses` None = only at temperature 0,
+  True = always, False = never
+- admission through the provider's LLMScheduler (llm/scheduler.py): concurrency,
+  RPM/TPM budgets, backoff on 429, priority class per agent (`priority`)
 - token usage logging
 
 Each agent implements:
@@ -14,8 +18,11 @@ Each agent implements:
 import logging
 from abc import ABC, abstractmethod
 from typing import Any
-from langchain_openai import ChatOpenAI
-from nl2sql_agents.config.settings import LLMProvider, PRIMARY_PROVIDER
+from nl2sql_agents.llm.tokens import count_tokens
+from nl2sql_agents.llm.clients import bound_chat_model
+from nl2sql_agents.llm.scheduler import Priority, scheduler_for
+from nl2sql_agents.cache.llm_cache import get_response_cache, response_key
+from nl2sql_agents.config.settings import LLMProvider, PRIMARY_PROVIDER, LLM_CACHE_ENABLED
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 
 logger = logging.getLogger(__name__)
@@ -25,6 +32,9 @@ def _to_langchain_messages(messages: list[dict[str, str]]) -> list[BaseMessage]:
     return [mapping.get(m["role"], HumanMessage)(content=m["content"]) for m in messages]
 
 class BaseAgent(ABC):
+    priority: Priority = Priority.NORMAL
+    cache_responses: bool | None = None
+
     def __init__(self, provider: LLMProvider = PRIMARY_PROVIDER) -> None:
         self.provider = provider
         self.model_name = provider.default_model
@@ -37,15 +47,28 @@ class BaseAgent(ABC):
     def parse_response(self, raw: str) -> Any:
         raise NotImplementedError("Abstract Method ParseResponse not implemented")
     
-    def _get_llm(self, temperature: float=0.3, max_tokens: int = 2048) -> ChatOpenAI:
-        return self.provider.chat_model(temperature=temperature, max_tokens=max_tokens)
+    def _get_llm(self, temperature: float=0.3, max_tokens: int = 2048) -> Any:
+        return bound_chat_model(self.provider, temperature, max_tokens, self.model_name)
     
+    def _use_cache(self, temperature: float) -> bool:
+        if not LLM_CACHE_ENABLED or self.cache_responses is False:
+            return False
+        return self.cache_responses is True or temperature == 0
+
     async def call_llm(
             self,
             messages: list[dict[str, str]],
             temperature: float = 0.3,
             max_tokens: int = 2048
     ) -> str:
+        key = None
+        if self._use_cache(temperature):
+            key = response_key(self.provider.base_url, self.model_name, messages, temperature, max_tokens)
+            cached = await get_response_cache().get(key)
+            if cached is not None:
+                logger.debug("%s -> LLM cache HIT", self.__class__.__name__)
+                return cached
+
         logger.debug(
             "%s -> LLM (model=%s, temp=%.1f, msgs=%d)", self.__class__.__name__, self.model_name, temperature, len(messages)
         )
@@ -53,16 +76,27 @@ class BaseAgent(ABC):
         llm = self._get_llm(temperature=temperature, max_tokens=max_tokens)
         lc_messages = _to_langchain_messages(messages)
 
-        response = await llm.ainvoke(lc_messages)
+        scheduler = scheduler_for(self.provider)
+        estimate = sum(count_tokens(m["content"], self.model_name) for m in messages) + max_tokens
+        response = await scheduler.run(
+            lambda: llm.ainvoke(lc_messages),
+            priority=self.priority,
+            tokens=estimate
+        )
 
         if response.usage_metadata:
+            scheduler.settle(estimate, response.usage_metadata.get("total_tokens", estimate))
             logger.debug("%s ← LLM (prompt=%d, completion=%d tokens)",
                 self.__class__.__name__,
                 response.usage_metadata.get("input_tokens", 0),
                 response.usage_metadata.get("output_tokens", 0),
             )
 
-        return response.content.strip()
+        content = response.content.strip()
+        if key is not None:
+            await get_response_cache().set(key, content)
+
+        return content
 
     async def execute(self, *args, **kwargs) -> Any:
         messages = self.build_prompt(*args, **kwargs)
@@ -0,0 +1,95 @@
+"""
+Approximate nearest-neighbour index (IVF, pure NumPy) for SemanticAgent
+
+Only used for very large schemas (SEMANTIC_ANN_MIN_TABLES, ~50k tables), where an
+exact matmul over every table embedding stops being sub-millisecond.
+
+- spherical k-means on a sample of the (L2-normalised) table embeddings
+- vectors are stored grouped by list, so each probed list is one contiguous slice
+- search: score the centroids, probe the best `nprobe` lists, exact dot product
+  on their members, partial top-k
+"""
+
+import math
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TRAIN_POINTS_PER_LIST = 40
+KMEANS_ITERS = 8
+CHUNK_ROWS = 8192
+
+def _assign(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid (max dot product) per row, chunked to bound memory"""
+    out = np.empty(len(x), dtype=np.int32)
+    for start in range(0, len(x), CHUNK_ROWS):
+        block = x[start:start + CHUNK_ROWS] @ centroids.T
+        out[start:start + CHUNK_ROWS] = np.argmax(block, axis=1)
+    return out
+
+def l2_normalize(x: np.ndarray) -> np.ndarray:
+    """Row-wise L2 normalisation; all-zero rows stay zero"""
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+class IVFIndex:
+    def __init__(
+            self,
+            vectors: np.ndarray,
+            nlist: int | None = None,
+            nprobe: int = 16,
+            seed: int = 0
+    ) -> None:
+        """`vectors` must already be L2-normalised float32 (n, dim)"""
+        n = len(vectors)
+        self.nlist = max(1, min(n, nlist or int(4 * math.sqrt(n))))
+        self.nprobe = max(1, min(nprobe, self.nlist))
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(n, self.nlist * TRAIN_POINTS_PER_LIST)
+        sample = vectors[rng.choice(n, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, self.nlist, replace=False)].copy()
+
+        for _ in range(KMEANS_ITERS):
+            assign = _assign(sample, centroids)
+            order = np.argsort(assign, kind="stable")
+            counts = np.bincount(assign, minlength=self.nlist)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+            non_empty = counts > 0
+            sums = np.add.reduceat(sample[order], starts[non_empty], axis=0)
+            centroids[non_empty] = sums
+            # re-seed empty lists with random sample points
+            empty = np.flatnonzero(~non_empty)
+            if len(empty):
+                centroids[empty] = sample[rng.choice(sample_size, len(empty))]
+            centroids = l2_normalize(centroids)
+
+        self.centroids = centroids.astype(np.float32)
+
+        # CSR layout: vectors grouped by list, offsets[i]:offsets[i+1] is list i
+        assign = _assign(vectors, self.centroids)
+        self.order = np.argsort(assign, kind="stable").astype(np.int64)
+        self.vectors = np.ascontiguousarray(vectors[self.order])
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=self.nlist))))
+
+        logger.info("IVFIndex: %d vectors, nlist=%d, nprobe=%d", n, self.nlist, self.nprobe)
+
+    def search(self, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """(indices into the original matrix, similarities) of ~top-k; query must be normalised"""
+        c_sims = self.centroids @ query
+        probe = np.argpartition(-c_sims, self.nprobe - 1)[:self.nprobe] if self.nprobe < self.nlist else np.arange(self.nlist)
+
+        slices = [np.arange(self.offsets[p], self.offsets[p + 1]) for p in probe]
+        members = np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+        if len(members) == 0:
+            return members, np.empty(0, dtype=np.float32)
+
+        sims = self.vectors[members] @ query
+        if len(members) > k:
+            top = np.argpartition(-sims, k - 1)[:k]
+            members, sims = members[top], sims[top]
+
+        return self.order[members], sims
@@ -1,17 +1,22 @@
 """
 DISCOVERY AGENT
 
-1. Keyword pre-filter (no llm)
-    - runs KeywordAgent on all tables
-    - Takes top KEYWORD_PRE_FILTER_TOP_N by keyword score
-2. PARALLEL - Semantic + FK (on filtered tables only.)
-    - runs SemanticAgent + FKGraphAgent in parallel on filtered tables
+1. PARALLEL - Keyword + Semantic candidates (on all tables)
+    - concurrently: KeywordAgent scores all tables, SemanticAgent embeds the query
+      (and its table matrix), FKGraphAgent builds the graph in a worker thread
+    - keyword top KEYWORD_PRE_FILTER_TOP_N, then SemanticAgent scores all tables
+      (one matmul / ANN with the warm query vector) and takes its own top-N
+    - candidates = union of both, so semantic recall does not depend on lexical overlap
+2. FK graph (full schema, cached per schema version), seeds among the candidates
+    - bridge tables linking two seeds join the candidates even if phase 1 dropped them
     - Merges all 3 scores with configurable weights
     - returns full ranked list
+3. Column scores for the ranked tables: keyword + semantic (chunk) per column,
+   same weights, renormalised (no FK component)
 """
 
-import logging
 import asyncio
+import logging
 from collections import defaultdict
 
 from .keyword_agent import KeywordAgent
@@ -38,30 +43,58 @@ class DiscoveryAgent:
             self,
             tables: list[TableMetaData],
             user_query: str,
-            pre_filter_n: int = KEYWORD_PRE_FILTER_TOP_N
+            pre_filter_n: int = KEYWORD_PRE_FILTER_TOP_N,
+            schema_version: str | None = None
     ) -> DiscoveryResult:
         
-        # 1. keyword pre-filter
+        # 1. keyword + semantic candidates over all tables
         
-        logger.info('DiscoveryAgent: Keyword prefilter on %d tables', len(tables))
+        logger.info('DiscoveryAgent phase 1: Keyword + Semantic on %d tables', len(tables))
 
-        kw_scores = await self.keyword_agent.score(tables, user_query)
+        # none of these depend on the keyword top-N; the FK graph is only needed in phase 2
+        _, graph, kw_scores = await asyncio.gather(
+            self.semantic_agent.prepare(tables, user_query, schema_version=schema_version),
+            asyncio.to_thread(self.fk_graph_agent.graph, tables, schema_version),
+            self.keyword_agent.score(tables, user_query, schema_version=schema_version)
+        )
         sorted_by_kw = sorted(kw_scores.items(), key=lambda x:x[1], reverse=True)
         top_n_names = {name for name, _ in sorted_by_kw[:pre_filter_n]}
-        pre_filtered = [t for t in tables if t.table_name in top_n_names]
 
-        logger.info('DiscoveryAgent phase 1: %d -> %d tables', len(tables), len(pre_filtered))
+        sem_scores = await self.semantic_agent.score(
+            tables, user_query,
+            top_n=pre_filter_n,
+            include=top_n_names,
+            schema_version=schema_version
+        )
+
+        candidate_names = top_n_names | set(sem_scores)
+
+        logger.info(
+            'DiscoveryAgent phase 1: %d -> %d tables (%d semantic-only)',
+            len(tables), len(candidate_names), len(candidate_names - top_n_names)
+        )
 
-        #2. semantic + FK in parallel
+        #2. FK graph over the full schema, seeded from the candidates
 
-        logger.info('DiscoveryAgent phase2: Semantic + FK in parallel on %d tables', len(pre_filtered))
+        seeds = graph.find_seeds(user_query, within=candidate_names)
+        fk_scores = graph.distance_scores(seeds)
 
-        sem_scores, fk_scores = await asyncio.gather(
-            self.semantic_agent.score(pre_filtered, user_query),
-            self.fk_graph_agent.score(pre_filtered, user_query)
+        bridges = graph.bridges(seeds, limit=pre_filter_n) - candidate_names
+        if bridges:
+            logger.info('DiscoveryAgent phase 2: +%d bridge tables %s', len(bridges), sorted(bridges)[:10])
+            candidate_names |= bridges
+
+        pre_filtered = [t for t in tables if t.table_name in candidate_names]
+
+        #3. column-level scores for the candidates
+
+        names = [t.table_name for t in pre_filtered]
+        kw_columns, sem_columns = await asyncio.gather(
+            self.keyword_agent.score_columns(tables, user_query, names, schema_version=schema_version),
+            self.semantic_agent.score_columns(tables, user_query, names, schema_version=schema_version)
         )
 
-        merged = self._merge_and_rank(pre_filtered, kw_scores, sem_scores, fk_scores)
+        merged = self._merge_and_rank(pre_filtered, kw_scores, sem_scores, fk_scores, kw_columns, sem_columns)
 
         logger.info('Discover Agent: ranked %d tables, top-5 = %s', len(merged), [s.table.table_name for s in merged[:5]])
 
@@ -75,14 +108,18 @@ class DiscoveryAgent:
             tables: list[TableMetaData],
             kw: dict[str, float],
             sem: dict[str, float],
-            fk: dict[str, float]
+            fk: dict[str, float],
+            kw_columns: dict[str, list[float]] | None = None,
+            sem_columns: dict[str, list[float]] | None = None
     ) -> list[ScoredTable]:
         agg: dict[str, dict] = defaultdict(
             lambda: {"score": 0.0, "found_by": []}
         )
 
+        candidate_names = {t.table_name for t in tables}
+
         for name, score in kw.items():
-            if name not in {t.table_name for t in tables}:
+            if name not in candidate_names:
                 continue
 
             agg[name]["score"] += score * WEIGHTS["keywords"]
@@ -107,6 +144,7 @@ class DiscoveryAgent:
                     table=table_map[name],
                     score=round(data['score'], 4),
                     found_by=list(set(data['found_by'])),
+                    column_scores=self._column_scores(table_map[name], kw_columns or {}, sem_columns or {}),
                 )
                 for name, data in agg.items() if name in table_map
             ],
@@ -114,4 +152,23 @@ class DiscoveryAgent:
             reverse=True
         )
 
-        return ranked
\ No newline at end of file
+        return ranked
+
+    def _column_scores(
+            self,
+            table: TableMetaData,
+            kw_columns: dict[str, list[float]],
+            sem_columns: dict[str, list[float]]
+    ) -> dict[str, float]:
+        kw = kw_columns.get(table.table_name)
+        sem = sem_columns.get(table.table_name)
+        if kw is None and sem is None:
+            return {}
+
+        total = WEIGHTS["keywords"] + WEIGHTS["semantic"]
+        return {
+            col.column_name: round(
+                ((kw[i] if kw else 0.0) * WEIGHTS["keywords"] + (sem[i] if sem else 0.0) * WEIGHTS["semantic"]) / total, 4
+            )
+            for i, col in enumerate(table.columns)
+        }
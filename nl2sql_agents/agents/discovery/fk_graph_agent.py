@@ -10,66 +10,186 @@ BFS-walk from seed tables, and scores by graph distance.
 | 1 (neighbors)              | 0.5   | Directly linked via FK      |
 | 2 (neighbors of neighbors) | 0.25  | Two hops away               |
 
+The graph covers the FULL schema (not just the pre-filtered candidates, so bridge
+tables dropped by the pre-filter still connect seeds) and is built once per schema
+version as CSR arrays, together with every table's rings at distance 1..MAX_DEPTH.
+Scoring is a lookup-and-merge over the seeds' rings instead of a per-request BFS.
+
+Rings are not expanded through hub tables (more than FK_HUB_DEGREE FK neighbours):
+every pair of a hub's neighbours is two hops apart, O(degree^2) ring entries. Seeds
+that reach a hub before MAX_DEPTH are scored by a BFS from the seeds instead, which
+only touches the hub's own neighbours.
 """
 
+import asyncio
 import logging
-from collections import deque
+import threading
+import numpy as np
+from dataclasses import dataclass
 from nl2sql_agents.models.schemas import TableMetaData
+from nl2sql_agents.config.settings import FK_HUB_DEGREE
 
 logger = logging.getLogger(__name__)
 
 MAX_DEPTH = 2
 
-class FKGraphAgent:
-    async def score(self, tables: list[TableMetaData], user_query: str) -> dict[str, float]:
-        graph = self._build_fk_graph(tables)
-        seeds = self._find_seeds(tables, user_query)
-        
-        logger.debug('FKGraphAgent: seeds=%s', seeds)
-        return self._bfs_score(seeds, graph, MAX_DEPTH)
+def _sorted_unique(keys: np.ndarray) -> np.ndarray:
+    """Sort-based unique (much faster than np.unique's hash path on large int64 key arrays)"""
+    keys = np.sort(keys)
+    if len(keys):
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    return keys
+
+@dataclass
+class _CSR:
+    indptr: np.ndarray
+    indices: np.ndarray
+
+    def row(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def rows(self, ids: np.ndarray) -> np.ndarray:
+        if not len(ids):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.row(i) for i in ids])
+
 
-    def _build_fk_graph(self, tables: list[TableMetaData])-> dict[str, set[str]]:
+class FKGraph:
+    """Full-schema FK graph for one schema version"""
 
-        graph: dict[str, set[str]] = {t.table_name: set() for t in tables}
+    def __init__(
+            self,
+            tables: list[TableMetaData],
+            max_depth: int = MAX_DEPTH,
+            hub_degree: int = FK_HUB_DEGREE
+    ) -> None:
+        self.names = [t.table_name for t in tables]
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
 
-        for table in tables:
+        src: list[int] = []
+        dst: list[int] = []
+        for i, table in enumerate(tables):
             for col in table.columns:
                 if col.is_foreign_key and col.reference_column:
-                    graph[table.table_name].add(col.reference_table)
-                    if col.reference_table in graph:
-                        graph[col.reference_table].add(table.table_name)
-        return graph
-    
-    def _find_seeds(self, tables: list[TableMetaData], user_query: str) -> list[str]:
-        """seed = table whose name-parts appear in the user query"""
+                    j = self.positions.get(col.reference_table)
+                    if j is not None and j != i:
+                        src += (i, j)
+                        dst += (j, i)
+
+        # adjacency: sorted unique neighbours per table
+        pairs = _sorted_unique(np.asarray(src, dtype=np.int64) * n + np.asarray(dst, dtype=np.int64))
+        src, dst = pairs // n, pairs % n
+        counts = np.bincount(src, minlength=n)
+        adjacency = _CSR(np.concatenate(([0], np.cumsum(counts))), dst)
+        self.hubs = counts > hub_degree if hub_degree > 0 else np.zeros(n, dtype=bool)
+
+        # rings[d - 1].row(i) = tables at exactly distance d from table i over paths that
+        # do not pass through a hub, expanded for all tables at once on (table, table)
+        # pair keys = i * n + j
+        self.rings: list[_CSR] = [adjacency]
+        seen = _sorted_unique(np.concatenate((pairs, np.arange(n, dtype=np.int64) * (n + 1))))
+        for _ in range(2, max_depth + 1):
+            deg = np.where(self.hubs[dst], 0, counts[dst])
+            step = np.arange(deg.sum()) - np.repeat(np.cumsum(deg) - deg, deg)
+            keys = _sorted_unique(np.repeat(src, deg) * n + adjacency.indices[np.repeat(adjacency.indptr[dst], deg) + step])
+            keys = keys[~np.isin(keys, seen, assume_unique=True)]
+            seen = _sorted_unique(np.concatenate((seen, keys)))
+
+            src, dst = keys // n, keys % n
+            self.rings.append(_CSR(np.concatenate(([0], np.cumsum(np.bincount(src, minlength=n)))), dst))
+
+        # seed lookup: name part -> table ids (same parts as the per-table check)
+        self.parts: dict[str, list[int]] = {}
+        for i, name in enumerate(self.names):
+            for part in set(name.lower().replace('_', ' ').split()):
+                if len(part) > 2:
+                    self.parts.setdefault(part, []).append(i)
+
+        logger.info(
+            "FKGraph: %d tables, %d FK edges, %d hubs, %d ring entries up to depth %d",
+            n, len(adjacency.indices) // 2, int(self.hubs.sum()), sum(len(r.indices) for r in self.rings), max_depth
+        )
 
+    def find_seeds(self, user_query: str, within: set[str] | None = None) -> np.ndarray:
+        """seed = table whose name-parts appear in the user query"""
         query_lower = user_query.lower()
-        seeds = []
-        for table in tables:
-            parts = table.table_name.lower().replace('_', ' ').split()
-            if any(part in query_lower for part in parts if len(part) > 2):
-                seeds.append(table.table_name)
-        return seeds
-    
-    def _bfs_score(self, seeds: list[str], graph: dict[str, set[str]], max_depth: int) -> dict[str, float]:
-        scores: dict[str, float] = {}
-        visited: set[str] = set()
-        queue: deque[tuple[str, int]] = deque()
-
-        for seed in seeds:
-            queue.append((seed, 0))
-            visited.add(seed)
-
-        while queue:
-            node, depth = queue.popleft()
-            if depth > max_depth:
-                continue
-            score = 1.0 / (2 ** depth)
-            scores[node] = max(scores.get(node, 0.0), score)
-
-            for neighbor in graph.get(node, []):
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append((neighbor, depth+1))
-        
-        return scores
\ No newline at end of file
+        ids = {i for part, table_ids in self.parts.items() if part in query_lower for i in table_ids}
+        if within is not None:
+            ids = {i for i in ids if self.names[i] in within}
+        return np.asarray(sorted(ids), dtype=np.int64)
+
+    def _bfs_scores(self, seeds: np.ndarray) -> np.ndarray:
+        scores = np.zeros(len(self.names))
+        scores[seeds] = 1.0
+        visited = scores > 0
+        frontier = seeds
+        for depth in range(1, len(self.rings) + 1):
+            frontier = _sorted_unique(self.rings[0].rows(frontier))
+            frontier = frontier[~visited[frontier]]
+            visited[frontier] = True
+            scores[frontier] = 1.0 / (2 ** depth)
+        return scores
+
+    def distance_scores(self, seeds: np.ndarray) -> dict[str, float]:
+        """1 / 2**distance to the nearest seed, for every table within MAX_DEPTH"""
+        # the first hub on a path is in a hub-free ring, so this finds every path through one
+        inner = np.concatenate([seeds] + [self.rings[d].rows(seeds) for d in range(len(self.rings) - 1)])
+        if self.hubs[inner].any():
+            scores = self._bfs_scores(seeds)
+        else:
+            scores = np.zeros(len(self.names))
+            # farthest ring first so nearer rings overwrite with the higher score
+            for depth in range(len(self.rings), 0, -1):
+                scores[self.rings[depth - 1].rows(seeds)] = 1.0 / (2 ** depth)
+            scores[seeds] = 1.0
+
+        hit = np.flatnonzero(scores)
+        return {self.names[i]: float(scores[i]) for i in hit}
+
+    def bridges(self, seeds: np.ndarray, limit: int | None = None) -> set[str]:
+        """
+        Non-seed tables directly linked to two or more seeds (join paths between them),
+        the `limit` best connected ones when given.
+        """
+        neighbours = self.rings[0].rows(seeds)
+        if not len(neighbours):
+            return set()
+        ids, counts = np.unique(neighbours, return_counts=True)
+        keep = (counts >= 2) & ~np.isin(ids, seeds)
+        ids, counts = ids[keep], counts[keep]
+        if limit is not None and len(ids) > limit:
+            ids = ids[np.argsort(-counts, kind="stable")[:limit]]
+        return {self.names[i] for i in ids}
+
+class FKGraphAgent:
+    def __init__(self) -> None:
+        self._graph: tuple[str, FKGraph] | None = None
+        self._lock = threading.Lock()
+
+    def graph(self, tables: list[TableMetaData], schema_version: str | None = None) -> FKGraph:
+        with self._lock:
+            if self._graph is not None and schema_version is not None and self._graph[0] == schema_version:
+                return self._graph[1]
+
+            graph = FKGraph(tables)
+            if schema_version is not None:
+                self._graph = (schema_version, graph)
+            return graph
+
+    async def score(
+            self,
+            tables: list[TableMetaData],
+            user_query: str,
+            candidates: set[str] | None = None,
+            schema_version: str | None = None
+    ) -> dict[str, float]:
+        """
+        `tables` is the full schema (graph), `candidates` restricts where seeds are
+        looked for (all tables when None).
+        """
+        graph = await asyncio.to_thread(self.graph, tables, schema_version)
+        seeds = graph.find_seeds(user_query, within=candidates)
+
+        logger.debug('FKGraphAgent: seeds=%s', [graph.names[i] for i in seeds])
+        return graph.distance_scores(seeds)
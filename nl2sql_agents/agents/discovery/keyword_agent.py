@@ -3,12 +3,17 @@ Sub-Agent 1a - Keyword Agent (No LLM)
 
 Extract Meaningful tokens from user query and fuzzy-matches aginst table names and column names. Returns {tablename: score}
 
+Matching runs against a KeywordIndex (keyword_index.py) built once per schema version,
+off the event loop thread. Scores are identical to the plain SequenceMatcher loop.
+score_columns() returns the per-column matches for the candidate tables.
+
 """
 
 import re
+import asyncio
 import logging
-from difflib import SequenceMatcher
 from nl2sql_agents.models.schemas import TableMetaData
+from nl2sql_agents.agents.discovery.keyword_index import KeywordIndex
 
 logger = logging.getLogger(__name__)
 
@@ -19,43 +24,60 @@ STOP_WORDS = {
     "how", "many", "much", "what", "which", "who",
 }
 
+def extract_keywords(query: str) -> list[str]:
+    tokens = re.findall(r"[a-zA-Z]+", query.lower())
+    return [t for t in tokens if t not in STOP_WORDS and len(t) > 2]
+
 class KeywordAgent:
+    def __init__(self) -> None:
+        self._index: tuple[str, KeywordIndex] | None = None
+
+    def _get_index(self, tables: list[TableMetaData], schema_version: str | None) -> KeywordIndex:
+        if self._index is not None and schema_version is not None and self._index[0] == schema_version:
+            return self._index[1]
+
+        index = KeywordIndex(tables)
+        if schema_version is not None:
+            self._index = (schema_version, index)
+        return index
+
+    def _score_sync(
+            self,
+            tables: list[TableMetaData],
+            keywords: list[str],
+            schema_version: str | None
+    ) -> dict[str, float]:
+        return self._get_index(tables, schema_version).score(keywords)
+
     async def score(
             self,
             tables: list[TableMetaData],
-            user_query: str
+            user_query: str,
+            schema_version: str | None = None
     ) -> dict[str, float]:
         keywords = self._extract_keywords(user_query)
         logger.debug('KeywordAgent: Keywords=%s', keywords)
 
-        return {
-            t.table_name: self._score_table(t, keywords)
-            for t in tables
-        }
+        if not tables:
+            return {}
+
+        return await asyncio.to_thread(self._score_sync, tables, keywords, schema_version)
     
+    async def score_columns(
+            self,
+            tables: list[TableMetaData],
+            user_query: str,
+            table_names: list[str],
+            schema_version: str | None = None
+    ) -> dict[str, list[float]]:
+        """{table_name: per-column scores in column order} for `table_names`"""
+        keywords = self._extract_keywords(user_query)
+        if not tables or not table_names:
+            return {}
+
+        return await asyncio.to_thread(
+            lambda: self._get_index(tables, schema_version).column_scores(keywords, table_names)
+        )
+
     def _extract_keywords(self, query: str) -> list[str]:
-        tokens = re.findall(r"[a-zA-Z]+", query.lower())
-        return [t for t in tokens if t not in STOP_WORDS and len(t) > 2]
-    
-    def _score_table(self, table: TableMetaData, keywords: list[str]) -> float:
-        if not keywords:
-            return 0.0
-        
-        candidates = [table.table_name.lower()] + [
-            c.column_name.lower() for c in table.columns
-        ]
-
-        best_scores = []
-        for kw in keywords:
-            kw_best = max(
-                self._fuzzy_score(kw, candidate)
-                for candidate in candidates
-            )
-            best_scores.append(kw_best)
-
-        return round(sum(best_scores) / len(best_scores), 4)
-    
-    def _fuzzy_score(self, keyword: str, target: str) -> float:
-        if keyword in target:
-            return 1.0
-        return SequenceMatcher(None, keyword, target).ratio()
\ No newline at end of file
+        return extract_keywords(query)
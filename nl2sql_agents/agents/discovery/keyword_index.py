@@ -0,0 +1,186 @@
+"""
+Keyword Index - precompiled per schema version for KeywordAgent
+
+Built once per schema version over every table name + column name:
+- unique (lower-cased) names, tables -> name ids in CSR arrays
+- trigram inverted index: name ids containing each trigram (exact substring hits)
+- character-count matrix: vectorized difflib `quick_ratio` upper bound for every name
+
+Scoring a keyword reproduces KeywordAgent's fuzzy score exactly
+(1.0 on substring, else SequenceMatcher.ratio) but only runs SequenceMatcher where
+the upper bound could still change a table's best score: tables are resolved in
+rounds of decreasing bound thresholds. Ratios are memoized per keyword.
+Per-column scores (best over the keywords) are computed on demand for candidate tables.
+"""
+
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from difflib import SequenceMatcher
+
+from nl2sql_agents.models.schemas import TableMetaData
+
+logger = logging.getLogger(__name__)
+
+BOUND_THRESHOLDS = (0.8, 0.6, 0.4, 0.0)
+RATIO_MEMO_KEYWORDS = 512
+
+def trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class KeywordIndex:
+    def __init__(self, tables: list[TableMetaData]) -> None:
+        name_ids: dict[str, int] = {}
+        pair_names: list[int] = []
+        offsets = [0]
+
+        for table in tables:
+            for name in [table.table_name] + [c.column_name for c in table.columns]:
+                pair_names.append(name_ids.setdefault(name.lower(), len(name_ids)))
+            offsets.append(len(pair_names))
+
+        self.table_names = [t.table_name for t in tables]
+        self.positions = {name: i for i, name in enumerate(self.table_names)}
+        self.names = list(name_ids)
+        self.pair_names = np.asarray(pair_names, dtype=np.int64)
+        self.offsets = np.asarray(offsets[:-1], dtype=np.int64)
+        self.ends = np.asarray(offsets[1:], dtype=np.int64)
+        self.pair_tables = np.repeat(np.arange(len(tables)), np.diff(offsets))
+
+        postings: dict[str, list[int]] = {}
+        for name_id, name in enumerate(self.names):
+            for tri in trigrams(name):
+                postings.setdefault(tri, []).append(name_id)
+        self.postings = {tri: np.asarray(ids, dtype=np.int64) for tri, ids in postings.items()}
+
+        alphabet = sorted({ch for name in self.names for ch in name})
+        self.char_pos = {ch: i for i, ch in enumerate(alphabet)}
+        self.char_counts = np.zeros((len(self.names), len(alphabet)), dtype=np.uint16)
+        for name_id, name in enumerate(self.names):
+            for ch in name:
+                self.char_counts[name_id, self.char_pos[ch]] += 1
+        self.lengths = np.asarray([len(n) for n in self.names], dtype=np.float64)
+
+        self._memo: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._memo_lock = threading.Lock()  # scoring runs in worker threads
+
+        logger.info(
+            "KeywordIndex: %d tables, %d name slots, %d unique names, %d trigrams",
+            len(tables), len(self.pair_names), len(self.names), len(self.postings)
+        )
+
+    def _substring_hits(self, keyword: str) -> np.ndarray:
+        grams = trigrams(keyword)
+        if not grams:
+            return np.asarray([i for i, n in enumerate(self.names) if keyword in n], dtype=np.int64)
+
+        lists = sorted((self.postings.get(g) for g in grams), key=lambda a: 0 if a is None else len(a))
+        if lists[0] is None:
+            return np.empty(0, dtype=np.int64)
+
+        candidates = lists[0]
+        for ids in lists[1:]:
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+            if not len(candidates):
+                break
+        return np.asarray([i for i in candidates if keyword in self.names[i]], dtype=np.int64)
+
+    def _upper_bounds(self, keyword: str) -> np.ndarray:
+        """difflib quick_ratio for every name: 2 * |common chars| / (len_a + len_b) >= ratio"""
+        kw_counts: dict[int, int] = {}
+        for ch in keyword:
+            if ch in self.char_pos:
+                kw_counts[self.char_pos[ch]] = kw_counts.get(self.char_pos[ch], 0) + 1
+
+        if not kw_counts:
+            return np.zeros(len(self.names))
+
+        cols = np.fromiter(kw_counts.keys(), dtype=np.int64)
+        need = np.fromiter(kw_counts.values(), dtype=np.uint16)
+        common = np.minimum(self.char_counts[:, cols], need).sum(axis=1)
+        return 2.0 * common / (self.lengths + len(keyword))
+
+    def _ratios(self, keyword: str) -> np.ndarray:
+        """Memoized per-name scores for one keyword; NaN = not computed yet"""
+        with self._memo_lock:
+            memo = self._memo.get(keyword)
+            if memo is not None:
+                self._memo.move_to_end(keyword)
+                return memo
+
+        memo = np.full(len(self.names), np.nan)
+        memo[self._substring_hits(keyword)] = 1.0
+
+        with self._memo_lock:
+            memo = self._memo.setdefault(keyword, memo)
+            if len(self._memo) > RATIO_MEMO_KEYWORDS:
+                self._memo.popitem(last=False)
+        return memo
+
+    def _fill(self, keyword: str, ratios: np.ndarray, name_ids: np.ndarray) -> None:
+        """Compute the still-missing ratios among `name_ids`"""
+        matcher = SequenceMatcher(None, keyword, "")  # same (keyword, name) order as the legacy score
+        for name_id in np.unique(name_ids):
+            if np.isnan(ratios[name_id]):
+                matcher.set_seq2(self.names[name_id])
+                ratios[name_id] = matcher.ratio()
+
+    def best_scores(self, keyword: str) -> np.ndarray:
+        """Best fuzzy score per table for one keyword, identical to the brute-force loop"""
+        ratios = self._ratios(keyword)
+        bounds = self._upper_bounds(keyword)
+        pair_bounds = bounds[self.pair_names]
+        n_tables = len(self.table_names)
+
+        unresolved = np.ones(n_tables, dtype=bool)
+        best = np.zeros(n_tables)
+
+        for threshold in BOUND_THRESHOLDS:
+            pair_open = unresolved[self.pair_tables] & np.isnan(ratios[self.pair_names]) & (pair_bounds >= threshold)
+            self._fill(keyword, ratios, self.pair_names[pair_open])
+
+            known = ratios[self.pair_names]
+            best = np.maximum.reduceat(np.nan_to_num(known, nan=0.0), self.offsets)
+
+            # a table is resolved once no uncomputed name could beat its best so far
+            pending_bound = np.where(np.isnan(known), pair_bounds, 0.0)
+            unresolved = best < np.maximum.reduceat(pending_bound, self.offsets)
+            if not unresolved.any():
+                break
+
+        return best
+
+    def score(self, keywords: list[str]) -> dict[str, float]:
+        if not keywords:
+            return {name: 0.0 for name in self.table_names}
+
+        total = np.zeros(len(self.table_names))
+        for kw in keywords:
+            total += self.best_scores(kw)
+
+        mean = total / len(keywords)
+        return {name: round(float(s), 4) for name, s in zip(self.table_names, mean)}
+
+    def column_scores(self, keywords: list[str], table_names: list[str]) -> dict[str, list[float]]:
+        """Best fuzzy score over the keywords for every column of the given tables (column order)"""
+        positions = [self.positions[name] for name in table_names if name in self.positions]
+        if not keywords or not positions:
+            return {self.table_names[p]: [0.0] * int(self.ends[p] - self.offsets[p] - 1) for p in positions}
+
+        # column slots only: skip the table-name slot at the start of every table
+        slots = np.concatenate([np.arange(self.offsets[p] + 1, self.ends[p]) for p in positions])
+        name_ids = self.pair_names[slots]
+
+        best = np.zeros(len(slots))
+        for kw in keywords:
+            ratios = self._ratios(kw)
+            self._fill(kw, ratios, name_ids)
+            best = np.maximum(best, ratios[name_ids])
+
+        out, start = {}, 0
+        for p in positions:
+            n_cols = int(self.ends[p] - self.offsets[p] - 1)
+            out[self.table_names[p]] = [round(float(s), 4) for s in best[start:start + n_cols]]
+            start += n_cols
+        return out
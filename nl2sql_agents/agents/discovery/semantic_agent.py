@@ -2,60 +2,201 @@
 Sub-Agent 1b - Semantic Agent
 
 Embeds the user query and table descriptions using OpenAIEmbeddings.
+Table embeddings come from the persistent EmbeddingStore (cache/embedding_store.py):
+only the query is embedded per request, new/changed tables are embedded lazily.
+
+Every table is embedded as chunks of SEMANTIC_CHUNK_COLUMNS columns, so columns past
+the first chunk are seen too; a table scores as its best chunk, a column as its chunk.
+
+Scoring is vectorized: one pre-normalized (chunks x dim) matrix per schema version,
+cosine similarity for every chunk = one matmul, per-table max = np.maximum.reduceat,
+top-k = np.argpartition.
+For huge schemas (>= SEMANTIC_ANN_MIN_TABLES) an IVF index (ann_index.py) over the
+chunks is used instead of the full matmul.
+
 Return Cosine similarity scores: {table_name: similarity}
 """
 
+import asyncio
 import logging
 import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass
+
 from nl2sql_agents.models.schemas import TableMetaData
-from nl2sql_agents.config.settings import EMBEDDING_PROVIDER
+from nl2sql_agents.agents.discovery.ann_index import IVFIndex, l2_normalize
+from nl2sql_agents.cache.embedding_store import EmbeddingStore
+from nl2sql_agents.config.settings import (
+    EMBEDDING_PROVIDER, SEMANTIC_ANN_MIN_TABLES, SEMANTIC_ANN_NPROBE, SEMANTIC_CHUNK_COLUMNS
+)
 
 logger = logging.getLogger(__name__)
 
-def _cosine_similarity(a: list[float], b: list[float]) -> float:
-    va, vb = np.array(a), np.array(b)
-    # Calculate product of magnitudes (L2 norms)
-    # ||a|| * ||b||
-    norm = np.linalg.norm(va) * np.linalg.norm(vb)
-
-    """
-    # Two similar vectors (both about "sales")
-    a = [0.5, 0.8, 0.2, 0.1]   # embedding for "revenue"
-    b = [0.6, 0.7, 0.3, 0.2]   # embedding for "sales"
-
-    # Dot product: 0.5*0.6 + 0.8*0.7 + 0.2*0.3 + 0.1*0.2 = 0.88
-    # ||a|| = sqrt(0.25 + 0.64 + 0.04 + 0.01) = 0.949
-    # ||b|| = sqrt(0.36 + 0.49 + 0.09 + 0.04) = 0.990
-    # Result: 0.88 / (0.949 * 0.990) ≈ 0.94  ← very similar!
-
-    # Two unrelated vectors
-    c = [0.9, 0.1, 0.0, 0.0]   # embedding for "apple" (fruit)
-    d = [0.1, 0.9, 0.8, 0.5]   # embedding for "car" (vehicle)
-    # Result: ≈ 0.15  ← not similar
-    """
+QUERY_CACHE_SIZE = 256
 
-    return float(np.dot(va, vb)/norm) if norm > 0 else 0.0
+@dataclass
+class _TableMatrix:
+    version: str | None
+    names: list[str]
+    positions: dict[str, int]
+    matrix: np.ndarray          # (n_chunks, dim) float32, rows L2-normalised, chunks grouped by table
+    offsets: np.ndarray         # first chunk row of every table
+    ends: np.ndarray            # one past the last chunk row of every table
+    chunk_table: np.ndarray     # table position of every chunk row
+    n_columns: np.ndarray       # column count of every table
+    ann: IVFIndex | None = None
 
 class SemanticAgent:
     def __init__(self) -> None:
         self.embeddings = EMBEDDING_PROVIDER.embeddings_model()
+        self.store = EmbeddingStore(EMBEDDING_PROVIDER.embedding_model, self.embeddings)
+        self._index: _TableMatrix | None = None
+        self._index_lock = asyncio.Lock()
+        self._queries: OrderedDict[str, np.ndarray | None] = OrderedDict()
+
+    async def _table_matrix(self, tables: list[TableMetaData], schema_version: str | None) -> _TableMatrix:
+        index = self._index
+        if index is not None and schema_version is not None and index.version == schema_version:
+            return index
+
+        async with self._index_lock:
+            index = self._index
+            if index is not None and schema_version is not None and index.version == schema_version:
+                return index
+
+            chunks = [self._table_to_texts(t) for t in tables]
+            counts = np.asarray([len(c) for c in chunks], dtype=np.int64)
+            vectors = await self.store.embed([text for table_chunks in chunks for text in table_chunks])
+            names = [t.table_name for t in tables]
+            ends = np.cumsum(counts)
+
+            index = _TableMatrix(
+                version=schema_version,
+                names=names,
+                positions={name: i for i, name in enumerate(names)},
+                matrix=l2_normalize(vectors.astype(np.float32, copy=False)) if len(vectors) else vectors,
+                offsets=ends - counts,
+                ends=ends,
+                chunk_table=np.repeat(np.arange(len(tables)), counts),
+                n_columns=np.asarray([len(t.columns) for t in tables], dtype=np.int64),
+            )
+
+            if len(tables) >= SEMANTIC_ANN_MIN_TABLES:
+                index.ann = await asyncio.to_thread(IVFIndex, index.matrix, None, SEMANTIC_ANN_NPROBE)
+
+            if schema_version is not None:
+                self._index = index
+            return index
+
+    async def embed_query(self, user_query: str) -> np.ndarray | None:
+        """L2-normalised query embedding (None for a zero vector), memoized per query text"""
+        if user_query in self._queries:
+            self._queries.move_to_end(user_query)
+            return self._queries[user_query]
+
+        q = np.asarray(await self.embeddings.aembed_query(user_query), dtype=np.float32)
+        norm = np.linalg.norm(q)
+        q = q / norm if norm else None
+
+        self._queries[user_query] = q
+        if len(self._queries) > QUERY_CACHE_SIZE:
+            self._queries.popitem(last=False)
+        return q
+
+    async def prepare(self, tables: list[TableMetaData], user_query: str, schema_version: str | None = None) -> None:
+        """Embed the query and build the table matrix ahead of score() (both memoized)"""
+        if tables:
+            await asyncio.gather(self.embed_query(user_query), self._table_matrix(tables, schema_version))
+
+    def _table_sims(self, index: _TableMatrix, q: np.ndarray, positions: list[int]) -> np.ndarray:
+        """Exact best-chunk similarity for the given table positions"""
+        rows = np.concatenate([np.arange(index.offsets[p], index.ends[p]) for p in positions])
+        starts = np.concatenate(([0], np.cumsum(index.ends[positions] - index.offsets[positions])[:-1]))
+        return np.maximum.reduceat(index.matrix[rows] @ q, starts)
 
     async def score(
-            self, tables: list[TableMetaData], user_query: str
+            self,
+            tables: list[TableMetaData],
+            user_query: str,
+            top_n: int | None = None,
+            include: set[str] | None = None,
+            schema_version: str | None = None
     ) -> dict[str, float]:
-        logger.debug("SemanticAgent: embedding query + %d tables", len(tables))
+        """
+        Similarity for the top_n most similar tables (all tables when top_n is None),
+        plus every table named in `include`.
+        """
+        logger.debug("SemanticAgent: embedding query, scoring %d tables", len(tables))
+
+        if not tables:
+            return {}
+
+        q, index = await asyncio.gather(
+            self.embed_query(user_query),
+            self._table_matrix(tables, schema_version)
+        )
+
+        if q is None or index.matrix.size == 0:
+            return {t.table_name: 0.0 for t in tables} if top_n is None else {}
+
+        n = len(index.names)
+        if top_n is None or top_n >= n:
+            sims = np.maximum.reduceat(index.matrix @ q, index.offsets)
+            return {name: round(float(s), 4) for name, s in zip(index.names, sims)}
+
+        if index.ann is not None:
+            chunk_ids, _ = index.ann.search(q, top_n * 2)
+            idx = list(dict.fromkeys(index.chunk_table[chunk_ids].tolist()))
+            sims = self._table_sims(index, q, idx)
+            if len(idx) > top_n:
+                keep = np.argpartition(-sims, top_n - 1)[:top_n]
+                idx, sims = [idx[i] for i in keep], sims[keep]
+        else:
+            all_sims = np.maximum.reduceat(index.matrix @ q, index.offsets)
+            idx = np.argpartition(-all_sims, top_n - 1)[:top_n]
+            sims = all_sims[idx]
+
+        scores = {index.names[i]: round(float(s), 4) for i, s in zip(idx, sims)}
+
+        extra = [index.positions[name] for name in (include or ()) if name in index.positions and name not in scores]
+        if extra:
+            extra_sims = self._table_sims(index, q, extra)
+            scores.update({index.names[i]: round(float(s), 4) for i, s in zip(extra, extra_sims)})
+
+        return scores
 
-        texts = [user_query] + [self._table_to_text(t) for t in tables]
+    async def score_columns(
+            self,
+            tables: list[TableMetaData],
+            user_query: str,
+            table_names: list[str],
+            schema_version: str | None = None
+    ) -> dict[str, list[float]]:
+        """{table_name: per-column scores in column order}, each column scoring as its chunk"""
+        if not tables or not table_names:
+            return {}
 
-        all_embeddings = await self.embeddings.aembed_documents(texts)
+        q, index = await asyncio.gather(
+            self.embed_query(user_query),
+            self._table_matrix(tables, schema_version)
+        )
 
-        query_emb = all_embeddings[0]
-        table_embs = all_embeddings[1:]
+        out = {}
+        for name in table_names:
+            p = index.positions.get(name)
+            if p is None:
+                continue
+            n_cols = int(index.n_columns[p])
+            if q is None or index.matrix.size == 0:
+                out[name] = [0.0] * n_cols
+                continue
+            chunk_sims = index.matrix[index.offsets[p]:index.ends[p]] @ q
+            out[name] = [round(float(chunk_sims[i // SEMANTIC_CHUNK_COLUMNS]), 4) for i in range(n_cols)]
+        return out
 
-        return {
-            t.table_name: round(_cosine_similarity(query_emb, emb), 4) for t, emb in zip(tables, table_embs)
-        }
-    
-    def _table_to_text(self, table: TableMetaData) -> str:
-        col_names = ','.join(c.column_name for c in table.columns[:20])
-        return f"Table {table.table_name}: columns {col_names}"
+    def _table_to_texts(self, table: TableMetaData) -> list[str]:
+        cols = [c.column_name for c in table.columns]
+        return [
+            f"Table {table.table_name}: columns {','.join(cols[i:i + SEMANTIC_CHUNK_COLUMNS])}"
+            for i in range(0, max(len(cols), 1), SEMANTIC_CHUNK_COLUMNS)
+        ]
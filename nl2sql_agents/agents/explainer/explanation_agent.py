@@ -4,6 +4,7 @@ Explanation Agent - Translates SQL into plain English
 
 import logging
 from nl2sql_agents.agents.base_agent import BaseAgent
+from nl2sql_agents.llm.scheduler import Priority
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +13,8 @@ Given a SQL query and the original question, explain in 2-4 plain English senten
 
 
 class ExplanationAgent(BaseAgent):
+    priority = Priority.LOW
+
     def build_prompt(self, sql: str = "", user_query: str = "", **_) -> list[dict[str, str]]:
         USER_PROMPT = (
             f"Original question: {user_query}\n\n"
@@ -4,6 +4,7 @@ OPTIMIZATION AGENT - LLM SUGGESTS INDEX/PERFORMANCE IMPROVMENTS
 
 import logging
 from nl2sql_agents.agents.base_agent import BaseAgent
+from nl2sql_agents.llm.scheduler import Priority
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +14,8 @@ Be specific and actionable. If well-optimized, say so.
 Keep each hint to one sentence."""
 
 class OptimizationAgent(BaseAgent):
+    priority = Priority.LOW
+
     async def run(self, sql: str) -> str:
         messages = self.build_prompt(sql=sql)
         return await self.call_llm(
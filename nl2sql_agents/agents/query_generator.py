@@ -3,11 +3,15 @@ Agent 3 - QUERY GENERATOR (LLM)
 
 - Generates N SQL Candidates in parallel
 - Each candidate uses a different temperature / prompt vairent to maximise diversity (best-of-N pattern).
+- stream(): the same N calls, candidates yielded in completion order; closing the
+  stream cancels the calls still in flight (speculative best-of-N)
 """
 
 import asyncio
 import logging
+from typing import AsyncIterator
 from nl2sql_agents.agents.base_agent import BaseAgent
+from nl2sql_agents.llm.scheduler import Priority
 from nl2sql_agents.config.settings import N_CANDIDATES, CANDIDATE_TEMPERATURES
 from nl2sql_agents.models.schemas import ChatMessage, FormattedSchema, GenerationResult, SQLCandidate
 
@@ -29,6 +33,8 @@ PROMPT_VARIENT = [
 ]
 
 class QueryGeneratorAgent(BaseAgent):
+    priority = Priority.HIGH
+
     def build_prompt(
             self,
             schema: FormattedSchema,
@@ -104,6 +110,32 @@ class QueryGeneratorAgent(BaseAgent):
             candidates=list(candidates)
         )
 
+    async def stream(
+            self,
+            schema: FormattedSchema,
+            user_query: str,
+            n_candidates: int = N_CANDIDATES,
+            retry_context: str | None = None,
+            chat_history: list[ChatMessage] | None = None,
+    ) -> AsyncIterator[SQLCandidate]:
+        """FIRE N LLM CALLS PARALLELY, yield each candidate as soon as it is ready"""
+
+        temps = CANDIDATE_TEMPERATURES[:n_candidates]
+        varients = PROMPT_VARIENT[:n_candidates]
+
+        tasks = [
+            asyncio.create_task(self._generator_one(schema, user_query, t, v, retry_context, chat_history))
+            for t, v in zip(temps, varients)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            cancelled = sum(t.cancel() for t in tasks)
+            if cancelled:
+                logger.info("QueryGeneratorAgent: %d candidate calls cancelled", cancelled)
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     async def _generator_one(
             self,
             schema: FormattedSchema,
@@ -1,12 +1,20 @@
 """
-AGENT 2 -- SCHEMA FORMATTER (LLM)
+AGENT 2 -- SCHEMA FORMATTER
 
 TAKES TOP-K TABLES AND FORMATS THEM INTO A DDL-STYLE SCHEMA PROMPT
+
+SCHEMA_FORMATTER_MODE:
+- "ddl" (default): deterministic local renderer (db/ddl.py), fragments memoized per schema version
+- "llm": LLM round trip over the raw metadata dump (opt-in)
 """
 
 import logging
+from nl2sql_agents.db.ddl import DDLRenderer
+from nl2sql_agents.llm.tokens import count_tokens
 from nl2sql_agents.models.schemas import TableMetaData, FormattedSchema
 from nl2sql_agents.agents.base_agent import BaseAgent
+from nl2sql_agents.llm.scheduler import Priority
+from nl2sql_agents.config.settings import SCHEMA_FORMATTER_MODE
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +24,13 @@ Include table names, column names, data types, primary keys, foreign keys, and c
 Output ONLY the formatted schema — no explanation."""
 
 class SchemaFormatterAgent(BaseAgent):
+    priority = Priority.HIGH
+
+    def __init__(self, *args, mode: str = SCHEMA_FORMATTER_MODE, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.mode = mode
+        self.renderer = DDLRenderer()
+
     def build_prompt(
             self, tables: list[TableMetaData], **_
     ) -> list[dict[str, str]]:
@@ -52,16 +67,19 @@ class SchemaFormatterAgent(BaseAgent):
         return FormattedSchema(
             content=raw,
             table_names=[],
-            token_estimate=len(raw.split())
+            token_estimate=count_tokens(raw)
         )
     
-    async def format(self, tables: list[TableMetaData]) -> FormattedSchema:
-        logger.info("SchemaFormatterAgent: formatting %d tables", len(tables))
+    async def format(self, tables: list[TableMetaData], schema_version: str | None = None) -> FormattedSchema:
+        logger.info("SchemaFormatterAgent: formatting %d tables (mode=%s)", len(tables), self.mode)
 
-        result: FormattedSchema = await self.execute(
-            tables=tables,
-            temperature=0.1
-        )
+        if self.mode == "llm":
+            result: FormattedSchema = await self.execute(
+                tables=tables,
+                temperature=0.1
+            )
+        else:
+            result = self.parse_response(self.renderer.render(tables, schema_version=schema_version))
 
         result.table_names = [t.table_name for t in tables]
         logger.info("SchemaFormatterAgent: ~%d tokens", result.token_estimate)
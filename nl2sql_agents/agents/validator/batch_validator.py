@@ -0,0 +1,109 @@
+"""
+BATCH VALIDATOR - one LLM call for every surviving candidate
+
+Reviews all candidates on all LLM criteria (logic, plus syntax / performance
+when they are not checked locally) in a single request instead of one request
+per candidate per check; the question is sent once.
+
+Returns per-candidate, per-check verdict strings in the per-check format
+("PASS" / "WARN: ..." / "FAIL: ..."), parsed by the per-check validators'
+own parse_response(); None when the response is not usable JSON, candidates
+missing from the response are left out (the caller falls back to per-check calls)
+"""
+
+import json
+import logging
+from typing import Optional, Sequence
+from nl2sql_agents.agents.base_agent import BaseAgent
+
+logger = logging.getLogger(__name__)
+
+CRITERIA = {
+    "syntax": 'is the SQL syntactically valid? "PASS" or "FAIL: <brief reason>"',
+    "logic": (
+        'does the SQL correctly and completely answer the question (tables joined, '
+        'filters, aggregation, intent)? "PASS" or "FAIL: <brief reason>"'
+    ),
+    "performance": (
+        'Cartesian joins or missing JOIN conditions, missing WHERE filters on large tables, '
+        'SELECT *, unbounded result sets, functions on indexed columns in WHERE? '
+        '"PASS", "WARN: <brief concern>" or "FAIL: <critical issue>"'
+    ),
+}
+
+SYSTEM_PROMPT = """You are a SQL reviewer.
+Given a user question and several candidate SQL queries, review EACH candidate
+independently on these criteria:
+{criteria}
+
+Respond with ONLY a JSON object, no markdown:
+{{"candidates": [{{"id": <candidate id>, {fields}}}, ...]}}"""
+
+VERDICT_TOKENS = 60   # completion budget per candidate per criterion
+
+class BatchValidator(BaseAgent):
+    async def review(
+            self,
+            sqls: list[str],
+            user_query: str,
+            criteria: list[str]
+    ) -> Optional[list[Optional[dict[str, str]]]]:
+        """verdicts per candidate ({criterion: verdict}, None if missing), or None"""
+        messages = self.build_prompt(sqls=sqls, user_query=user_query, criteria=criteria)
+        raw = await self.call_llm(
+            messages,
+            temperature=0.0,
+            max_tokens=max(150, VERDICT_TOKENS * len(sqls) * len(criteria))
+        )
+        verdicts = self.parse_response(raw)
+        if verdicts is None:
+            logger.warning("BatchValidator: unparsable response, falling back to per-check calls")
+            return None
+
+        return [
+            v if (v := verdicts.get(i)) is not None and all(c in v for c in criteria) else None
+            for i in range(1, len(sqls) + 1)
+        ]
+
+    def build_prompt(
+            self,
+            sqls: Sequence[str] = (),
+            user_query: str = "",
+            criteria: Sequence[str] = (),
+            **_
+    ) -> list[dict[str, str]]:
+        system = SYSTEM_PROMPT.format(
+            criteria="\n".join(f"- {c}: {CRITERIA[c]}" for c in criteria),
+            fields=", ".join(f'"{c}": "<verdict>"' for c in criteria)
+        )
+        body = "\n\n".join(f"Candidate {i}:\n{sql}" for i, sql in enumerate(sqls, 1))
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": f"User Question: {user_query}\n\n{body}"},
+        ]
+
+    def parse_response(self, raw: str) -> Optional[dict[int, dict[str, str]]]:
+        start, end = raw.find("{"), raw.rfind("}")
+        if start < 0 or end <= start:
+            return None
+        try:
+            data = json.loads(raw[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+
+        items = data.get("candidates") if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            return None
+
+        verdicts: dict[int, dict[str, str]] = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                cid = int(item.get("id"))
+            except (TypeError, ValueError):
+                continue
+            verdicts[cid] = {
+                k.lower(): v.strip() for k, v in item.items() if str(k).lower() in CRITERIA and isinstance(v, str) and v.strip()
+            }
+        return verdicts
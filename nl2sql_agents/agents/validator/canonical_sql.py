@@ -0,0 +1,118 @@
+"""
+CANONICAL SQL - one form for candidates that differ only in presentation
+
+- sqlparse: comments stripped, keywords and operators (LIKE, IN, BETWEEN, ...) upper
+  case, identifiers lower case (SQLite names are case-insensitive), string literals untouched
+- whitespace: one space between tokens, none inside "(...)", before "," or around ".";
+  function names lower case, optional AS dropped (the form is a key, never executed)
+- trailing ";" dropped
+- aliases, only where that cannot change the meaning (a single SELECT, every table
+  once, no alias that is another table's name, no quoted names):
+    table aliases are replaced by the table name ("singer AS s ... s.name" ->
+    "singer ... singer.name"); with a single table the qualifier is dropped
+    ("name"), so "SELECT s.name FROM singer s" == "SELECT name FROM singer"
+"""
+
+import sqlparse
+from collections import Counter
+from sqlparse import tokens as T
+from sqlparse.sql import Token
+
+from nl2sql_agents.db.plan_analyzer import table_aliases
+
+_NO_SPACE_BEFORE = {")", ",", ".", "("}
+_NO_SPACE_AFTER = {"(", "."}
+
+# keywords that can precede "(" without being a function name ("IN (", "EXISTS (", ...);
+# sqlparse tags many functions as keywords ("COUNT (", "SUM (") and some of these as names
+_NOT_FUNCTIONS = {
+    "IN", "EXISTS", "NOT", "AND", "OR", "ON", "USING", "VALUES", "AS", "FROM", "WHERE", "HAVING",
+    "BETWEEN", "WHEN", "THEN", "ELSE", "CASE", "IS", "ALL", "ANY", "SOME", "SELECT", "DISTINCT",
+    "UNION", "UNION ALL", "INTERSECT", "EXCEPT", "OVER", "FILTER", "LIMIT", "OFFSET", "WITH", "RECURSIVE",
+}
+
+def _operator_keyword(tok: Token) -> bool:
+    """keyword-like token before "(" that is not a function name ("exists(" is a Name to sqlparse)"""
+    word = " ".join(tok.value.upper().split())
+    return word in _NOT_FUNCTIONS or word.endswith((" BY", "JOIN"))
+
+def _safe_aliases(formatted: str, tokens: list[Token]) -> dict[str, str] | None:
+    """{alias or name: table} when aliases can be rewritten safely, else None"""
+    if sum(t.ttype is T.DML and t.normalized == "SELECT" for t in tokens) != 1:
+        return None
+    if any(t.ttype is T.String.Symbol or t.value[:1] in ("`", "[") for t in tokens):
+        return None
+
+    mapping = {alias: table.lower() for alias, table in table_aliases(formatted).items()}
+    if not mapping or any(n > 1 for n in Counter(mapping.values()).values()):
+        return None
+    tables = set(mapping.values())
+    if any(alias != table and alias in tables for alias, table in mapping.items()):
+        return None
+    return mapping
+
+def _rewrite_aliases(tokens: list[Token], mapping: dict[str, str]) -> list[Token]:
+    aliases = {table: alias for alias, table in mapping.items() if alias != table}
+    single = len(mapping) == 1
+    out: list[Token] = []
+    i = 0
+    while i < len(tokens):
+        tok = tokens[i]
+        nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+        name = tok.value.lower() if tok.ttype is T.Name else None
+
+        # qualifier: alias.column / table.column
+        if name in mapping and nxt is not None and nxt.ttype is T.Punctuation and nxt.value == ".":
+            if single:
+                i += 2
+                continue
+            out.append(Token(T.Name, mapping[name]))
+            i += 1
+            continue
+
+        # definition: table [AS] alias
+        if name in aliases:
+            j = i + 1
+            if j < len(tokens) and tokens[j].ttype is T.Keyword and tokens[j].normalized == "AS":
+                j += 1
+            if j < len(tokens) and tokens[j].ttype is T.Name and tokens[j].value.lower() == aliases[name]:
+                out.append(tok)
+                i = j + 1
+                continue
+
+        out.append(tok)
+        i += 1
+    return out
+
+def canonical_sql(sql: str) -> str:
+    formatted = sqlparse.format(
+        sql.strip().rstrip(";").strip(),
+        keyword_case="upper",
+        identifier_case="lower",
+        strip_comments=True
+    )
+    statements = sqlparse.parse(formatted)
+    if not statements:
+        return formatted
+
+    tokens = [t for t in statements[0].flatten() if not t.is_whitespace]
+    mapping = _safe_aliases(formatted, tokens)
+    if mapping is not None:
+        tokens = _rewrite_aliases(tokens, mapping)
+
+    parts: list[str] = []
+    for i, tok in enumerate(tokens):
+        if tok.ttype is T.Keyword and tok.normalized == "AS":
+            continue
+        value = tok.value
+        keyword = tok.ttype in T.Keyword or tok.ttype in T.Operator.Comparison
+        if i + 1 < len(tokens) and tokens[i + 1].value == "(" and (tok.ttype in T.Name or tok.ttype in T.Keyword):
+            keyword = _operator_keyword(tok)
+            if not keyword:
+                value = value.lower()   # "count(" is a Name, "COUNT (" a Keyword to sqlparse
+        if keyword:
+            value = " ".join(value.upper().split())   # "not like" is not upper-cased by sqlparse
+        if parts and value not in _NO_SPACE_BEFORE and parts[-1] not in _NO_SPACE_AFTER:
+            parts.append(" ")
+        parts.append(value)
+    return "".join(parts)
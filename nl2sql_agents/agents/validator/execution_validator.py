@@ -0,0 +1,103 @@
+"""
+EXECUTION VALIDATOR - no LLM
+
+Runs each candidate on the sampled copy of the database (db/sample_db.py) and votes
+on the result sets (self-consistency):
+- error   -> FAIL (hard): the statement compiles but fails at run time
+- timeout -> inconclusive (score 0.5): over the sample's time / VM-step limit
+- empty   -> flagged in the details, scored like a result outside the consensus: no
+             rows on a sample is what a selective, correct filter often returns, so
+             it must not lose to an under-filtered query that returns rows
+- ok      -> the candidates returning the same rows vote together; the largest
+             group with >= EXECUTION_VOTE_MIN distinct queries (canonical SQL, no tie)
+             is the consensus (score 1.0), a result that disagrees with it scores 0.5;
+             identical queries are one vote, a query cannot agree with itself; between
+             groups with as many distinct queries, the one more variants produced wins
+
+Consensus members can skip the LLM logic check (ValidatorAgent).
+"""
+
+import logging
+from collections import Counter
+from nl2sql_agents.db.sample_db import SampleDatabase, ExecutionResult
+from nl2sql_agents.config.settings import EXECUTION_VOTE_MIN
+from nl2sql_agents.models.schemas import ValidatorCheckResult
+from nl2sql_agents.agents.validator.canonical_sql import canonical_sql
+
+logger = logging.getLogger(__name__)
+
+class ExecutionValidator:
+    def __init__(self, sample_db: SampleDatabase, vote_min: int = EXECUTION_VOTE_MIN) -> None:
+        self.sample_db = sample_db
+        self.vote_min = vote_min
+
+    async def run(self, sql: str, schema_version: str | None = None) -> ExecutionResult:
+        try:
+            return await self.sample_db.execute(sql, schema_version)
+        except Exception as e:
+            logger.warning("ExecutionValidator: sample database unavailable (%s)", e)
+            return ExecutionResult(status="timeout", error=f"sample database unavailable: {e}")
+
+    def vote(
+            self,
+            runs: dict[int, ExecutionResult],
+            queries: dict[int, str] | None = None,
+            weights: dict[int, int] | None = None
+    ) -> tuple[dict[int, ValidatorCheckResult], set[int]]:
+        """(execution check per candidate, candidates in the consensus);
+        `queries`: the SQL of each candidate, identical queries vote once;
+        `weights`: variants per candidate, only to break ties between results"""
+        keys = {i: canonical_sql(queries[i]) if queries and i in queries else i for i in runs}
+        supporters: dict[str, set] = {}
+        variants: Counter = Counter()
+        for i, r in runs.items():
+            if r.status == "ok":
+                supporters.setdefault(r.digest, set()).add(keys[i])
+                variants[r.digest] += (weights or {}).get(i, 1)
+        votes = Counter({digest: len(k) for digest, k in supporters.items()})
+        voters = len(set(keys.values()))
+
+        rank = {digest: (votes[digest], variants[digest]) for digest in votes}
+        ranked = sorted(rank, key=rank.get, reverse=True)[:2]
+        winner = None
+        if ranked and votes[ranked[0]] >= self.vote_min and (len(ranked) == 1 or rank[ranked[1]] < rank[ranked[0]]):
+            winner = ranked[0]
+
+        checks: dict[int, ValidatorCheckResult] = {}
+        consensus: set[int] = set()
+        for i, r in runs.items():
+            rows = f"{r.rows}{'+' if r.truncated else ''} rows in {r.elapsed_ms:.1f} ms"
+            if r.status == "error":
+                checks[i] = ValidatorCheckResult(
+                    check_name="execution", passed=False, score=0.0,
+                    details=f"Fails on the sample database: {r.error}"
+                )
+            elif r.status == "timeout":
+                checks[i] = ValidatorCheckResult(
+                    check_name="execution", passed=True, score=0.5,
+                    details=f"Inconclusive: {r.error}"
+                )
+            elif r.status == "empty":
+                checks[i] = ValidatorCheckResult(
+                    check_name="execution", passed=True, score=0.5 if winner is not None else 1.0,
+                    details="Empty result on the sample database" + (
+                        f", the {votes[winner]} queries that agree return rows" if winner is not None else ""
+                    )
+                )
+            elif winner is not None and r.digest == winner:
+                consensus.add(i)
+                checks[i] = ValidatorCheckResult(
+                    check_name="execution", passed=True, score=1.0,
+                    details=f"{votes[winner]} of {voters} distinct queries return the same result ({rows})"
+                )
+            elif winner is not None:
+                checks[i] = ValidatorCheckResult(
+                    check_name="execution", passed=True, score=0.5,
+                    details=f"Disagrees with the {votes[winner]} queries that agree ({rows})"
+                )
+            else:
+                checks[i] = ValidatorCheckResult(
+                    check_name="execution", passed=True, score=1.0,
+                    details=f"Runs on the sample database ({rows})"
+                )
+        return checks, consensus
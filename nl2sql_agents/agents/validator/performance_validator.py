@@ -1,7 +1,11 @@
 """
 PERFORMANCE VALIDATOR (SOFT FAIL)
 
-LLm flags performance anti-patterns:
+With a plan analyzer (PERFORMANCE_VALIDATOR_MODE="plan", SQLite): SQLite's own
+EXPLAIN QUERY PLAN weighted by row counts (db/plan_analyzer.py) - local, no tokens,
+evidence from the real plan.
+
+Otherwise the LLm flags performance anti-patterns:
 - Cartesian joins
 - missing where on large tables
 - Select *
@@ -13,8 +17,11 @@ Returns PASS / WARN (score 0.5) / FAIL (score 0.0)
 
 import logging
 from nl2sql_agents.agents.base_agent import BaseAgent
+from nl2sql_agents.db.plan_analyzer import PlanAnalyzer
 from nl2sql_agents.models.schemas import ValidatorCheckResult
 
+SCORES = {"PASS": 1.0, "WARN": 0.5, "FAIL": 0.0}
+
 logger = logging.getLogger(__name__)
 
 SYSTEM_PROMPT = """You are a SQL performance expert.
@@ -31,7 +38,38 @@ WARN: <brief concern>
 FAIL: <critical issue>"""
 
 class PerformanceValidator(BaseAgent):
-    async def check(self, sql: str) -> ValidatorCheckResult:
+    def __init__(self, *args, analyzer: PlanAnalyzer | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.analyzer = analyzer
+
+    @property
+    def local(self) -> bool:
+        """True when the verdict comes from the query plan, not from an LLM"""
+        return self.analyzer is not None
+
+    async def check_plan(self, sql: str, schema_version: str | None = None) -> ValidatorCheckResult:
+        try:
+            analysis = await self.analyzer.analyze(sql, schema_version)
+        except Exception as e:
+            logger.warning("PerformanceValidator: no query plan (%s)", e)
+            return ValidatorCheckResult(
+                check_name='performance',
+                passed=True,
+                score=0.5,
+                details=f"Query plan unavailable: {e}"
+            )
+
+        return ValidatorCheckResult(
+            check_name='performance',
+            passed=analysis.verdict != "FAIL",
+            score=SCORES[analysis.verdict],
+            details=analysis.evidence if analysis.verdict != "PASS" else f"No performance issue: {analysis.evidence}"
+        )
+
+    async def check(self, sql: str, schema_version: str | None = None) -> ValidatorCheckResult:
+        if self.local:
+            return await self.check_plan(sql, schema_version)
+
         messages = self.build_prompt(sql=sql)
         raw = await self.call_llm(messages, temperature=0.0, max_tokens=150)
         return self.parse_response(raw)
@@ -3,13 +3,17 @@ Syntax Validator
 
 Two-step:
 1. Fast structural parse with SQLparse
-2. LLM SQL syntax validation
+2. with a schema clone (SYNTAX_VALIDATOR_MODE="explain", SQLite): EXPLAIN against the
+   schema-only in-memory copy of the database (db/schema_clone.py) - exact,
+   deterministic, no LLM, precise errors for unknown tables / columns
+   otherwise: LLM SQL syntax validation
 """
 
 import logging
 import sqlparse
 from nl2sql_agents.agents.base_agent import BaseAgent
-from nl2sql_agents.models.schemas import ValidatorCheckResult
+from nl2sql_agents.db.schema_clone import SchemaClone
+from nl2sql_agents.models.schemas import ValidatorCheckResult, TableMetaData
 
 logger = logging.getLogger()
 
@@ -20,6 +24,15 @@ PASS
 FAIL: <brief reason>"""
 
 class SyntaxValidator(BaseAgent):
+    def __init__(self, *args, schema_clone: SchemaClone | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.schema_clone = schema_clone
+
+    @property
+    def exact(self) -> bool:
+        """True when the verdict comes from the schema clone, not from an LLM"""
+        return self.schema_clone is not None
+
     def _structural_check(self, sql: str) -> tuple[bool, str]:
         try:
             stms = sqlparse.parse(sql.strip())
@@ -37,7 +50,37 @@ class SyntaxValidator(BaseAgent):
         ]
         
     
-    async def check(self, sql: str) -> ValidatorCheckResult:
+    def check_local(self, sql: str) -> ValidatorCheckResult:
+        """Structural parse only, no LLM call"""
+        ok, reason = self._structural_check(sql)
+        return ValidatorCheckResult(
+            check_name="syntax",
+            passed=ok,
+            score=1.0 if ok else 0.0,
+            details="Structure valid (local parse)" if ok else reason
+        )
+
+    async def check_schema(
+            self,
+            sql: str,
+            tables: list[TableMetaData] | None = None,
+            schema_version: str | None = None
+    ) -> ValidatorCheckResult:
+        """EXPLAIN against the schema clone (requires `exact`)"""
+        error = await self.schema_clone.check(sql, tables or [], schema_version)
+        return ValidatorCheckResult(
+            check_name="syntax",
+            passed=error is None,
+            score=1.0 if error is None else 0.0,
+            details="Valid against the database schema (EXPLAIN)" if error is None else error
+        )
+
+    async def check(
+            self,
+            sql: str,
+            tables: list[TableMetaData] | None = None,
+            schema_version: str | None = None
+    ) -> ValidatorCheckResult:
         
         # structual check by parsing the sql statements
         ok, reason = self._structural_check(sql)
@@ -48,6 +91,9 @@ class SyntaxValidator(BaseAgent):
                 score=0.0,
                 details=reason
             )
+
+        if self.exact:
+            return await self.check_schema(sql, tables, schema_version)
         
         # check through LLM
         messages = self.build_prompt(sql=sql)
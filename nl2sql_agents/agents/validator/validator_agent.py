@@ -1,60 +1,525 @@
 """
 Agent 4: Validator Agent
 
-- For each SQL Candidate, 4 validators execute concurrently in parallel.
-- Scores candidates, disqualifies hard-failures (security/syntax)
+- Candidates are deduplicated by canonical SQL (canonical_sql.py): each distinct
+  query is validated once and its result fanned back to every variant that produced it
+- Distinct candidates are validated in stages:
+    1. local hard checks for all candidates concurrently (security regex, sqlparse
+       structure, and with a connector EXPLAIN against the schema clone) - no LLM
+    2. survivors only: logic (LLM) + performance (soft) checks; performance is the
+       local EXPLAIN QUERY PLAN analysis when there is a connector, otherwise an LLM
+       check; without the schema clone also the LLM syntax check (hard)
+- with a connector (EXECUTION_VALIDATOR_ENABLED): survivors run on the sampled copy
+  of the database and vote on their result sets (execution_validator.py); a run-time
+  error disqualifies, candidates in the consensus skip the LLM logic check
+- stage 2 LLM checks (VALIDATION_LLM_MODE):
+    "batch":     one BatchValidator call reviews every survivor on every LLM check;
+                 candidates whose verdicts cannot be parsed fall back to per-check calls
+    "per_check": one call per candidate per check; a syntax FAIL cancels the soft checks
+- validate_stream() (PIPELINE_MODE="streaming"): candidates are validated one by one as
+  the generator yields them; a candidate whose result matches an earlier candidate's
+  skips the LLM logic check; stops as soon as a candidate is not disqualified and
+  passes the logic check (a performance WARN or an empty sample result does not hold
+  it back) and at least SPECULATIVE_WAIT_FOR candidates are validated, cancelling the
+  generator and validation calls still in flight (no batching: one candidate at a time)
+- Scores candidates, disqualifies hard-failures (security/syntax/execution)
 - selects the best passing candidate or return retry context
+- counts the LLM requests and prompt tokens saved against one call per candidate per
+  check (ValidationResult.llm_calls_saved / prompt_tokens_saved)
 """
 
 import asyncio
 import logging
+from typing import AsyncIterator, Optional, Sequence
 
-from nl2sql_agents.config.settings import VALIDATION_PROVIDER
+from nl2sql_agents.llm.tokens import count_tokens
+from nl2sql_agents.db.sample_db import SampleDatabase
+from nl2sql_agents.db.schema_clone import SchemaClone
+from nl2sql_agents.db.plan_analyzer import PlanAnalyzer
+from nl2sql_agents.db.connector import DatabaseConnector
+from nl2sql_agents.config.settings import (
+    VALIDATION_PROVIDER, DB_TYPE, SYNTAX_VALIDATOR_MODE, PERFORMANCE_VALIDATOR_MODE, VALIDATION_LLM_MODE,
+    EXECUTION_VALIDATOR_ENABLED, SPECULATIVE_WAIT_FOR
+)
+from nl2sql_agents.agents.base_agent import BaseAgent
+from nl2sql_agents.agents.validator.canonical_sql import canonical_sql
+from nl2sql_agents.agents.validator.batch_validator import BatchValidator
 from nl2sql_agents.agents.validator.logic_validator import LogicValidator
+from nl2sql_agents.agents.validator.execution_validator import ExecutionValidator
 from nl2sql_agents.agents.validator.syntax_validator import SyntaxValidator
 from nl2sql_agents.agents.validator.security_validator import SecurityValidator
 from nl2sql_agents.agents.validator.performance_validator import PerformanceValidator
 
 from nl2sql_agents.models.schemas import (
-    SQLCandidate, GenerationResult, CandidateValidationResult, ValidationResult
+    SQLCandidate, GenerationResult, CandidateValidationResult, ValidationResult, ValidatorCheckResult,
+    TableMetaData
 )
 
 
 logger = logging.getLogger(__name__)
-HARD_FAIL_CHECKS = {"security", "syntax"}
+HARD_FAIL_CHECKS = {"security", "syntax", "execution"}
 
 class ValidatorAgent:
-    def __init__(self) -> None:
+    def __init__(self, connector: DatabaseConnector | None = None) -> None:
+        self.connector = connector
+        local = connector is not None and DB_TYPE.lower() == "sqlite"
+        self.schema_clone = SchemaClone(connector) if local and SYNTAX_VALIDATOR_MODE == "explain" else None
+        self.plan_analyzer = PlanAnalyzer(connector) if local and PERFORMANCE_VALIDATOR_MODE == "plan" else None
+        self.sample_db = SampleDatabase(connector) if local and EXECUTION_VALIDATOR_ENABLED else None
+
         self.security = SecurityValidator() # no llm
-        self.syntax = SyntaxValidator(provider=VALIDATION_PROVIDER)
+        self.syntax = SyntaxValidator(provider=VALIDATION_PROVIDER, schema_clone=self.schema_clone)
         self.logic = LogicValidator(provider=VALIDATION_PROVIDER)
-        self.performance=PerformanceValidator(provider=VALIDATION_PROVIDER)
+        self.performance=PerformanceValidator(provider=VALIDATION_PROVIDER, analyzer=self.plan_analyzer)
+        self.batch = BatchValidator(provider=VALIDATION_PROVIDER) if VALIDATION_LLM_MODE == "batch" else None
+        self.execution = ExecutionValidator(self.sample_db) if self.sample_db is not None else None
 
-    async def validate(self, generation: GenerationResult, user_query: str) -> ValidationResult:
-        logger.info("ValidatorAgent: %d candidates x 4 checks", len(generation.candidates))
+        self.stats = {
+            "candidates": 0, "duplicates": 0, "disqualified_locally": 0, "llm_calls_saved": 0,
+            "batch_calls": 0, "batch_fallbacks": 0, "prompt_tokens_saved": 0,
+            "disqualified_by_execution": 0, "consensus": 0, "early_stops": 0
+        }
 
-        all_results = await asyncio.gather(
-            *[
-                self._validate_candidate(c, user_query) for c in generation.candidates
-            ]
+    @property
+    def llm_criteria(self) -> list[str]:
+        """checks that still need an LLM"""
+        return (
+            ([] if self.syntax.exact else ["syntax"])
+            + ["logic"]
+            + ([] if self.performance.local else ["performance"])
         )
 
-        return self._select_best(list(all_results))
+    @property
+    def llm_checks(self) -> int:
+        """LLM calls a fully validated candidate costs"""
+        return len(self.llm_criteria)
+
+    def _validators(self) -> dict[str, BaseAgent]:
+        return {"syntax": self.syntax, "logic": self.logic, "performance": self.performance}
+
+    def _prompt_tokens(self, agent: BaseAgent, **kwargs) -> int:
+        return sum(count_tokens(m["content"], agent.model_name) for m in agent.build_prompt(**kwargs))
+
+    def _per_check_tokens(self, sql: str, user_query: str) -> int:
+        """prompt tokens of the per-check LLM calls for one candidate"""
+        validators = self._validators()
+        return sum(
+            self._prompt_tokens(validators[c], sql=sql, user_query=user_query) for c in self.llm_criteria
+        )
+
+    async def validate(
+            self,
+            generation: GenerationResult,
+            user_query: str,
+            tables: list[TableMetaData] | None = None,
+            schema_version: str | None = None
+    ) -> ValidationResult:
+        candidates = generation.candidates
+
+        # variants that produced the same query are validated once
+        groups: dict[str, list[int]] = {}
+        for i, c in enumerate(candidates):
+            groups.setdefault(canonical_sql(c.sql), []).append(i)
+        unique = [candidates[members[0]] for members in groups.values()]
+        logger.info("ValidatorAgent: %d candidates (%d unique) x 4 checks", len(candidates), len(unique))
+
+        validated, saved, tokens_saved = await self._validate_unique(
+            unique, [len(m) for m in groups.values()], user_query, tables, schema_version
+        )
+
+        results: list[CandidateValidationResult | None] = [None] * len(candidates)
+        for members, r in zip(groups.values(), validated):
+            results[members[0]] = r
+            for j in members[1:]:
+                results[j] = r.model_copy(update={"candidate": candidates[j]})
+                saved += self.llm_checks
+                tokens_saved += self._per_check_tokens(candidates[j].sql, user_query)
+
+        duplicates = len(candidates) - len(unique)
+        self.stats["candidates"] += len(candidates)
+        self.stats["duplicates"] += duplicates
+        self.stats["llm_calls_saved"] += saved
+        self.stats["prompt_tokens_saved"] += tokens_saved
+        if saved or tokens_saved:
+            logger.info(
+                "ValidatorAgent: %d of %d LLM calls, ~%d prompt tokens saved (%d duplicates)",
+                self.llm_checks * len(candidates) - saved, self.llm_checks * len(candidates), tokens_saved, duplicates
+            )
+
+        result = self._select_best(results)
+        result.llm_calls_saved = saved
+        result.prompt_tokens_saved = tokens_saved
+        return result
+
+    async def validate_stream(
+            self,
+            candidates: AsyncIterator[SQLCandidate],
+            user_query: str,
+            tables: list[TableMetaData] | None = None,
+            schema_version: str | None = None,
+            wait_for: int = SPECULATIVE_WAIT_FOR
+    ) -> ValidationResult:
+        """validate candidates as they arrive; stop at the first one good enough to
+        answer with (_can_stop_on) once `wait_for` candidates are validated (closing `candidates`)"""
+
+        async def _next() -> Optional[SQLCandidate]:
+            try:
+                return await anext(candidates)
+            except StopAsyncIteration:
+                return None
+
+        results: list[CandidateValidationResult] = []
+        groups: dict[str, list[SQLCandidate]] = {}         # canonical SQL -> variants
+        finished: dict[str, CandidateValidationResult] = {}
+        agreed: dict[str, list[str]] = {}                   # result digest -> variants
+        saved = 0
+
+        next_candidate = asyncio.create_task(_next())
+        pending: dict[asyncio.Task, Optional[str]] = {next_candidate: None}
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    key = pending.pop(task)
+
+                    if task is next_candidate:
+                        candidate = task.result()
+                        if candidate is None:
+                            continue
+                        next_candidate = asyncio.create_task(_next())
+                        pending[next_candidate] = None
+
+                        key = canonical_sql(candidate.sql)
+                        if key in finished:
+                            results.append(finished[key].model_copy(update={"candidate": candidate}))
+                            saved += self.llm_checks
+                        elif key in groups:
+                            groups[key].append(candidate)
+                        else:
+                            groups[key] = [candidate]
+                            pending[asyncio.create_task(
+                                self._validate_one(candidate, user_query, tables, schema_version, agreed)
+                            )] = key
+                        continue
+
+                    r, s = task.result()
+                    finished[key] = r
+                    results.append(r)
+                    saved += s
+                    for duplicate in groups[key][1:]:
+                        results.append(r.model_copy(update={"candidate": duplicate}))
+                        saved += self.llm_checks
+
+                if len(results) >= wait_for and any(self._can_stop_on(r) for r in results):
+                    in_flight = sum(1 for t in pending if t is not next_candidate)
+                    logger.info(
+                        "ValidatorAgent: logic PASS after %d candidates, stopping early "
+                        "(%d validations in flight cancelled)", len(results), in_flight
+                    )
+                    self.stats["early_stops"] += 1
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            aclose = getattr(candidates, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+        self.stats["candidates"] += len(results)
+        self.stats["duplicates"] += len(results) - len(finished)
+        self.stats["llm_calls_saved"] += saved
+
+        result = self._select_best(results)
+        result.llm_calls_saved = saved
+        return result
+
+    @staticmethod
+    def _can_stop_on(result: CandidateValidationResult) -> bool:
+        """not disqualified (security, syntax, execution) and logic PASS; soft scores
+        such as a performance WARN only rank candidates, they do not block the stop"""
+        return not result.disqualified and any(
+            c.check_name == "logic" and c.passed and c.score >= 1.0 for c in result.checks
+        )
+
+    async def _validate_one(
+            self,
+            candidate: SQLCandidate,
+            user_query: str,
+            tables: list[TableMetaData] | None,
+            schema_version: str | None,
+            agreed: dict[str, list[str]]
+    ) -> tuple[CandidateValidationResult, int]:
+        """(result, LLM calls saved) for one streamed candidate; `agreed` holds the
+        result digests of the candidates executed so far (shared across the stream)"""
+        sec, syn = await self._hard_checks(candidate, tables, schema_version)
+        if not (sec.passed and syn.passed):
+            self.stats["disqualified_locally"] += 1
+            return self._score(candidate, [sec, syn]), self.llm_checks
+
+        execution = None
+        if self.execution is not None:
+            run = await self.execution.run(candidate.sql, schema_version)
+            earlier = agreed.setdefault(run.digest, []) if run.status == "ok" else []
+            if earlier and len(earlier) + 1 >= self.execution.vote_min:
+                self.stats["consensus"] += 1
+                execution = ValidatorCheckResult(
+                    check_name="execution",
+                    passed=True,
+                    score=1.0,
+                    details=f"Same result as {', '.join(earlier)} ({run.rows} rows in {run.elapsed_ms:.1f} ms)"
+                )
+                earlier.append(candidate.prompt_variant)
+                return await self._consensus_checks(candidate, sec, syn, execution, schema_version)
+            earlier.append(candidate.prompt_variant)
+
+            checks, _ = self.execution.vote({0: run})
+            execution = checks[0]
+            if not execution.passed:
+                self.stats["disqualified_by_execution"] += 1
+                return self._score(candidate, [sec, syn, execution]), self.llm_checks
+
+        r, s = await self._soft_checks(candidate, sec, syn, user_query, schema_version)
+        if execution is not None:
+            r = self._score(candidate, [*r.checks, execution])
+        return r, s
+
+    async def _validate_unique(
+            self,
+            candidates: list[SQLCandidate],
+            weights: list[int],
+            user_query: str,
+            tables: list[TableMetaData] | None = None,
+            schema_version: str | None = None
+    ) -> tuple[list[CandidateValidationResult], int, int]:
+        """(results, LLM calls saved, prompt tokens saved) for distinct candidates;
+        `weights`: how many variants produced each one (tie-break in result voting)"""
+
+        # stage 1: local hard checks
+        hard = await asyncio.gather(
+            *[self._hard_checks(c, tables, schema_version) for c in candidates]
+        )
+
+        results: list[CandidateValidationResult | None] = [None] * len(candidates)
+        survivors: list[int] = []
+        saved = 0
+        for i, (candidate, (sec, syn)) in enumerate(zip(candidates, hard)):
+            if sec.passed and syn.passed:
+                survivors.append(i)
+                continue
+            self.stats["disqualified_locally"] += 1
+            logger.info(
+                "ValidatorAgent: [%s] disqualified locally (%s), LLM checks skipped",
+                candidate.prompt_variant, syn.details if sec.passed else sec.details
+            )
+            results[i] = self._score(candidate, [sec, syn])
+            saved += self.llm_checks
+
+        # execution on the sample database + result voting
+        executions: dict[int, ValidatorCheckResult] = {}
+        if self.execution is not None and survivors:
+            runs = await asyncio.gather(
+                *[self.execution.run(candidates[i].sql, schema_version) for i in survivors]
+            )
+            executions, agreeing = self.execution.vote(
+                dict(zip(survivors, runs)),
+                {i: candidates[i].sql for i in survivors},
+                {i: weights[i] for i in survivors}
+            )
+            consensus = sorted(agreeing)
+
+            for i in list(survivors):
+                if executions[i].passed:
+                    continue
+                survivors.remove(i)
+                self.stats["disqualified_by_execution"] += 1
+                logger.info(
+                    "ValidatorAgent: [%s] %s, LLM checks skipped",
+                    candidates[i].prompt_variant, executions[i].details
+                )
+                results[i] = self._score(candidates[i], [*hard[i], executions[i]])
+                saved += self.llm_checks
+
+            if consensus:
+                agreed = await asyncio.gather(
+                    *[self._consensus_checks(candidates[i], *hard[i], executions[i], schema_version) for i in consensus]
+                )
+                for i, (r, s) in zip(consensus, agreed):
+                    results[i] = r
+                    saved += s
+                survivors = [i for i in survivors if i not in consensus]
+                self.stats["consensus"] += len(consensus)
+                logger.info(
+                    "ValidatorAgent: %d candidates agree on the sample result, LLM logic check skipped",
+                    len(consensus)
+                )
+
+        # stage 2: LLM checks for the survivors
+        tokens_saved = 0
+        if self.batch is not None and len(survivors) * self.llm_checks > 1:
+            staged, batch_saved, tokens_saved = await self._validate_batch(
+                [(candidates[i], *hard[i]) for i in survivors], user_query, schema_version
+            )
+            saved += batch_saved
+        else:
+            pairs = await asyncio.gather(
+                *[self._soft_checks(candidates[i], *hard[i], user_query, schema_version) for i in survivors]
+            )
+            staged = [r for r, _ in pairs]
+            saved += sum(s for _, s in pairs)
+
+        for i, r in zip(survivors, staged):
+            results[i] = self._score(r.candidate, [*r.checks, executions[i]]) if i in executions else r
+
+        return results, saved, tokens_saved
     
-    async def _validate_candidate(self, candidate: SQLCandidate, user_query: str) -> CandidateValidationResult:
-        # 4. checks in parallel for this one candidate
-
-        sec, syn, logic, perf = await asyncio.gather(
-            self.security.check(candidate.sql),
-            self.syntax.check(candidate.sql),
-            self.logic.check(candidate.sql, user_query),
-            self.performance.check(candidate.sql)
+    async def _hard_checks(
+            self,
+            candidate: SQLCandidate,
+            tables: list[TableMetaData] | None,
+            schema_version: str | None
+    ) -> list[ValidatorCheckResult]:
+        """Security + syntax without any LLM call (syntax is exact with the schema clone)"""
+        sec = await self.security.check(candidate.sql)
+        syn = self.syntax.check_local(candidate.sql)
+        if sec.passed and syn.passed and self.syntax.exact:
+            syn = await self.syntax.check_schema(candidate.sql, tables, schema_version)
+        return [sec, syn]
+
+    async def validate_local(
+            self,
+            candidate: SQLCandidate,
+            reused_checks: Sequence[ValidatorCheckResult] = (),
+            tables: list[TableMetaData] | None = None,
+            schema_version: str | None = None
+    ) -> ValidationResult:
+        """
+        Hard checks only (no LLM), for SQL that did not come from the generator;
+        `reused_checks` (e.g. logic / performance of the SQL it was derived from)
+        are added to the score
+        """
+        checks = await self._hard_checks(candidate, tables, schema_version)
+        checks += [c for c in reused_checks if c.check_name.lower() not in HARD_FAIL_CHECKS]
+
+        return self._select_best([self._score(candidate, checks)])
+
+    async def _consensus_checks(
+            self,
+            candidate: SQLCandidate,
+            sec: ValidatorCheckResult,
+            syn: ValidatorCheckResult,
+            execution: ValidatorCheckResult,
+            schema_version: str | None = None
+    ) -> tuple[CandidateValidationResult, int]:
+        """(result, LLM calls saved) for a candidate whose result the other candidates confirm"""
+        logic = ValidatorCheckResult(
+            check_name="logic",
+            passed=True,
+            score=1.0,
+            details=f"Confirmed by result voting: {execution.details}"
         )
+        if not self.syntax.exact:
+            syn = ValidatorCheckResult(
+                check_name="syntax",
+                passed=True,
+                score=1.0,
+                details="Valid (executed on the sample database)"
+            )
+        perf = await self.performance.check(candidate.sql, schema_version)
+        return (
+            self._score(candidate, [sec, syn, logic, perf, execution]),
+            self.llm_checks - (0 if self.performance.local else 1)
+        )
+
+    async def _validate_batch(
+            self,
+            survivors: list[tuple[SQLCandidate, ValidatorCheckResult, ValidatorCheckResult]],
+            user_query: str,
+            schema_version: str | None = None
+    ) -> tuple[list[CandidateValidationResult], int, int]:
+        """(results, LLM calls saved, prompt tokens saved) - one LLM call for all survivors"""
+        criteria = self.llm_criteria
+        sqls = [c.sql for c, _, _ in survivors]
+
+        local_perf = (
+            [self.performance.check(sql, schema_version) for sql in sqls] if self.performance.local else []
+        )
+        verdicts, *perf = await asyncio.gather(
+            self.batch.review(sqls, user_query, criteria),
+            *local_perf
+        )
+        self.stats["batch_calls"] += 1
+
+        validators = self._validators()
+        results: list[CandidateValidationResult | None] = [None] * len(survivors)
+        fallback: list[int] = []
+        for i, (candidate, sec, syn) in enumerate(survivors):
+            verdict = verdicts[i] if verdicts is not None else None
+            if verdict is None:
+                fallback.append(i)
+                continue
+
+            checks = {c: validators[c].parse_response(verdict[c]) for c in criteria}
+            if perf:
+                checks["performance"] = perf[i]
+            results[i] = self._score(
+                candidate, [sec, checks.get("syntax", syn), checks["logic"], checks["performance"]]
+            )
+
+        calls = 1
+        per_check_tokens = [self._per_check_tokens(sql, user_query) for sql in sqls]
+        batch_tokens = self._prompt_tokens(self.batch, sqls=sqls, user_query=user_query, criteria=criteria)
+
+        if fallback:
+            self.stats["batch_fallbacks"] += len(fallback)
+            logger.info("ValidatorAgent: no batch verdicts for %d candidates, per-check calls", len(fallback))
+            pairs = await asyncio.gather(
+                *[self._soft_checks(*survivors[i], user_query, schema_version) for i in fallback]
+            )
+            for i, (r, s) in zip(fallback, pairs):
+                results[i] = r
+                calls += self.llm_checks - s
+                batch_tokens += per_check_tokens[i]
+
+        return results, len(survivors) * self.llm_checks - calls, sum(per_check_tokens) - batch_tokens
+
+    async def _soft_checks(
+            self,
+            candidate: SQLCandidate,
+            sec: ValidatorCheckResult,
+            syn: ValidatorCheckResult,
+            user_query: str,
+            schema_version: str | None = None
+    ) -> tuple[CandidateValidationResult, int]:
+        """(result, LLM calls saved) for one survivor of the hard checks, one call per check"""
+        soft = [
+            asyncio.create_task(self.logic.check(candidate.sql, user_query)),
+            asyncio.create_task(self.performance.check(candidate.sql, schema_version))
+        ]
+        if self.syntax.exact:
+            logic, perf = await asyncio.gather(*soft)
+            return self._score(candidate, [sec, syn, logic, perf]), 0
+
+        try:
+            syn = await self.syntax.check(candidate.sql)
+        except BaseException:
+            for task in soft:
+                task.cancel()
+            raise
+
+        if not syn.passed:
+            for task in soft:
+                task.cancel()
+            await asyncio.gather(*soft, return_exceptions=True)
+            finished = [t.result() for t in soft if not t.cancelled() and t.exception() is None]
+            return self._score(candidate, [sec, syn, *finished]), sum(t.cancelled() for t in soft)
 
-        checks = [sec, syn, logic, perf]
+        logic, perf = await asyncio.gather(*soft)
+        return self._score(candidate, [sec, syn, logic, perf]), 0
 
+    def _score(self, candidate: SQLCandidate, checks: list[ValidatorCheckResult]) -> CandidateValidationResult:
         disqualified = any(
-            not c.passed for c in checks if c.check_name in HARD_FAIL_CHECKS
+            not c.passed for c in checks if c.check_name.lower() in HARD_FAIL_CHECKS
         )
 
         total = sum(c.score for c in checks) if not disqualified else 0.0
@@ -0,0 +1,154 @@
+"""
+EMBEDDING STORE
+
+Persistent, content-addressed store for document embeddings.
+- one directory per embedding model: ~/.sql_generator/embeddings/<model>.<dtype>/
+    - vectors.bin   append-only float32/float16 matrix, read through np.memmap
+    - index.json    {sha256(text)[:16]: row}, rewritten atomically
+- key: (embedding model, hash of the text) -> a text is embedded once, ever
+- missing texts are embedded lazily, in batches, and appended under an
+  inter-process lock (other workers' appends are picked up on next lookup)
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import numpy as np
+from typing import Any
+
+from nl2sql_agents.cache.fileio import file_lock, atomic_write
+from nl2sql_agents.config.settings import (
+    EMBEDDING_CACHE_DIR, EMBEDDING_STORE_DTYPE, EMBEDDING_BATCH_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+class EmbeddingStore:
+    def __init__(
+            self,
+            model: str,
+            embeddings: Any,
+            cache_dir: str = EMBEDDING_CACHE_DIR,
+            dtype: str = EMBEDDING_STORE_DTYPE,
+            batch_size: int = EMBEDDING_BATCH_SIZE
+    ) -> None:
+        self.model = model
+        self.embeddings = embeddings  # anything with `aembed_documents`
+        self.dtype = np.dtype(dtype)
+        self.batch_size = batch_size
+
+        slug = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in model)
+        self.dir = os.path.join(cache_dir, f"{slug}.{self.dtype.name}")
+        os.makedirs(self.dir, exist_ok=True)
+
+        self._index_path = os.path.join(self.dir, "index.json")
+        self._vectors_path = os.path.join(self.dir, "vectors.bin")
+        self._lock_path = os.path.join(self.dir, ".lock")
+
+        # (rows, matrix) swapped as one object so readers never see a mismatched pair
+        self._state: tuple[dict[str, int], np.ndarray | None] = ({}, None)
+        self._index_mtime_ns = -1
+        self._lock = asyncio.Lock()
+
+        self.stats = {"hits": 0, "misses": 0}
+
+    # --- disk --- #
+
+    def _reload(self) -> None:
+        """Pick up rows appended by this or another process"""
+        try:
+            mtime_ns = os.stat(self._index_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime_ns == self._index_mtime_ns:
+            return
+
+        with open(self._index_path, "r") as f:
+            meta = json.load(f)
+
+        rows, dim = meta["rows"], meta["dim"]
+        matrix = (
+            np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(len(rows), dim))
+            if rows else None
+        )
+        self._state = (rows, matrix)
+        self._index_mtime_ns = mtime_ns
+
+    def _append(self, keys: list[str], vectors: np.ndarray) -> None:
+        with file_lock(self._lock_path):
+            self._index_mtime_ns = -1
+            self._reload()
+            rows, matrix = self._state
+
+            fresh = [(k, v) for k, v in zip(keys, vectors) if k not in rows]
+            if fresh:
+                dim = vectors.shape[1]
+                if matrix is not None and matrix.shape[1] != dim:
+                    raise ValueError(f"Embedding dim changed for {self.model}: {matrix.shape[1]} -> {dim}")
+
+                start = len(rows)
+                # truncate any tail left behind by a crashed writer before appending
+                with open(self._vectors_path, "ab") as f:
+                    f.truncate(start * dim * self.dtype.itemsize)
+                    f.write(np.asarray([v for _, v in fresh], dtype=self.dtype).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                rows = dict(rows)
+                rows.update({k: start + i for i, (k, _) in enumerate(fresh)})
+                meta = {"model": self.model, "dim": dim, "rows": rows}
+                atomic_write(self._index_path, json.dumps(meta, separators=(",", ":")).encode())
+
+            self._index_mtime_ns = -1
+            self._reload()
+
+    def _read(self, keys: list[str]) -> tuple[list[str], np.ndarray | None]:
+        """(missing keys, float32 vectors for all keys or None if any is missing)"""
+        self._reload()
+        rows, matrix = self._state
+
+        missing = [k for k in keys if k not in rows]
+        if missing or matrix is None:
+            return missing, None
+        return [], np.asarray(matrix[[rows[k] for k in keys]], dtype=np.float32)
+
+    # --- public --- #
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        """(len(texts), dim) float32 matrix; only texts never seen before hit the API"""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        keys = [text_key(t) for t in texts]
+        missing, vectors = await asyncio.to_thread(self._read, keys)
+
+        if vectors is None:
+            async with self._lock:
+                missing, vectors = await asyncio.to_thread(self._read, keys)
+
+                if vectors is None:
+                    by_key = dict(zip(keys, texts))
+                    miss_keys = list(dict.fromkeys(missing))
+                    miss_texts = [by_key[k] for k in miss_keys]
+                    logger.info("EmbeddingStore: embedding %d new texts (model=%s)", len(miss_texts), self.model)
+
+                    batches = [
+                        miss_texts[i:i + self.batch_size]
+                        for i in range(0, len(miss_texts), self.batch_size)
+                    ]
+                    results = await asyncio.gather(*[self.embeddings.aembed_documents(b) for b in batches])
+                    new_vectors = np.asarray([v for batch in results for v in batch], dtype=np.float32)
+
+                    await asyncio.to_thread(self._append, miss_keys, new_vectors)
+                    self.stats["misses"] += len(miss_keys)
+
+                    _, vectors = await asyncio.to_thread(self._read, keys)
+                    assert vectors is not None
+
+        self.stats["hits"] += len(texts) - len(missing)
+        return vectors
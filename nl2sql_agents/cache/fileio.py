@@ -0,0 +1,45 @@
+"""
+FILE I/O HELPERS - shared by the on-disk caches
+
+- file_lock(path)          -> exclusive inter-process flock (no-op without fcntl)
+- atomic_write(path, data) -> temp file + fsync + atomic rename
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: atomic rename still protects readers
+    fcntl = None
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Exclusive inter-process lock held on `path` (created if missing)"""
+    with open(path, "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def atomic_write(path: str, data: bytes) -> None:
+    """Readers see either the old or the new file, never a torn one"""
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=f".{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
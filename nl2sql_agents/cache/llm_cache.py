@@ -0,0 +1,176 @@
+"""
+LLM RESPONSE CACHE
+
+Content-addressed cache for LLM responses, used by BaseAgent.call_llm
+key: SHA-256 of (base_url, model, messages, temperature, max_tokens)
+tiers:
+- memory: LRU of LLM_CACHE_MEMORY_ITEMS responses
+- disk:   ~/.sql_generator/llm_cache.sqlite (WAL, safe across processes),
+          least-recently-used entries evicted once it exceeds LLM_CACHE_MAX_BYTES
+disk I/O runs in a worker thread so the event loop is never blocked
+policy is per agent (BaseAgent.cache_responses): on by default at temperature 0,
+opt-in otherwise
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from nl2sql_agents.config.settings import (
+    LLM_CACHE_PATH, LLM_CACHE_MEMORY_ITEMS, LLM_CACHE_MAX_BYTES
+)
+
+logger = logging.getLogger(__name__)
+
+EVICT_CHECK_EVERY = 64  # writes between two size checks
+
+def response_key(
+        base_url: str,
+        model: str,
+        messages: list[dict[str, str]],
+        temperature: float,
+        max_tokens: int
+) -> str:
+    raw = json.dumps(
+        {"base_url": base_url, "model": model, "messages": messages,
+         "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+class LLMResponseCache:
+    def __init__(
+            self,
+            path: str = LLM_CACHE_PATH,
+            memory_items: int = LLM_CACHE_MEMORY_ITEMS,
+            max_bytes: int = LLM_CACHE_MAX_BYTES
+    ) -> None:
+        self.path = path
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    # --- disk tier (worker thread) --- #
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        with self._db_lock:
+            db = self._conn()
+            row = db.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+            return row[0]
+
+    def _disk_set(self, key: str, value: str) -> None:
+        with self._db_lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, len(value.encode()) + len(key), time.time())
+            )
+            db.commit()
+
+            self._writes += 1
+            if self._writes % EVICT_CHECK_EVERY == 1:
+                self._evict(db)
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        """Drop least-recently-used rows until the table is back under max_bytes"""
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+
+        doomed, freed = [], 0
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+
+        db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        db.commit()
+        self.stats["evictions"] += len(doomed)
+        logger.info("LLM cache: evicted %d entries (%d bytes)", len(doomed), freed)
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # --- memory tier --- #
+
+    def _remember(self, key: str, value: str) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    # --- public --- #
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return value
+
+        try:
+            value = await asyncio.to_thread(self._disk_get, key)
+        except sqlite3.Error as e:
+            logger.warning("LLM cache read failed (%s), treating as miss", e)
+            value = None
+
+        if value is None:
+            self.stats["misses"] += 1
+            return None
+
+        self._remember(key, value)
+        self.stats["disk_hits"] += 1
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        self._remember(key, value)
+        try:
+            await asyncio.to_thread(self._disk_set, key, value)
+            self.stats["writes"] += 1
+        except sqlite3.Error as e:
+            logger.warning("LLM cache write failed (%s), kept in memory only", e)
+
+_response_cache: Optional[LLMResponseCache] = None
+
+def get_response_cache() -> LLMResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = LLMResponseCache()
+    return _response_cache
@@ -0,0 +1,260 @@
+"""
+QUESTION CACHE
+
+Question -> FinalOutput cache, checked right after load_schema and the security
+filter so a repeated question skips discovery, generation, validation and explanation.
+- scope: database path + schema version + the tables the security filter approved
+  + the previous answer in the conversation (a follow-up like "now only for France"
+  means something else after every answer); a connection with other privileges
+  never sees an answer built from tables it cannot read
+- exact tier: normalized question text (case, whitespace, trailing punctuation)
+    - memory: LRU of QUESTION_CACHE_MEMORY_ITEMS outputs
+    - disk:   ~/.sql_generator/question_cache.sqlite (WAL), the least recently used
+              entries beyond QUESTION_CACHE_MAX_ENTRIES are evicted
+- similarity tier (QUESTION_CACHE_SIMILARITY > 0): a near-duplicate phrasing in the
+  same scope is served when the cosine similarity of the question embeddings clears
+  the threshold; the query embedding is the one discovery computes anyway
+only validated outputs are stored; hits come back with `cached=True`
+"""
+
+import os
+import re
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import unicodedata
+import numpy as np
+from collections import OrderedDict
+from typing import Awaitable, Callable, Iterable, Optional
+
+from nl2sql_agents.models.schemas import FinalOutput, ChatMessage
+from nl2sql_agents.config.settings import (
+    QUESTION_CACHE_PATH, QUESTION_CACHE_MEMORY_ITEMS, QUESTION_CACHE_MAX_ENTRIES,
+    QUESTION_CACHE_SIMILARITY
+)
+
+logger = logging.getLogger(__name__)
+
+EVICT_CHECK_EVERY = 64   # writes between two size checks
+SCOPE_VECTORS = 8        # scopes whose question embeddings are kept in memory
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_question(question: str) -> str:
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text.strip("\"'`").rstrip("?!.;, ").strip()
+
+def question_scope(
+        db_path: str,
+        schema_version: str | None,
+        chat_history: list[ChatMessage] | None,
+        approved: Iterable[str] | None = None
+) -> str:
+    previous = next((m["content"] for m in reversed(chat_history or []) if m["role"] == "assistant"), "")
+    tables = ",".join(sorted(approved or ()))
+    raw = "\n".join((os.path.abspath(db_path), schema_version or "", tables, previous))
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+def question_key(question: str, scope: str) -> str:
+    return hashlib.sha256(f"{scope}\n{normalize_question(question)}".encode()).hexdigest()
+
+class QuestionCache:
+    def __init__(
+            self,
+            path: str = QUESTION_CACHE_PATH,
+            memory_items: int = QUESTION_CACHE_MEMORY_ITEMS,
+            max_entries: int = QUESTION_CACHE_MAX_ENTRIES,
+            similarity: float = QUESTION_CACHE_SIMILARITY,
+            embed: Optional[Callable[[str], Awaitable[Optional[np.ndarray]]]] = None
+    ) -> None:
+        self.path = path
+        self.memory_items = memory_items
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.embed = embed  # L2-normalised question embedding (None for a zero vector)
+
+        self._memory: OrderedDict[str, FinalOutput] = OrderedDict()
+        self._vectors: OrderedDict[str, tuple[list[str], np.ndarray]] = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "similar_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    # --- disk tier (worker thread) --- #
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS questions ("
+                "key TEXT PRIMARY KEY, scope TEXT NOT NULL, question TEXT NOT NULL, "
+                "embedding BLOB, output TEXT NOT NULL, accessed REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS questions_scope ON questions(scope)")
+            db.execute("CREATE INDEX IF NOT EXISTS questions_accessed ON questions(accessed)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        with self._db_lock:
+            db = self._conn()
+            row = db.execute("SELECT output FROM questions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE questions SET accessed = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+            return row[0]
+
+    def _disk_vectors(self, scope: str) -> list[tuple[str, bytes]]:
+        with self._db_lock:
+            return self._conn().execute(
+                "SELECT key, embedding FROM questions WHERE scope = ? AND embedding IS NOT NULL", (scope,)
+            ).fetchall()
+
+    def _disk_set(self, key: str, scope: str, question: str, embedding: Optional[bytes], output: str) -> None:
+        with self._db_lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO questions (key, scope, question, embedding, output, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, scope, question, embedding, output, time.time())
+            )
+            db.commit()
+
+            self._writes += 1
+            if self._writes % EVICT_CHECK_EVERY == 1:
+                self._evict(db)
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        """Drop the least recently used rows beyond max_entries"""
+        excess = db.execute("SELECT COUNT(*) FROM questions").fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return
+        db.execute(
+            "DELETE FROM questions WHERE key IN (SELECT key FROM questions ORDER BY accessed LIMIT ?)", (excess,)
+        )
+        db.commit()
+        self.stats["evictions"] += excess
+        logger.info("QuestionCache: evicted %d entries", excess)
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # --- memory tier --- #
+
+    def _remember(self, key: str, output: FinalOutput) -> None:
+        self._memory[key] = output
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    async def _lookup(self, key: str) -> Optional[FinalOutput]:
+        output = self._memory.get(key)
+        if output is not None:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return output
+
+        try:
+            raw = await asyncio.to_thread(self._disk_get, key)
+        except sqlite3.Error as e:
+            logger.warning("QuestionCache read failed (%s), treating as miss", e)
+            return None
+        if raw is None:
+            return None
+
+        output = FinalOutput.model_validate_json(raw)
+        self._remember(key, output)
+        self.stats["disk_hits"] += 1
+        return output
+
+    # --- similarity tier --- #
+
+    async def _embed(self, question: str) -> Optional[np.ndarray]:
+        if self.similarity <= 0 or self.embed is None:
+            return None
+        try:
+            return await self.embed(question)
+        except Exception as e:
+            logger.warning("QuestionCache: embedding failed (%s), exact matches only", e)
+            return None
+
+    async def _scope_vectors(self, scope: str) -> tuple[list[str], np.ndarray]:
+        cached = self._vectors.get(scope)
+        if cached is None:
+            rows = await asyncio.to_thread(self._disk_vectors, scope)
+            keys = [key for key, _ in rows]
+            matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows]) if rows else None
+            cached = self._vectors[scope] = (keys, matrix)
+            if len(self._vectors) > SCOPE_VECTORS:
+                self._vectors.popitem(last=False)
+        self._vectors.move_to_end(scope)
+        return cached
+
+    async def _similar(self, q: np.ndarray, scope: str) -> Optional[FinalOutput]:
+        keys, matrix = await self._scope_vectors(scope)
+        if matrix is None or matrix.shape[1] != q.shape[0]:
+            return None
+
+        sims = matrix @ q
+        best = int(np.argmax(sims))
+        if sims[best] < self.similarity:
+            return None
+
+        output = await self._lookup(keys[best])
+        if output is not None:
+            logger.info("QuestionCache: near-duplicate question (similarity %.3f)", float(sims[best]))
+        return output
+
+    # --- public --- #
+
+    async def get(self, question: str, scope: str) -> Optional[FinalOutput]:
+        key = question_key(question, scope)
+        output = await self._lookup(key)
+
+        if output is None:
+            q = await self._embed(question)
+            if q is not None:
+                try:
+                    output = await self._similar(q, scope)
+                except sqlite3.Error as e:
+                    logger.warning("QuestionCache similarity lookup failed (%s), treating as miss", e)
+                if output is not None:
+                    self.stats["similar_hits"] += 1
+
+        if output is None:
+            self.stats["misses"] += 1
+            return None
+        return output.model_copy(update={"cached": True})
+
+    async def set(self, question: str, scope: str, output: FinalOutput) -> None:
+        key = question_key(question, scope)
+        output = output.model_copy(update={"cached": False})
+        self._remember(key, output)
+
+        q = await self._embed(question)
+        embedding = q.astype(np.float32).tobytes() if q is not None else None
+
+        if q is not None and scope in self._vectors:
+            keys, matrix = self._vectors[scope]
+            if key not in keys and (matrix is None or matrix.shape[1] == q.shape[0]):
+                row = q.astype(np.float32)[None, :]
+                self._vectors[scope] = (keys + [key], row if matrix is None else np.vstack([matrix, row]))
+
+        try:
+            await asyncio.to_thread(self._disk_set, key, scope, question, embedding, output.model_dump_json())
+            self.stats["writes"] += 1
+        except sqlite3.Error as e:
+            logger.warning("QuestionCache write failed (%s), kept in memory only", e)
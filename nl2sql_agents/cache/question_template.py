@@ -0,0 +1,444 @@
+"""
+QUESTION TEMPLATE CACHE
+
+Questions that differ only in a literal ("singers from France" / "singers from
+Germany") reuse the validated SQL of the first one with the new literal substituted.
+- learn: every string / number literal of the winning SQL that also appears in the
+  question becomes a slot; `(question template, SQL template)` is stored per scope
+  (database + schema version + approved tables + previous answer, see question_cache.question_scope)
+    "how many singers are from {s}"  ->  SELECT count(*) FROM singer WHERE country = '{0}'
+- match: the question template as an anchored regex; a string slot matches exactly
+  as many words as the literal it replaced, a number slot a number; words that mean
+  "no value" ("missing", "unknown", ...) never fill a string slot (they need IS NULL)
+- the cached logic checks only hold for a value that exists: with a `probe` (the
+  connector's fetch_all), every string slot's value is looked up in the column it is
+  compared with (`SELECT 1 ... WHERE col = ? LIMIT 1`) and the template is skipped
+  when a value is missing or its column cannot be resolved
+- the substituted SQL skips the generator and the LLM validators; the caller still
+  runs the local checks (ValidatorAgent.validate_local) before using it
+persisted in ~/.sql_generator/question_templates.sqlite (WAL), LRU beyond
+QUESTION_CACHE_MAX_ENTRIES
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import sqlparse
+from sqlparse import tokens as T
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from nl2sql_agents.db.ddl import quote_identifier
+from nl2sql_agents.db.plan_analyzer import table_aliases
+from nl2sql_agents.models.schemas import TableMetaData, ValidatorCheckResult
+from nl2sql_agents.config.settings import QUESTION_TEMPLATE_PATH, QUESTION_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+EVICT_CHECK_EVERY = 64   # writes between two size checks
+SCOPE_TEMPLATES = 8      # scopes whose templates are kept compiled in memory
+
+# a string slot never captures a word that changes the question's structure
+STRUCTURAL_WORDS = {"and", "or", "not", "no", "all", "any", "each", "every", "the", "a", "an", "of", "in", "from"}
+# ... nor one that asks for a missing value (IS NULL, not a literal)
+NULL_WORDS = {"missing", "unknown", "none", "null", "empty", "blank", "nil"}
+
+_WORD = r"[^\W_][\w'.&-]*"
+_NUMBER = r"-?\d+(?:\.\d+)?"
+_SPACE = re.compile(r"\s+")
+
+def _clean(question: str) -> str:
+    return _SPACE.sub(" ", question).strip().rstrip("?!.;, ")
+
+def _case_of(literal: str) -> str:
+    """Casing style of a SQL literal, re-applied to whatever the next question says"""
+    if literal.isupper():
+        return "upper"
+    if literal.islower():
+        return "lower"
+    if literal == literal.title():
+        return "title"
+    return "keep"
+
+def _apply_case(value: str, case: str) -> str:
+    if case == "upper":
+        return value.upper()
+    if case == "lower":
+        return value.lower()
+    if case == "title":
+        return value.title()
+    return value
+
+@dataclass
+class _Slot:
+    kind: str                     # "string" | "number"
+    words: int                    # word count of a string slot
+    case: str                     # casing of the SQL literal: "upper" | "lower" | "title" | "keep"
+    column: Optional[str] = None  # column a string slot is compared with: "table.column" / "column"
+    like: str = ""                # LIKE pattern around the value ("%{}%"), "" for equality
+
+@dataclass
+class QuestionTemplate:
+    question: str                     # display / key form: "singers from {s}"
+    sql: str                          # str.format template, one field per slot
+    slots: list[_Slot]
+    checks: list[ValidatorCheckResult]
+    pattern: re.Pattern
+
+    def values(self, question: str) -> Optional[list[str]]:
+        """slot values for the question (string slots in the SQL literal's casing)"""
+        m = self.pattern.fullmatch(_clean(question))
+        if m is None:
+            return None
+
+        values = []
+        for slot, raw in zip(self.slots, m.groups()):
+            if slot.kind == "string":
+                if any(w.lower() in STRUCTURAL_WORDS or w.lower() in NULL_WORDS for w in raw.split()):
+                    return None
+                values.append(_apply_case(raw, slot.case))
+            else:
+                values.append(raw)
+        return values
+
+    def fill(self, question: str) -> Optional[str]:
+        values = self.values(question)
+        if values is None:
+            return None
+        return self.sql.format(*(
+            v.replace("'", "''") if slot.kind == "string" else v for slot, v in zip(self.slots, values)
+        ))
+
+    def probes(self, values: list[str], tables: list[TableMetaData]) -> Optional[list[tuple[str, tuple]]]:
+        """
+        (query, params) per string slot, returning a row when the value exists in its
+        column; None when a column cannot be resolved (the value cannot be confirmed)
+        """
+        in_query = set(table_aliases(self.sql).values())
+        columns = {
+            t.table_name: {c.column_name.lower() for c in t.columns}
+            for t in tables if t.table_name in in_query
+        }
+        probes = []
+        for slot, value in zip(self.slots, values):
+            if slot.kind != "string":
+                continue
+            if slot.column is None:
+                return None
+            table, _, column = slot.column.rpartition(".")
+            if not table:   # unqualified: the one table of the query that has the column
+                owners = [name for name, cols in columns.items() if column.lower() in cols]
+                if len(owners) != 1:
+                    return None
+                table = owners[0]
+            op, param = ("LIKE", slot.like.format(value)) if slot.like else ("=", value)
+            probes.append((
+                f"SELECT 1 FROM {quote_identifier(table)} WHERE {quote_identifier(column)} {op} ? LIMIT 1",
+                (param,)
+            ))
+        return probes
+
+def _compile(question: str, slots: list[_Slot]) -> re.Pattern:
+    parts = re.split(r"(\{[sn]\})", question)
+    regex, i = [], 0
+    for part in parts:
+        if part in ("{s}", "{n}"):
+            slot = slots[i]
+            i += 1
+            regex.append(
+                f"({_WORD}(?:\\s+{_WORD}){{{slot.words - 1}}})" if slot.kind == "string" else f"({_NUMBER})"
+            )
+        else:
+            regex.append(r"\s+".join(re.escape(w) for w in part.split(" ")))
+    return re.compile("".join(regex), re.IGNORECASE)
+
+def _compared_column(tokens: list, i: int, aliases: dict[str, str]) -> Optional[str]:
+    """
+    Column the literal tokens[i] is compared with (`col = 'x'`, `t.col LIKE 'x%'`,
+    `col IN ('x', ...)`) as "table.column", or "column" when the query has several
+    tables and it is unqualified; None for anything else (expressions, ranges)
+    """
+    j = i - 1
+    if j >= 0 and tokens[j].value in ("(", ","):
+        while j >= 0 and (tokens[j].value in ("(", ",") or tokens[j].ttype in T.Literal):
+            j -= 1
+        if j < 0 or tokens[j].normalized != "IN":
+            return None
+    elif j < 0 or tokens[j].ttype not in T.Operator.Comparison or tokens[j].value.upper() not in ("=", "==", "!=", "<>", "LIKE"):
+        return None
+
+    j -= 1
+    if j < 0 or tokens[j].ttype is not T.Name:
+        return None
+    column = tokens[j].value
+    if j >= 2 and tokens[j - 1].value == "." and tokens[j - 2].ttype is T.Name:
+        table = aliases.get(tokens[j - 2].value.lower())
+        return f"{table}.{column}" if table else None
+    tables = set(aliases.values())
+    return f"{tables.pop()}.{column}" if len(tables) == 1 else column
+
+def extract_template(question: str, sql: str, checks: list[ValidatorCheckResult]) -> Optional[QuestionTemplate]:
+    """Template of (question, sql), None when no SQL literal appears in the question"""
+    q = _clean(question)
+    statements = sqlparse.parse(sql)
+    if len(statements) != 1:
+        return None
+    aliases = table_aliases(sql)
+    tokens = [t for t in statements[0].flatten() if not t.is_whitespace]
+    position = {id(t): k for k, t in enumerate(tokens)}
+
+    taken: list[tuple[int, int]] = []
+    spans: dict[tuple[str, str], tuple[int, int, int]] = {}   # (kind, literal) -> (start, end, slot index)
+    slots: list[_Slot] = []
+    sql_parts: list[str | tuple[int, str, str]] = []           # text, or (slot index, prefix, suffix)
+
+    def free(start: int, end: int) -> bool:
+        return all(end <= s or start >= e for s, e in taken)
+
+    for token in statements[0].flatten():
+        value = token.value
+        escaped = value.replace("{", "{{").replace("}", "}}")
+
+        if token.ttype in T.Literal.String.Single and len(value) >= 2:
+            content = value[1:-1].replace("''", "'")
+            core = content.strip("%")
+            kind, pattern = "string", rf"(?<!\w){re.escape(core)}(?!\w)"
+        elif token.ttype in T.Literal.Number:
+            core = value
+            kind, pattern = "number", rf"(?<![\w.]){re.escape(core)}(?![\w.])"
+        else:
+            sql_parts.append(escaped)
+            continue
+
+        if (kind, core) in spans:
+            sql_parts.append(_slot_part(kind, value, spans[(kind, core)][2]))
+            continue
+
+        match = next(
+            (m for m in re.finditer(pattern, q, re.IGNORECASE) if core and free(m.start(), m.end())), None
+        )
+        if match is None or (kind == "string" and not re.fullmatch(rf"{_WORD}(?: {_WORD})*", core)):
+            sql_parts.append(escaped)
+            continue
+
+        taken.append((match.start(), match.end()))
+        spans[(kind, core)] = (match.start(), match.end(), len(slots))
+        slot = _Slot(kind=kind, words=len(core.split()), case=_case_of(core) if kind == "string" else "keep")
+        part = _slot_part(kind, value, len(slots))
+        if kind == "string":
+            slot.column = _compared_column(tokens, position[id(token)], aliases)
+            if part[1] != "'" or part[2] != "'":
+                slot.like = f"{part[1][1:]}{{}}{part[2][:-1]}"
+        slots.append(slot)
+        sql_parts.append(part)
+
+    if not slots:
+        return None
+
+    # question slots in question order, SQL fields renumbered to match
+    by_position = sorted(spans.values())
+    order = {slot_index: i for i, (_, _, slot_index) in enumerate(by_position)}
+    template_q, last = [], 0
+    for start, end, slot_index in by_position:
+        template_q.append(q[last:start].lower())
+        template_q.append("{s}" if slots[slot_index].kind == "string" else "{n}")
+        last = end
+    template_q.append(q[last:].lower())
+
+    sql_template = "".join(
+        part if isinstance(part, str) else f"{part[1]}{{{order[part[0]]}}}{part[2]}" for part in sql_parts
+    )
+    ordered = [slots[slot_index] for _, _, slot_index in by_position]
+    question_template = "".join(template_q)
+
+    return QuestionTemplate(
+        question=question_template,
+        sql=sql_template,
+        slots=ordered,
+        checks=list(checks),
+        pattern=_compile(question_template, ordered),
+    )
+
+def _slot_part(kind: str, literal: str, index: int) -> tuple[int, str, str]:
+    """(slot index, text before, text after) of a literal token; LIKE wildcards stay in place"""
+    if kind == "number":
+        return index, "", ""
+    content = literal[1:-1]
+    prefix = content[:len(content) - len(content.lstrip("%"))]
+    suffix = content[len(content.rstrip("%")):]
+    return index, f"'{prefix}", f"{suffix}'"
+
+class TemplateCache:
+    def __init__(
+            self,
+            path: str = QUESTION_TEMPLATE_PATH,
+            max_entries: int = QUESTION_CACHE_MAX_ENTRIES,
+            probe: Optional[Callable[[str, tuple], Awaitable[list]]] = None
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.probe = probe   # (query, params) -> rows, on the read-only pool
+
+        self._templates: OrderedDict[str, dict[str, QuestionTemplate]] = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+
+        self.stats = {"hits": 0, "misses": 0, "unconfirmed": 0, "learned": 0, "evictions": 0}
+
+    # --- disk (worker thread) --- #
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS templates ("
+                "key TEXT PRIMARY KEY, scope TEXT NOT NULL, question TEXT NOT NULL, sql TEXT NOT NULL, "
+                "slots TEXT NOT NULL, checks TEXT NOT NULL, accessed REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS templates_scope ON templates(scope)")
+            db.execute("CREATE INDEX IF NOT EXISTS templates_accessed ON templates(accessed)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _disk_load(self, scope: str) -> list[tuple[str, str, str, str]]:
+        with self._db_lock:
+            return self._conn().execute(
+                "SELECT question, sql, slots, checks FROM templates WHERE scope = ?", (scope,)
+            ).fetchall()
+
+    def _disk_touch(self, key: str) -> None:
+        with self._db_lock:
+            db = self._conn()
+            db.execute("UPDATE templates SET accessed = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+
+    def _disk_set(self, key: str, scope: str, template: QuestionTemplate) -> None:
+        slots = json.dumps([[s.kind, s.words, s.case, s.column, s.like] for s in template.slots])
+        checks = json.dumps([c.model_dump() for c in template.checks])
+        with self._db_lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO templates (key, scope, question, sql, slots, checks, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, scope, template.question, template.sql, slots, checks, time.time())
+            )
+            db.commit()
+
+            self._writes += 1
+            if self._writes % EVICT_CHECK_EVERY == 1:
+                excess = db.execute("SELECT COUNT(*) FROM templates").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    db.execute(
+                        "DELETE FROM templates WHERE key IN "
+                        "(SELECT key FROM templates ORDER BY accessed LIMIT ?)", (excess,)
+                    )
+                    db.commit()
+                    self.stats["evictions"] += excess
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # --- memory --- #
+
+    async def _scope(self, scope: str) -> dict[str, QuestionTemplate]:
+        templates = self._templates.get(scope)
+        if templates is None:
+            rows = await asyncio.to_thread(self._disk_load, scope)
+            templates = {}
+            for question, sql, slots_json, checks_json in rows:
+                slots = [_Slot(*slot) for slot in json.loads(slots_json)]
+                templates[question] = QuestionTemplate(
+                    question=question,
+                    sql=sql,
+                    slots=slots,
+                    checks=[ValidatorCheckResult(**c) for c in json.loads(checks_json)],
+                    pattern=_compile(question, slots),
+                )
+            self._templates[scope] = templates
+            if len(self._templates) > SCOPE_TEMPLATES:
+                self._templates.popitem(last=False)
+        self._templates.move_to_end(scope)
+        return templates
+
+    async def _confirmed(self, template: QuestionTemplate, values: list[str], tables: list[TableMetaData]) -> bool:
+        """every string value exists in the column it is compared with"""
+        if self.probe is None:
+            return True
+        probes = template.probes(values, tables)
+        if probes is None:
+            return False
+        try:
+            for query, params in probes:
+                if not await self.probe(query, params):
+                    return False
+        except Exception as e:
+            logger.warning("TemplateCache: value lookup failed (%s)", e)
+            return False
+        return True
+
+    # --- public --- #
+
+    async def match(
+            self,
+            question: str,
+            scope: str,
+            tables: Optional[list[TableMetaData]] = None
+    ) -> Optional[tuple[str, QuestionTemplate]]:
+        """(substituted SQL, template) for the first template the question fits
+        (and whose values exist in the database, see `probe`)"""
+        try:
+            templates = await self._scope(scope)
+        except sqlite3.Error as e:
+            logger.warning("TemplateCache read failed (%s), treating as miss", e)
+            templates = {}
+
+        for template in templates.values():
+            values = template.values(question)
+            if values is None:
+                continue
+            if not await self._confirmed(template, values, tables or []):
+                self.stats["unconfirmed"] += 1
+                logger.info("TemplateCache: %r fits template %r but a value is not in the database", question, template.question)
+                continue
+            sql = template.fill(question)
+            if sql is not None:
+                self.stats["hits"] += 1
+                logger.info("TemplateCache: %r matches template %r", question, template.question)
+                key = hashlib.sha256(f"{scope}\n{template.question}".encode()).hexdigest()
+                try:
+                    await asyncio.to_thread(self._disk_touch, key)
+                except sqlite3.Error:
+                    pass
+                return sql, template
+
+        self.stats["misses"] += 1
+        return None
+
+    async def learn(self, question: str, scope: str, sql: str, checks: list[ValidatorCheckResult]) -> None:
+        template = extract_template(question, sql, checks)
+        if template is None:
+            return
+
+        key = hashlib.sha256(f"{scope}\n{template.question}".encode()).hexdigest()
+        try:
+            templates = await self._scope(scope)
+            templates[template.question] = template
+            self.stats["learned"] += 1
+            await asyncio.to_thread(self._disk_set, key, scope, template)
+        except sqlite3.Error as e:
+            logger.warning("TemplateCache write failed (%s), kept in memory only", e)
@@ -1,79 +1,143 @@
 """
 SCHEMA CACHE
 
-JSON File cache at ~/.sql_generator/schema_cache.json
+Sharded on-disk cache at ~/.sql_generator/schema/<key>.bin - one shard per database
 key: SHA-256 hash of absolute database path
-TTL: configurable (defautl 24 hours)
+format: zlib-compressed compact JSON of a SchemaCacheEntry
+writes: temp file + fsync + atomic rename, serialised across processes with a
+        per-shard flock; readers never block and never see a torn file
+I/O runs in a worker thread so the event loop is never blocked
+lookup cost is independent of how many databases are cached
+
+validity: DB fingerprint (file size, mtime, inode, WAL state, schema_version)
+          compared in O(1) against os.stat of the database - no query needed.
+TTL: fallback only (defautl 24 hours) - entries without a fingerprint, or
+     older than the TTL, are re-checked rather than trusted
+entries also keep per-table DDL hashes so a stale entry can be refreshed
+incrementally (DatabaseConnector.refresh)
 """
 
 import os
 import time
-import json
+import zlib
+import asyncio
 import logging
 import hashlib
 from typing import Optional
 
-from nl2sql_agents.models.schemas import TableMetaData
-from nl2sql_agents.config.settings import CACHE_TTL_HOURS, CACHE_DIR, CACHE_FILE
+from nl2sql_agents.cache.fileio import file_lock, atomic_write
+from nl2sql_agents.models.schemas import TableMetaData, SchemaCacheEntry, DBFingerprint
+from nl2sql_agents.config.settings import CACHE_TTL_HOURS, SCHEMA_CACHE_DIR
 
 logger = logging.getLogger(__name__)
 
+SHARD_SUFFIX = ".bin"
+
 class SchemaCache:
-    def __init__(self) -> None:
-        os.makedirs(CACHE_DIR, exist_ok=True)
+    def __init__(self, cache_dir: str = SCHEMA_CACHE_DIR) -> None:
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
 
     def _cache_key(self, db_path: str) -> str:
         raw = os.path.abspath(db_path)
         return hashlib.sha256(raw.encode()).hexdigest()[:16]
-    
-    def _load_raw(self) -> dict:
-        if not os.path.exists(CACHE_FILE):
-            return {}
-        with open(CACHE_FILE, "r") as f:
-            return json.load(f)
-    
-    def _save_raw(self, data: dict) -> None:
-        with open(CACHE_FILE, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
-    
-    def get(self, db_path: str) -> Optional[list[TableMetaData]]:
-        """Return cached tables if valid, else None(cache miss)"""
-        key = self._cache_key(db_path=db_path)
-        raw = self._load_raw()
 
-        if key not in raw:
-            logger.info("Cache MISS for key %s", key)
+    def _shard_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + SHARD_SUFFIX)
+
+    def _locked(self, key: str):
+        """Exclusive inter-process lock for writers of one shard"""
+        return file_lock(os.path.join(self.cache_dir, key + ".lock"))
+
+    def _read_shard(self, key: str) -> Optional[SchemaCacheEntry]:
+        try:
+            with open(self._shard_path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
             return None
-        
-        entry = raw[key]
-        age_hours = (time.time() - entry["timestamp"]) / 3600
+
+        try:
+            return SchemaCacheEntry.model_validate_json(zlib.decompress(data))
+        except Exception as e:
+            logger.warning("Cache shard %s unreadable (%s), ignoring", key, e)
+            return None
+
+    def _write_shard(self, key: str, entry: SchemaCacheEntry) -> None:
+        payload = zlib.compress(entry.model_dump_json().encode(), 6)
+
+        with self._locked(key):
+            atomic_write(self._shard_path(key), payload)
+
+    def _delete_shard(self, key: str) -> bool:
+        with self._locked(key):
+            try:
+                os.unlink(self._shard_path(key))
+                return True
+            except FileNotFoundError:
+                return False
+
+    def is_fresh(self, entry: SchemaCacheEntry, fingerprint: Optional[DBFingerprint] = None) -> bool:
+        """O(1) validity check: fingerprint first, TTL only as a fallback"""
+        age_hours = (time.time() - entry.timestamp) / 3600
 
         if age_hours > CACHE_TTL_HOURS:
-            logger.info("Cache EXPIRED (age=%.1fh, tables=%d)", age_hours, len(entry['tables']))
+            logger.info("Cache EXPIRED (age=%.1fh, tables=%d)", age_hours, len(entry.tables))
+            return False
+
+        if fingerprint is None:
+            return True
+
+        if entry.fingerprint is None:
+            logger.info("Cache STALE: entry has no fingerprint to check against")
+            return False
+
+        if not entry.fingerprint.same_file_state(fingerprint):
+            logger.info("Cache STALE: database file changed since it was cached")
+            return False
+
+        return True
+
+    async def get(self, db_path: str, fingerprint: Optional[DBFingerprint] = None) -> Optional[list[TableMetaData]]:
+        """Return cached tables if valid, else None(cache miss)"""
+        entry = await self.get_entry(db_path)
+
+        if entry is None:
+            logger.info("Cache MISS for key %s", self._cache_key(db_path))
             return None
 
-        logger.info("Cache HIT for key %s", key)
-        return [TableMetaData(**t) for t in entry["tables"]]
+        if not self.is_fresh(entry, fingerprint):
+            return None
 
-    def set(self, db_path: str, tables: list[TableMetaData]) -> None:
-        """Persist introspection result into cache"""    
-        key = self._cache_key(db_path)
-        raw=self._load_raw()
+        logger.info("Cache HIT for key %s", self._cache_key(db_path))
+        return entry.tables
 
-        raw[key] = {
-            "timestamp": time.time(),
-            "tables": [t.model_dump() for t in tables]
-        }
+    async def get_entry(self, db_path: str) -> Optional[SchemaCacheEntry]:
+        """Return the cached entry regardless of age (for incremental refresh)"""
+        return await asyncio.to_thread(self._read_shard, self._cache_key(db_path))
 
-        self._save_raw(raw)
-        logger.info("Cache SET: %d tables for key=%s", len(tables), key)
+    async def set(
+            self,
+            db_path: str,
+            tables: list[TableMetaData],
+            fingerprint: Optional[DBFingerprint] = None,
+            ddl_hashes: Optional[dict[str, str]] = None
+    ) -> None:
+        """Persist introspection result into cache"""
+        await self.set_entry(db_path, SchemaCacheEntry(
+            timestamp=time.time(),
+            fingerprint=fingerprint,
+            ddl_hashes=ddl_hashes or {},
+            tables=tables
+        ))
+
+    async def set_entry(self, db_path: str, entry: SchemaCacheEntry) -> None:
+        key = self._cache_key(db_path)
+        await asyncio.to_thread(self._write_shard, key, entry)
+        logger.info("Cache SET: %d tables for key=%s", len(entry.tables), key)
 
-    def invalidate(self, db_path: str) -> None:
+    async def invalidate(self, db_path: str) -> None:
         """Force expire a cache entry"""
         key = self._cache_key(db_path)
-        raw=self._load_raw()
 
-        if key in raw:
-            del raw[key]
-            self._save_raw(raw)
-            logger.info("Cache INVALIDATED for key=%s", key)
\ No newline at end of file
+        if await asyncio.to_thread(self._delete_shard, key):
+            logger.info("Cache INVALIDATED for key=%s", key)
@@ -0,0 +1,130 @@
+"""
+SCHEMA REGISTRY
+
+In-process, version-stamped memo in front of SchemaCache.
+- the first request deserializes the cache shard (or introspects) once
+- every later request gets the SAME frozen TableMetaData objects back:
+  no shard read, no JSON parse, no pydantic validation
+- freshness: O(1) os.stat fingerprint check, TTL fallback, then an incremental
+  connector.refresh() - unchanged tables keep their objects across refreshes
+- data-only writes (no DDL change) only move the in-memory fingerprint; the shard
+  is rewritten when the schema changes or at most once per TTL
+- version: stable hash of the per-table DDL hashes (table, index and view
+  statements); downstream memos (keyword index, FK graph, DDL fragments,
+  schema clone, ...) key on it
+"""
+
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+from dataclasses import dataclass
+
+from nl2sql_agents.db.connector import DatabaseConnector
+from nl2sql_agents.cache.schema_cache import SchemaCache
+from nl2sql_agents.models.schemas import TableMetaData, SchemaCacheEntry, DBFingerprint
+from nl2sql_agents.config.settings import CACHE_TTL_HOURS
+
+logger = logging.getLogger(__name__)
+
+def schema_version_stamp(ddl_hashes: dict[str, str], fallback: Optional[int] = None) -> str:
+    if not ddl_hashes:
+        return f"v{fallback}"
+    raw = "\n".join(f"{name}:{h}" for name, h in sorted(ddl_hashes.items()))
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+@dataclass(frozen=True)
+class SchemaSnapshot:
+    version: str
+    entry: SchemaCacheEntry
+
+    @property
+    def tables(self) -> list[TableMetaData]:
+        return self.entry.tables
+
+class SchemaRegistry:
+    def __init__(self, connector: DatabaseConnector, cache: SchemaCache) -> None:
+        self.connector = connector
+        self.cache = cache
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "refreshes": 0, "introspections": 0, "shard_writes": 0}
+
+        self._snapshot: Optional[SchemaSnapshot] = None
+        self._lock = asyncio.Lock()
+
+    def _fresh(self, file_state: DBFingerprint) -> Optional[SchemaSnapshot]:
+        snap = self._snapshot
+        if snap is not None and self.cache.is_fresh(snap.entry, file_state):
+            return snap
+        return None
+
+    def _publish(self, entry: SchemaCacheEntry) -> SchemaSnapshot:
+        version = schema_version_stamp(
+            entry.ddl_hashes, entry.fingerprint.schema_version if entry.fingerprint else None
+        )
+        self._snapshot = SchemaSnapshot(version=version, entry=entry)
+        return self._snapshot
+
+    async def get(self) -> SchemaSnapshot:
+        snap = self._fresh(self.connector.file_state())
+        if snap is not None:
+            self.stats["memory_hits"] += 1
+            return snap
+
+        async with self._lock:
+            # another request may have refreshed while we waited
+            file_state = self.connector.file_state()
+            snap = self._fresh(file_state)
+            if snap is not None:
+                self.stats["memory_hits"] += 1
+                return snap
+
+            base = self._snapshot.entry if self._snapshot is not None else None
+
+            if base is None:
+                base = await self.cache.get_entry(self.connector.db_path)
+                if base is not None and self.cache.is_fresh(base, file_state):
+                    self.stats["disk_hits"] += 1
+                    logger.info("SchemaRegistry: loaded %d tables from disk cache", len(base.tables))
+                    return self._publish(base)
+
+            if base is not None and base.ddl_hashes:
+                # same file -> trust schema_version to skip the rescan; replaced file -> compare DDL hashes
+                same_file = base.fingerprint is not None and base.fingerprint.inode == file_state.inode
+                tables = await self.connector.refresh(
+                    base.tables,
+                    base.ddl_hashes,
+                    base.fingerprint.schema_version if same_file else None
+                )
+                self.stats["refreshes"] += 1
+            else:
+                tables = await self.connector.introspect()
+                self.stats["introspections"] += 1
+
+            fingerprint = file_state.model_copy(update={"schema_version": self.connector.schema_version})
+
+            if (
+                base is not None
+                and tables is base.tables
+                and self.connector.ddl_hashes == base.ddl_hashes
+                and time.time() - base.timestamp < CACHE_TTL_HOURS * 3600
+            ):
+                # data-only write: keep the shard, only the fingerprint moves
+                entry = base.model_copy(update={"fingerprint": fingerprint})
+            else:
+                entry = SchemaCacheEntry(
+                    timestamp=time.time(),
+                    fingerprint=fingerprint,
+                    ddl_hashes=dict(self.connector.ddl_hashes),
+                    tables=tables
+                )
+                await self.cache.set_entry(self.connector.db_path, entry)
+                self.stats["shard_writes"] += 1
+
+            snap = self._publish(entry)
+            logger.info("SchemaRegistry: schema version %s (%d tables, %s)", snap.version, len(tables), self.stats)
+            return snap
+
+    def invalidate(self) -> None:
+        """Drop the in-memory snapshot; the next get() re-validates from disk"""
+        self._snapshot = None
@@ -164,6 +164,8 @@ def _print_scores(candidate_scores) -> None:
 def _print_output(result) -> None:
     """Pretty-print the full pipeline result."""
     console.print()
+    if getattr(result, "cached", False):
+        console.print("[muted]Answered from the question cache[/muted]")
     _print_sql(result.sql)
 
     _print_section("Explanation", result.explanation, border="bright_green")
@@ -262,6 +264,7 @@ async def _async_main(args: argparse.Namespace) -> None:
 
     # Lazy import — keeps startup fast; logging & env are ready first
     from nl2sql_agents.orchestrator.pipeline import graph
+    from nl2sql_agents.orchestrator.nodes import shutdown
 
     log_file = _setup_logging()
     logger = logging.getLogger("nl2sql.cli")
@@ -269,15 +272,18 @@ async def _async_main(args: argparse.Namespace) -> None:
 
     config = {"configurable": {"thread_id": "user"}}
 
-    # Single-shot mode
-    if args.query:
-        query = " ".join(args.query)
-        console.print(f"\n[muted]Question:[/muted]  {query}")
-        await _run_query(query, graph, config, logger)
-        return
+    try:
+        # Single-shot mode
+        if args.query:
+            query = " ".join(args.query)
+            console.print(f"\n[muted]Question:[/muted]  {query}")
+            await _run_query(query, graph, config, logger)
+            return
 
-    # Interactive REPL
-    await _interactive(graph, config, logger)
+        # Interactive REPL
+        await _interactive(graph, config, logger)
+    finally:
+        await shutdown()
 
 
 def main() -> None:
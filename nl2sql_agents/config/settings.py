@@ -1,10 +1,19 @@
 import os
+from typing import Any
 from dotenv import load_dotenv
 from dataclasses import dataclass
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
 load_dotenv()
 
+# LLM scheduler defaults (per provider, see llm/scheduler.py); 0 = unlimited
+LLM_MAX_CONCURRENCY: int = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+LLM_RPM: int = int(os.getenv('LLM_RPM', '0'))
+LLM_TPM: int = int(os.getenv('LLM_TPM', '0'))
+LLM_MAX_RETRIES: int = int(os.getenv('LLM_MAX_RETRIES', '4'))
+LLM_BACKOFF_BASE: float = float(os.getenv('LLM_BACKOFF_BASE', '0.5'))
+LLM_BACKOFF_MAX: float = float(os.getenv('LLM_BACKOFF_MAX', '20'))
+
 @dataclass(frozen=True)
 class LLMProvider:
     """Connection details for a single LLM Provider."""
@@ -12,14 +21,28 @@ class LLMProvider:
     base_url: str
     default_model: str
     embedding_model: str = "openai/text-embedding-3-small"
+    max_concurrency: int = LLM_MAX_CONCURRENCY
+    rpm: int = LLM_RPM
+    tpm: int = LLM_TPM
 
-    def chat_model(self, *, temperature:float = 0.3, max_tokens: int = 2048) -> ChatOpenAI:
+    def chat_model(
+            self,
+            *,
+            temperature: float | None = 0.3,
+            max_tokens: int | None = 2048,
+            model: str | None = None,
+            http_async_client: Any | None = None,
+            max_retries: int | None = None
+    ) -> ChatOpenAI:
+        kwargs = {} if max_retries is None else {"max_retries": max_retries}
         return ChatOpenAI(
-            model = self.default_model,
+            model = model or self.default_model,
             api_key = self.api_key,
             base_url = self.base_url,
             temperature=temperature,
-            max_tokens=max_tokens
+            max_tokens=max_tokens,
+            http_async_client=http_async_client,
+            **kwargs
         )
 
     def embeddings_model(self) -> OpenAIEmbeddings:
@@ -47,20 +70,98 @@ PRIMARY_PROVIDER: LLMProvider = OPENAI_PROVIDER
 VALIDATION_PROVIDER: LLMProvider = OPENAI_PROVIDER # GEMINI_PROVIDER
 EMBEDDING_PROVIDER: LLMProvider = OPENAI_PROVIDER
 
+# LLM HTTP client (one keep-alive pool shared by every agent)
+LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv('LLM_HTTP_MAX_CONNECTIONS', '20'))
+LLM_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv('LLM_HTTP_KEEPALIVE_EXPIRY', '30'))
+LLM_HTTP_TIMEOUT: float = float(os.getenv('LLM_HTTP_TIMEOUT', '60'))
+
 # Database
 DB_TYPE: str = os.getenv('DB_TYPE', 'sqlite')
 DB_PATH: str = os.getenv('DB_PATH', '')
 
+# Connection Pool
+DB_POOL_SIZE: int = int(os.getenv('DB_POOL_SIZE', '4'))
+DB_POOL_TIMEOUT: float = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+DB_POOL_HEALTHCHECK_SECONDS: float = float(os.getenv('DB_POOL_HEALTHCHECK_SECONDS', '30'))
+
 # Schema Cache
 CACHE_DIR: str = os.path.expanduser("~/.sql_generator")
-CACHE_FILE: str = os.path.join(CACHE_DIR, "schema_cache.json")
-CACHE_TTL_HOURS: int = int(os.getenv("CACHE_TTL_HOURS", "24"))
+SCHEMA_CACHE_DIR: str = os.path.join(CACHE_DIR, "schema")
+CACHE_TTL_HOURS: float = float(os.getenv("CACHE_TTL_HOURS", "24"))
+
+# LLM response cache (memory LRU + sqlite file with size-based eviction)
+LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH: str = os.path.join(CACHE_DIR, "llm_cache.sqlite")
+LLM_CACHE_MEMORY_ITEMS: int = int(os.getenv("LLM_CACHE_MEMORY_ITEMS", "1024"))
+LLM_CACHE_MAX_BYTES: int = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Question cache: question -> FinalOutput, per database + schema version + approved tables
+QUESTION_CACHE_ENABLED: bool = os.getenv("QUESTION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+QUESTION_CACHE_PATH: str = os.path.join(CACHE_DIR, "question_cache.sqlite")
+QUESTION_CACHE_MEMORY_ITEMS: int = int(os.getenv("QUESTION_CACHE_MEMORY_ITEMS", "256"))
+QUESTION_CACHE_MAX_ENTRIES: int = int(os.getenv("QUESTION_CACHE_MAX_ENTRIES", "10000"))
+# cosine similarity for serving a near-duplicate phrasing (0 = exact matches only)
+QUESTION_CACHE_SIMILARITY: float = float(os.getenv("QUESTION_CACHE_SIMILARITY", "0"))
+# question templates: reuse validated SQL for questions that differ only in a literal
+QUESTION_TEMPLATES_ENABLED: bool = os.getenv("QUESTION_TEMPLATES_ENABLED", "true").lower() in ("1", "true", "yes")
+QUESTION_TEMPLATE_PATH: str = os.path.join(CACHE_DIR, "question_templates.sqlite")
+
+# Embedding Store (table embeddings, memory-mapped on disk)
+EMBEDDING_CACHE_DIR: str = os.path.join(CACHE_DIR, "embeddings")
+EMBEDDING_STORE_DTYPE: str = os.getenv("EMBEDDING_STORE_DTYPE", "float32")  # or float16
+EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
 
 # Pipleline
 N_CANDIDATES: int = int(os.getenv('N_CANDIDATES', '3'))
 MAX_RETRIES: int = int(os.getenv('MAX_RETRIES', '2'))
 DISCOVERY_TOP_K: int = int(os.getenv('DISCOVERY_TOP_K', '10'))
 KEYWORD_PRE_FILTER_TOP_N: int = int(os.getenv('KEYWORD_PRE_FILTER_TOP_N', '50'))
+# FK graph: tables with more FK neighbours are not expanded into the precomputed rings (0 = no limit)
+FK_HUB_DEGREE: int = int(os.getenv('FK_HUB_DEGREE', '200'))
+
+# Generation + validation: "staged" (all N candidates, then validation of all of them,
+# one batched LLM review) | "streaming" (opt-in: each candidate is validated as soon as
+# it is generated, one LLM call per check, no batching; stops once a candidate passes
+# the logic check without being disqualified and SPECULATIVE_WAIT_FOR candidates are
+# validated - a performance WARN or an empty sample result does not prevent the stop)
+PIPELINE_MODE: str = os.getenv('PIPELINE_MODE', 'staged').lower()
+SPECULATIVE_WAIT_FOR: int = int(os.getenv('SPECULATIVE_WAIT_FOR', '1'))
+
+# Schema formatter: "ddl" (local, deterministic) | "llm"
+SCHEMA_FORMATTER_MODE: str = os.getenv('SCHEMA_FORMATTER_MODE', 'ddl').lower()
+
+# Syntax validator: "explain" (local EXPLAIN against a schema-only clone, SQLite) | "llm"
+SYNTAX_VALIDATOR_MODE: str = os.getenv('SYNTAX_VALIDATOR_MODE', 'explain').lower()
+
+# LLM validation checks: "batch" (one call reviews every candidate on every LLM check) | "per_check"
+VALIDATION_LLM_MODE: str = os.getenv('VALIDATION_LLM_MODE', 'batch').lower()
+
+# Performance validator: "plan" (local EXPLAIN QUERY PLAN analysis, SQLite) | "llm"
+PERFORMANCE_VALIDATOR_MODE: str = os.getenv('PERFORMANCE_VALIDATOR_MODE', 'plan').lower()
+# estimated rows examined: WARN for full scans / sorts above PLAN_WARN_ROWS, FAIL above PLAN_FAIL_ROWS
+PLAN_WARN_ROWS: int = int(os.getenv('PLAN_WARN_ROWS', '100000'))
+PLAN_FAIL_ROWS: int = int(os.getenv('PLAN_FAIL_ROWS', '10000000'))
+
+# Execution validator: run survivors on a sampled, FK-consistent copy of the database (SQLite).
+# The sample holds real rows; SAMPLE_DB_PERSIST=false keeps it in memory instead of SAMPLE_DB_DIR
+EXECUTION_VALIDATOR_ENABLED: bool = os.getenv('EXECUTION_VALIDATOR_ENABLED', 'true').lower() in ("1", "true", "yes")
+SAMPLE_DB_DIR: str = os.path.join(CACHE_DIR, "samples")
+SAMPLE_DB_ROWS: int = int(os.getenv('SAMPLE_DB_ROWS', '200'))
+SAMPLE_DB_PERSIST: bool = os.getenv('SAMPLE_DB_PERSIST', 'true').lower() in ("1", "true", "yes")
+EXECUTION_TIMEOUT_MS: int = int(os.getenv('EXECUTION_TIMEOUT_MS', '200'))
+EXECUTION_MAX_STEPS: int = int(os.getenv('EXECUTION_MAX_STEPS', '5000000'))
+EXECUTION_MAX_ROWS: int = int(os.getenv('EXECUTION_MAX_ROWS', '1000'))
+# candidates returning the same non-empty result needed to skip the LLM logic check
+EXECUTION_VOTE_MIN: int = int(os.getenv('EXECUTION_VOTE_MIN', '2'))
+
+# Schema packer: token budget for the schema in the generator prompt (0 = unlimited)
+SCHEMA_TOKEN_BUDGET: int = int(os.getenv('SCHEMA_TOKEN_BUDGET', '3000'))
+
+# Semantic search: switch from exact matmul to the IVF index above this many tables
+SEMANTIC_ANN_MIN_TABLES: int = int(os.getenv('SEMANTIC_ANN_MIN_TABLES', '50000'))
+SEMANTIC_ANN_NPROBE: int = int(os.getenv('SEMANTIC_ANN_NPROBE', '16'))
+# columns per embedded table chunk (wide tables get several chunks)
+SEMANTIC_CHUNK_COLUMNS: int = int(os.getenv('SEMANTIC_CHUNK_COLUMNS', '20'))
 
 # Temperatures for Candidates
 CANDIDATE_TEMPERATURES: list[float] = [0.3, 0.7, 0.5]
@@ -3,105 +3,284 @@ DATABASE CONNECTOR
 
 - Generic asynd DB connector with pluggable backends.
 - Ships with SQLite support (for Spider Dataset and local DB)
+- queries run on a pooled, long-lived read-only connection (see db/pool.py)
 - provides:
-    - fetch_all(query)  -> list of row dicts
-    - introspect()      -> list[TableMetaData] (full schema)
+    - fetch_all(query, params)  -> list of row dicts
+    - introspect()      -> list[TableMetaData] (full schema, bulk pragma_* queries)
+    - refresh(tables)   -> re-introspects only tables whose DDL changed
+    - file_state()      -> DBFingerprint from os.stat of the db + WAL file (no query)
+    - table_statistics(names) -> row estimates (sqlite_stat1 / max(rowid)) + index stats
+    - close()           -> shuts the connection pool down
 """
 
 import os
-import asyncio
+import json
 import logging
-import aiosqlite
+import hashlib
 
-from nl2sql_agents.config.settings import DB_PATH, DB_TYPE
-from nl2sql_agents.models.schemas import TableMetaData, ColumnMetaData
+from nl2sql_agents.db.pool import ConnectionPool
+from nl2sql_agents.db.ddl import quote_identifier
+from nl2sql_agents.config.settings import DB_PATH, DB_POOL_SIZE
+from nl2sql_agents.models.schemas import TableMetaData, ColumnMetaData, DBFingerprint
 
 logger = logging.getLogger(__name__)
 
 class DatabaseConnector:
     """Generic Connector - Currently Supports SQLite"""
 
-    def __init__(self, db_path: str = DB_PATH) -> None:
+    def __init__(self, db_path: str = DB_PATH, pool_size: int = DB_POOL_SIZE) -> None:
         self.db_path = db_path
 
         if not os.path.exists(self.db_path):
             raise FileNotFoundError(f"Database not found: {self.db_path}")
-        
-    async def fetch_all(self, query: str) -> list[dict]:
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(query) as cursor:
+
+        self.pool = ConnectionPool(self.db_path, size=pool_size)
+
+        # recorded on every introspect() / refresh()
+        self.schema_version: int | None = None
+        self.ddl_hashes: dict[str, str] = {}
+
+    async def fetch_all(self, query: str, params: tuple = ()) -> list[dict]:
+        async with self.pool.acquire() as db:
+            async with db.execute(query, params) as cursor:
                 rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
+
+    def file_state(self) -> DBFingerprint:
+        """Cheap O(1) fingerprint: size/mtime/inode of the db file and its WAL (no schema_version)"""
+        st = os.stat(self.db_path)
+        try:
+            wal = os.stat(f"{self.db_path}-wal")
+            wal_size, wal_mtime_ns = wal.st_size, wal.st_mtime_ns
+        except FileNotFoundError:
+            wal_size, wal_mtime_ns = 0, 0
+
+        return DBFingerprint(
+            file_size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            inode=st.st_ino,
+            wal_size=wal_size,
+            wal_mtime_ns=wal_mtime_ns,
+            schema_version=self.schema_version
+        )
+
+    async def table_statistics(self, names: list[str]) -> tuple[dict[str, int | None], dict[str, list[int]]]:
+        """
+        (row estimate per table, sqlite_stat1 numbers per index)
+        rows come from sqlite_stat1 (written by ANALYZE) when present, else from
+        max(rowid): O(log n), exact unless rows were deleted; None when neither works
+        (e.g. a WITHOUT ROWID table that was never analyzed)
+        """
+        rows: dict[str, int | None] = {}
+        index_stats: dict[str, list[int]] = {}
+
+        async with self.pool.acquire() as db:
+            try:
+                async with db.execute("SELECT tbl, idx, stat FROM sqlite_stat1") as cursor:
+                    cursor.row_factory = None
+                    stat_rows = await cursor.fetchall()
+            except Exception:
+                stat_rows = []  # never analyzed
+
+            for tbl, idx, stat in stat_rows:
+                numbers = [int(n) for n in str(stat).split() if n.isdigit()]
+                if not numbers:
+                    continue
+                rows[tbl] = max(rows.get(tbl) or 0, numbers[0])
+                if idx:
+                    index_stats[idx] = numbers
+
+            for name in names:
+                if name in rows:
+                    continue
+                try:
+                    async with db.execute(f"SELECT max(rowid) FROM {quote_identifier(name)}") as cursor:
+                        (value,) = await cursor.fetchone()
+                    rows[name] = int(value or 0)
+                except Exception:
+                    rows[name] = None
+
+        return {name: rows.get(name) for name in names}, index_stats
+
+    def pool_stats(self) -> dict:
+        return self.pool.stats.as_dict()
+
+    async def close(self) -> None:
+        await self.pool.close()
     
     # schema introspection
     async def introspect(self) -> list[TableMetaData]:
+        """Bulk introspection: two queries for the whole schema, built in a single pass"""
         logger.info("Database Conenctor: Introspecting %s", self.db_path)
 
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            tables = await self._fetch_tables(db)
-            result: list[TableMetaData] = []
-
-            for table_name in tables:
-                columns = await self._fetch_columns(db, table_name)
-                fk_map = await self._fetch_foreign_keys(db, table_name)
-                pk_cols = await self._fetch_primary_keys(db, table_name)
-
-                build_cols = []
-                for col in columns:
-                    col_name = col['name']
-                    fk_target = fk_map.get(col_name)
-                    build_cols.append(
-                        ColumnMetaData(
-                            column_name=col_name,
-                            data_type = col["type"] or "TEXT",
-                            nullable = not col['notnull'],
-                            is_primary_key=col_name in pk_cols,
-                            is_foreign_key=fk_target is not None,
-                            reference_table = fk_target[0] if fk_target else None,
-                            reference_column=fk_target[1] if fk_target else None
-                        )
-                    )
-            
-                db_name = os.path.splitext(os.path.basename(self.db_path))[0]
-                result.append(
-                    TableMetaData(
-                        table_name=table_name,
-                        schema_name=db_name,
-                        columns=build_cols
-                    )
-                )
+        async with self.pool.acquire() as db:
+            self.schema_version = await self._fetch_schema_version(db)
+            self.ddl_hashes = await self._fetch_ddl_hashes(db)
+            column_rows = await self._fetch_all_columns(db)
+            fk_rows = await self._fetch_all_foreign_keys(db)
+
+        result = self._build_tables(column_rows, fk_rows)
 
         logger.info("DatabaseConnector: introspected %d tables", len(result))
         return result
-        
-    async def _fetch_tables(self, db) -> list[str]:
+
+    async def refresh(
+            self,
+            tables: list[TableMetaData],
+            ddl_hashes: dict[str, str],
+            schema_version: int | None = None
+    ) -> list[TableMetaData]:
+        """
+        Patch a previously introspected schema.
+        Only tables whose DDL hash changed (or that are new) are re-introspected,
+        dropped tables are removed. Unchanged schema_version -> nothing to do.
+        """
+        async with self.pool.acquire() as db:
+            version = await self._fetch_schema_version(db)
+
+            if schema_version is not None and version == schema_version and ddl_hashes:
+                self.schema_version, self.ddl_hashes = version, dict(ddl_hashes)
+                logger.info("DatabaseConnector: schema_version %d unchanged, nothing to refresh", version)
+                return tables
+
+            hashes = await self._fetch_ddl_hashes(db)
+
+            changed = [name for name, h in hashes.items() if ddl_hashes.get(name) != h]
+            removed = set(ddl_hashes) - set(hashes)
+
+            if len(changed) > len(hashes) // 2:
+                logger.info("DatabaseConnector: %d/%d tables changed, falling back to full introspection", len(changed), len(hashes))
+                column_rows = await self._fetch_all_columns(db)
+                fk_rows = await self._fetch_all_foreign_keys(db)
+                self.schema_version, self.ddl_hashes = version, hashes
+                return self._build_tables(column_rows, fk_rows)
+
+            column_rows = await self._fetch_all_columns(db, changed) if changed else []
+            fk_rows = await self._fetch_all_foreign_keys(db, changed) if changed else []
+
+        self.schema_version, self.ddl_hashes = version, hashes
+
+        if not changed and not removed:
+            return tables
+
+        patched = {t.table_name: t for t in tables if t.table_name not in removed}
+        for table in self._build_tables(column_rows, fk_rows):
+            patched[table.table_name] = table
+
+        logger.info(
+            "DatabaseConnector: refreshed schema_version=%d (changed=%d, removed=%d)",
+            version, len(changed), len(removed)
+        )
+        return [patched[name] for name in sorted(patched)]
+
+    async def _fetch_schema_version(self, db) -> int:
+        async with db.execute("PRAGMA schema_version") as cursor:
+            (version,) = await cursor.fetchone()
+        return version
+
+    async def _fetch_ddl_hashes(self, db) -> dict[str, str]:
+        """
+        {table or view: hash of its CREATE statement + its indexes' CREATE statements},
+        so a new index or view changes the schema version as well
+        """
         query = """
-            SELECT name FROM sqlite_master
-            WHERE type = 'table'
+            SELECT type, name, tbl_name, sql FROM sqlite_master
+            WHERE type IN ('table', 'view', 'index')
+                AND sql IS NOT NULL
                 AND name NOT LIKE 'sqlite_%'
-            ORDER BY name
+            ORDER BY type = 'index', name
         """
-
         async with db.execute(query) as cursor:
+            cursor.row_factory = None
             rows = await cursor.fetchall()
-            return [row["name"] for row in rows]
-        
-    async def _fetch_columns(self, db, table_name: str) -> list[dict]:
-        async with db.execute(f"PRAGMA table_info('{table_name}')") as cursor:
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
-        
-    async def _fetch_primary_keys(self, db, table_name: str) -> set[str]:
-        async with db.execute(f"PRAGMA table_info('{table_name}')") as cursor:
-            rows = await cursor.fetchall()
-            return {row["name"] for row in rows if row["pk"]}
-        
-    async def _fetch_foreign_keys(self, db, table_name: str) -> dict[str, tuple[str, str]]:
-        async with db.execute(f"PRAGMA foreign_key_list('{table_name}')") as cursor:
-            rows = await cursor.fetchall()
-            return {
-                row["from"]: (row["table"], row["to"]) for row in rows
-            }
- 
\ No newline at end of file
+
+        statements: dict[str, list[str]] = {}
+        for kind, name, table, sql in rows:
+            statements.setdefault(table if kind == 'index' else name, []).append(sql)
+
+        return {
+            name: hashlib.sha256("\n".join(sqls).encode()).hexdigest()[:16] for name, sqls in statements.items()
+        }
+
+    def _build_tables(self, column_rows: list[tuple], fk_rows: list[tuple]) -> list[TableMetaData]:
+        # (table, from_col) -> (ref_table, ref_col); column rows arrive ordered by table
+        fk_map: dict[tuple[str, str], tuple[str, str]] = {
+            (table_name, from_col): (ref_table, ref_col)
+            for table_name, from_col, ref_table, ref_col in fk_rows
+        }
+
+        db_name = os.path.splitext(os.path.basename(self.db_path))[0]
+        result: list[TableMetaData] = []
+        current: str | None = None
+        build_cols: list[ColumnMetaData] = []
+
+        for table_name, col_name, col_type, notnull, pk in column_rows:
+            if table_name != current:
+                if current is not None:
+                    result.append(self._table(current, db_name, build_cols))
+                current, build_cols = table_name, []
+
+            fk_target = fk_map.get((table_name, col_name))
+            build_cols.append(
+                ColumnMetaData(
+                    column_name=col_name,
+                    data_type = col_type or "TEXT",
+                    nullable = not notnull,
+                    is_primary_key=bool(pk),
+                    is_foreign_key=fk_target is not None,
+                    reference_table = fk_target[0] if fk_target else None,
+                    reference_column=fk_target[1] if fk_target else None
+                )
+            )
+
+        if current is not None:
+            result.append(self._table(current, db_name, build_cols))
+
+        return result
+
+    @staticmethod
+    def _table(table_name: str, db_name: str, columns: list[ColumnMetaData]) -> TableMetaData:
+        return TableMetaData(table_name=table_name, schema_name=db_name, columns=columns)
+
+    @staticmethod
+    def _name_filter(names: list[str] | None) -> tuple[str, tuple]:
+        """
+        One JSON array parameter instead of one '?' per name: a refresh of many tables
+        would otherwise exceed SQLITE_MAX_VARIABLE_NUMBER (999 before SQLite 3.32).
+        """
+        if names is None:
+            return "", ()
+        return "AND m.name IN (SELECT value FROM json_each(?))", (json.dumps(names),)
+
+    async def _fetch_all_columns(self, db, names: list[str] | None = None) -> list[tuple]:
+        name_filter, params = self._name_filter(names)
+        query = f"""
+            SELECT m.name AS table_name, p.name, p.type, p."notnull", p.pk
+            FROM sqlite_master AS m
+            JOIN pragma_table_info(m.name) AS p
+            WHERE m.type = 'table'
+                AND m.name NOT LIKE 'sqlite_%'
+                {name_filter}
+            ORDER BY m.name, p.cid
+        """
+
+        async with db.execute(query, params) as cursor:
+            cursor.row_factory = None
+            return await cursor.fetchall()
+
+    async def _fetch_all_foreign_keys(self, db, names: list[str] | None = None) -> list[tuple]:
+        name_filter, params = self._name_filter(names)
+        query = f"""
+            SELECT m.name AS table_name, f."from" AS from_col,
+                   f."table" AS ref_table, f."to" AS ref_col
+            FROM sqlite_master AS m
+            JOIN pragma_foreign_key_list(m.name) AS f
+            WHERE m.type = 'table'
+                AND m.name NOT LIKE 'sqlite_%'
+                {name_filter}
+            ORDER BY m.name, f.id, f.seq
+        """
+
+        async with db.execute(query, params) as cursor:
+            cursor.row_factory = None
+            return await cursor.fetchall()
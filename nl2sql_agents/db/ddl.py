@@ -0,0 +1,113 @@
+"""
+DDL RENDERER - deterministic, compact SQLite DDL from TableMetaData
+
+- one `CREATE TABLE` fragment per table: valid SQLite (the schema can be re-created
+  from it), unqualified table names, identifiers quoted only when needed
+- column types, NOT NULL, PRIMARY KEY (inline or composite), REFERENCES
+- table comment / row count as leading `--` lines
+- fragments memoized per (table, columns) for the current schema version,
+  prompts are assembled by concatenating fragments
+"""
+
+import re
+import logging
+from typing import Iterable
+
+from nl2sql_agents.models.schemas import TableMetaData, ColumnMetaData
+
+logger = logging.getLogger(__name__)
+
+_PLAIN_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# SQLite keywords that cannot safely be used as bare identifiers
+SQLITE_KEYWORDS = frozenset("""
+ABORT ACTION ADD AFTER ALL ALTER ALWAYS ANALYZE AND AS ASC ATTACH AUTOINCREMENT BEFORE
+BEGIN BETWEEN BY CASCADE CASE CAST CHECK COLLATE COLUMN COMMIT CONFLICT CONSTRAINT
+CREATE CROSS CURRENT CURRENT_DATE CURRENT_TIME CURRENT_TIMESTAMP DATABASE DEFAULT
+DEFERRABLE DEFERRED DELETE DESC DETACH DISTINCT DO DROP EACH ELSE END ESCAPE EXCEPT
+EXCLUDE EXCLUSIVE EXISTS EXPLAIN FAIL FILTER FIRST FOLLOWING FOR FOREIGN FROM FULL
+GENERATED GLOB GROUP GROUPS HAVING IF IGNORE IMMEDIATE IN INDEX INDEXED INITIALLY INNER
+INSERT INSTEAD INTERSECT INTO IS ISNULL JOIN KEY LAST LEFT LIKE LIMIT MATCH MATERIALIZED
+NATURAL NO NOT NOTHING NOTNULL NULL NULLS OF OFFSET ON OR ORDER OTHERS OUTER OVER
+PARTITION PLAN PRAGMA PRECEDING PRIMARY QUERY RAISE RANGE RECURSIVE REFERENCES REGEXP
+REINDEX RELEASE RENAME REPLACE RESTRICT RETURNING RIGHT ROLLBACK ROW ROWS SAVEPOINT
+SELECT SET TABLE TEMP TEMPORARY THEN TIES TO TRANSACTION TRIGGER UNBOUNDED UNION UNIQUE
+UPDATE USING VACUUM VALUES VIEW VIRTUAL WHEN WHERE WINDOW WITH WITHOUT
+""".split())
+
+def quote_identifier(name: str) -> str:
+    if _PLAIN_IDENTIFIER.match(name) and name.upper() not in SQLITE_KEYWORDS:
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+def _one_line(text: str) -> str:
+    return " ".join(text.split())
+
+def render_column(col: ColumnMetaData, inline_pk: bool = True) -> str:
+    """One column definition; `inline_pk` = the table has a single-column primary key"""
+    parts = [quote_identifier(col.column_name)]
+    if col.data_type:
+        parts.append(col.data_type)
+    if col.is_primary_key and inline_pk:
+        parts.append("PRIMARY KEY")
+    if not col.nullable and not (col.is_primary_key and inline_pk):
+        parts.append("NOT NULL")
+    if col.is_foreign_key and col.reference_table:
+        ref = f"REFERENCES {quote_identifier(col.reference_table)}"
+        if col.reference_column:
+            ref += f"({quote_identifier(col.reference_column)})"
+        parts.append(ref)
+    return " ".join(parts)
+
+def render_table(table: TableMetaData, columns: Iterable[ColumnMetaData] | None = None) -> str:
+    """CREATE TABLE statement for `table` (only `columns` when given, in their order)"""
+    cols = list(table.columns if columns is None else columns)
+    pk_cols = [c for c in cols if c.is_primary_key]
+    inline_pk = len(pk_cols) == 1
+
+    lines: list[str] = []
+    if table.comments:
+        lines.append(f"-- {_one_line(table.comments)}")
+    if table.rows_count is not None:
+        lines.append(f"-- rows: {table.rows_count}")
+
+    defs = [render_column(col, inline_pk) for col in cols]
+    if len(pk_cols) > 1:
+        defs.append(f"PRIMARY KEY ({', '.join(quote_identifier(c.column_name) for c in pk_cols)})")
+
+    body = ",\n  ".join(defs)
+    lines.append(f"CREATE TABLE {quote_identifier(table.table_name)} (\n  {body}\n);")
+    return "\n".join(lines)
+
+class DDLRenderer:
+    """Memoizes one fragment per (table, column set) for the current schema version"""
+
+    def __init__(self) -> None:
+        self._version: str | None = None
+        self._fragments: dict[tuple[str, tuple[str, ...]], str] = {}
+        self.stats = {"hits": 0, "misses": 0}
+
+    def fragment(
+            self,
+            table: TableMetaData,
+            columns: list[ColumnMetaData] | None = None,
+            schema_version: str | None = None
+    ) -> str:
+        if schema_version is None:
+            return render_table(table, columns)
+
+        if schema_version != self._version:
+            self._version = schema_version
+            self._fragments = {}
+
+        key = (table.table_name, tuple(c.column_name for c in (table.columns if columns is None else columns)))
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            fragment = self._fragments[key] = render_table(table, columns)
+            self.stats["misses"] += 1
+        else:
+            self.stats["hits"] += 1
+        return fragment
+
+    def render(self, tables: list[TableMetaData], schema_version: str | None = None) -> str:
+        return "\n\n".join(self.fragment(t, schema_version=schema_version) for t in tables)
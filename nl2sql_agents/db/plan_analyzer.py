@@ -0,0 +1,219 @@
+"""
+PLAN ANALYZER - static performance check from SQLite's own query plan
+
+- `EXPLAIN QUERY PLAN <sql>` on the real database (read-only pool): the plan the
+  planner would run with the real indexes and sqlite_stat1; nothing is executed
+- row counts from sqlite_stat1 or max(rowid) (DatabaseConnector.table_statistics),
+  memoized per schema version and database file state (connector.file_state(), an
+  os.stat): a data write that grows a table drops the memo, the DDL stamp alone would not
+- the loops of one SELECT are nested in plan order; rows examined =
+  sum over loops of (rows produced by the outer loops x rows the loop reads)
+    SCAN t                    -> rows(t)
+    SEARCH t ... (a=?)        -> avg rows per key from sqlite_stat1, else ~10 (1 for rowid / PK)
+    SEARCH t ... (a>?)        -> rows(t) / 4
+  a CORRELATED subquery runs once per row of the loops around it; a MATERIALIZEd
+  subquery / CTE (or CO-ROUTINE) yields the rows its own loops produce, which is what
+  a later SCAN / SEARCH of it reads
+- findings:
+    SCAN inside another loop (no usable join constraint)  -> WARN
+    AUTOMATIC INDEX (join column without an index)        -> WARN
+    full SCAN of a table >= PLAN_WARN_ROWS                -> WARN
+    TEMP B-TREE (ORDER/GROUP BY, DISTINCT) >= PLAN_WARN_ROWS -> WARN
+    estimated rows examined >= PLAN_FAIL_ROWS             -> FAIL
+"""
+
+import re
+import logging
+import sqlparse
+from sqlparse.sql import Identifier, IdentifierList, TokenList
+from sqlparse import tokens as T
+from dataclasses import dataclass, field
+from typing import Optional
+
+from nl2sql_agents.db.connector import DatabaseConnector
+from nl2sql_agents.models.schemas import DBFingerprint
+from nl2sql_agents.config.settings import PLAN_WARN_ROWS, PLAN_FAIL_ROWS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_ROWS = 10   # SQLite's own guess for an equality lookup without stats
+RANGE_FRACTION = 4         # ... and for a range constraint: a quarter of the table
+
+_STEP = re.compile(r"^(SCAN|SEARCH) (?:TABLE )?(\S+)(?: AS \S+)?(?: USING (.+))?$")
+_TEMP_BTREE = re.compile(r"^USE TEMP B-TREE FOR (.+)$")
+_INDEX_NAME = re.compile(r"INDEX (\S+)")
+_CONSTRAINT = re.compile(r"\(([^()]*)\)\s*$")
+_CORRELATED = re.compile(r"^CORRELATED (?:SCALAR|LIST) SUBQUERY")
+_SUBQUERY = re.compile(r"^(?:MATERIALIZE|CO-ROUTINE) (\S+)$")
+
+@dataclass
+class PlanAnalysis:
+    verdict: str                   # "PASS" | "WARN" | "FAIL"
+    rows_examined: int
+    findings: list[str] = field(default_factory=list)
+    plan: list[str] = field(default_factory=list)
+
+    @property
+    def evidence(self) -> str:
+        parts = self.findings or [f"plan: {'; '.join(self.plan)}"]
+        return f"{'; '.join(parts)} (est. ~{self.rows_examined:,} rows examined)"
+
+def table_aliases(sql: str) -> dict[str, str]:
+    """{alias or name (lower case): table} for every table in FROM / JOIN clauses;
+    the plan names a table by its alias when it has one"""
+    aliases: dict[str, str] = {}
+
+    def add(identifier: Identifier) -> None:
+        name = identifier.get_real_name()
+        if name and not any(isinstance(t, TokenList) and t.is_group and t.value.startswith("(") for t in identifier.tokens):
+            aliases[(identifier.get_alias() or name).lower()] = name
+
+    def walk(tokens: TokenList) -> None:
+        expecting = False
+        for token in tokens.tokens:
+            if token.is_whitespace:
+                continue
+            if token.ttype is T.Keyword and (token.normalized == "FROM" or token.normalized.endswith("JOIN")):
+                expecting = True
+                continue
+            if expecting and isinstance(token, Identifier):
+                add(token)
+            elif expecting and isinstance(token, IdentifierList):
+                for item in token.get_identifiers():
+                    if isinstance(item, Identifier):
+                        add(item)
+            expecting = False
+            if token.is_group:
+                walk(token)
+
+    for statement in sqlparse.parse(sql):
+        walk(statement)
+    return aliases
+
+def _fmt(rows: Optional[int]) -> str:
+    return f"~{rows:,} rows" if rows is not None else "unknown size"
+
+class PlanAnalyzer:
+    def __init__(
+            self,
+            connector: DatabaseConnector,
+            warn_rows: int = PLAN_WARN_ROWS,
+            fail_rows: int = PLAN_FAIL_ROWS
+    ) -> None:
+        self.connector = connector
+        self.warn_rows = warn_rows
+        self.fail_rows = fail_rows
+
+        self._version: Optional[str] = None
+        self._file_state: Optional[DBFingerprint] = None
+        self._rows: dict[str, Optional[int]] = {}
+        self._index_stats: Optional[dict[str, list[int]]] = None
+
+        self.stats = {"analyses": 0, "pass": 0, "warn": 0, "fail": 0}
+
+    async def _statistics(self, names: list[str], schema_version: Optional[str]) -> dict[str, Optional[int]]:
+        file_state = self.connector.file_state()
+        if (
+            schema_version is None
+            or schema_version != self._version
+            or self._file_state is None
+            or not file_state.same_file_state(self._file_state)
+        ):
+            self._version, self._rows, self._index_stats = schema_version, {}, None
+            self._file_state = file_state
+
+        missing = [n for n in dict.fromkeys(names) if n not in self._rows]
+        if missing or self._index_stats is None:
+            rows, self._index_stats = await self.connector.table_statistics(missing)
+            self._rows.update(rows)
+        return self._rows
+
+    def _search_rows(self, using: str, table_rows: Optional[int]) -> Optional[int]:
+        m = _CONSTRAINT.search(using)
+        constraint = m.group(1) if m else ""
+        equalities = len(re.findall(r"(?<![<>!])=", constraint))
+
+        if "rowid=" in constraint or ("PRIMARY KEY" in using and equalities and "<" not in constraint and ">" not in constraint):
+            return 1
+        if not equalities:
+            return table_rows // RANGE_FRACTION if table_rows is not None else None
+
+        name = _INDEX_NAME.search(using.replace("AUTOMATIC ", ""))
+        numbers = (self._index_stats or {}).get(name.group(1)) if name else None
+        if numbers and len(numbers) > equalities:
+            return numbers[equalities]
+        return DEFAULT_SEARCH_ROWS
+
+    async def analyze(self, sql: str, schema_version: Optional[str] = None) -> PlanAnalysis:
+        rows = await self.connector.fetch_all(f"EXPLAIN QUERY PLAN {sql.strip().rstrip(';')}")
+        steps = sorted((r["id"], r["parent"], r["detail"]) for r in rows)
+
+        aliases = table_aliases(sql)
+        tables = [aliases.get(m.group(2).lower(), m.group(2)) for _, _, detail in steps if (m := _STEP.match(detail))]
+        sizes = await self._statistics(tables, schema_version)
+
+        findings: list[str] = []
+        examined = 0
+        outer: dict[int, int] = {}     # parent -> rows produced by the loops so far at that level
+        subqueries: dict[str, int] = {}  # materialized subquery / CTE name -> its step id
+
+        for step_id, parent, detail in steps:
+            step = _STEP.match(detail)
+            if step is not None:
+                op, alias, using = step.group(1), step.group(2), step.group(3) or ""
+                name = aliases.get(alias.lower(), alias)
+                table = name if name == alias else f"{name} AS {alias}"
+                table_rows = sizes.get(name)
+                if table_rows is None and name in subqueries:
+                    table_rows = outer.get(subqueries[name])
+                loops = outer.get(parent, 1)
+                nested = parent in outer
+
+                if op == "SCAN":
+                    reads = table_rows
+                    if nested:
+                        findings.append(
+                            f"no usable join constraint on {table}: full scan ({_fmt(table_rows)}) "
+                            f"for each of ~{loops:,} outer rows"
+                        )
+                    elif table_rows is not None and table_rows >= self.warn_rows:
+                        findings.append(f"full scan of {table} ({_fmt(table_rows)})")
+                else:
+                    reads = self._search_rows(using, table_rows)
+                    if "AUTOMATIC" in using:
+                        findings.append(f"no index for the join on {table}: SQLite builds an automatic index per query")
+
+                examined += loops * (reads or 0)
+                outer[parent] = loops * max(reads or 1, 1)
+                continue
+
+            if _CORRELATED.match(detail):
+                # its loops run once per row produced so far by the enclosing level
+                outer[step_id] = outer.get(parent, 1)
+                continue
+
+            subquery = _SUBQUERY.match(detail)
+            if subquery is not None:
+                subqueries[subquery.group(1)] = step_id
+                continue
+
+            temp = _TEMP_BTREE.match(detail)
+            if temp is not None:
+                sorted_rows = outer.get(parent, 0)
+                if sorted_rows >= self.warn_rows:
+                    findings.append(f"temp b-tree for {temp.group(1)} over ~{sorted_rows:,} rows")
+
+        if examined >= self.fail_rows:
+            verdict = "FAIL"
+            findings.insert(0, f"over the {self.fail_rows:,}-row budget")
+        else:
+            verdict = "WARN" if findings else "PASS"
+
+        self.stats["analyses"] += 1
+        self.stats[verdict.lower()] += 1
+        return PlanAnalysis(
+            verdict=verdict,
+            rows_examined=examined,
+            findings=findings,
+            plan=[detail for _, _, detail in steps]
+        )
@@ -0,0 +1,201 @@
+"""
+CONNECTION POOL
+
+Bounded async pool of long-lived, read-only aiosqlite connections.
+- all connections are opened up-front on first use (warm pool)
+- every connection gets the same PRAGMA setup
+- idle connections are health-checked on checkout and replaced if broken
+- records checkout / wait-time metrics so the pool can be sized
+"""
+
+import os
+import time
+import asyncio
+import logging
+import aiosqlite
+from urllib.parse import quote
+from dataclasses import dataclass
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from nl2sql_agents.config.settings import (
+    DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_HEALTHCHECK_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+READ_ONLY_PRAGMAS: tuple[str, ...] = (
+    "PRAGMA query_only = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",   # ~16MB page cache per connection
+    "PRAGMA mmap_size = 268435456", # 256MB memory-mapped reads
+)
+
+@dataclass
+class PoolStats:
+    size: int
+    checkouts: int = 0
+    waited: int = 0           # checkouts that found no idle connection
+    total_wait_s: float = 0.0
+    max_wait_s: float = 0.0
+    replaced: int = 0         # connections dropped by the health check
+    in_use: int = 0
+
+    @property
+    def avg_wait_ms(self) -> float:
+        return (self.total_wait_s / self.checkouts) * 1000 if self.checkouts else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "size": self.size,
+            "in_use": self.in_use,
+            "checkouts": self.checkouts,
+            "waited": self.waited,
+            "avg_wait_ms": round(self.avg_wait_ms, 3),
+            "max_wait_ms": round(self.max_wait_s * 1000, 3),
+            "replaced": self.replaced,
+        }
+
+class _PooledConnection:
+    __slots__ = ("conn", "last_checked")
+
+    def __init__(self, conn: aiosqlite.Connection) -> None:
+        self.conn = conn
+        self.last_checked = time.monotonic()
+
+class ConnectionPool:
+    """Fixed-size pool of read-only SQLite connections for one database file."""
+
+    def __init__(
+            self,
+            db_path: str,
+            size: int = DB_POOL_SIZE,
+            timeout: float = DB_POOL_TIMEOUT,
+            pragmas: tuple[str, ...] = READ_ONLY_PRAGMAS,
+    ) -> None:
+        if size < 1:
+            raise ValueError(f"Pool size must be >= 1, got {size}")
+
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self.stats = PoolStats(size=size)
+
+        self._idle: asyncio.Queue[_PooledConnection] | None = None
+        self._all: list[_PooledConnection] = []
+        self._open_lock = asyncio.Lock()
+        self._closed = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._idle is not None and not self._closed
+
+    async def _connect(self) -> _PooledConnection:
+        uri = f"file:{quote(os.path.abspath(self.db_path))}?mode=ro"
+        conn = await aiosqlite.connect(uri, uri=True)
+        conn.row_factory = aiosqlite.Row
+
+        for pragma in self.pragmas:
+            await conn.execute(pragma)
+
+        return _PooledConnection(conn)
+
+    async def open(self) -> None:
+        """Open (warm) every connection. Safe to call more than once."""
+        if self._closed:
+            raise RuntimeError("ConnectionPool is closed")
+        if self._idle is not None:
+            return
+
+        async with self._open_lock:
+            if self._idle is not None:
+                return
+
+            conns = await asyncio.gather(*[self._connect() for _ in range(self.size)])
+            idle: asyncio.Queue[_PooledConnection] = asyncio.Queue()
+            for pc in conns:
+                idle.put_nowait(pc)
+
+            self._all = list(conns)
+            self._idle = idle
+
+        logger.info("ConnectionPool: opened %d read-only connections to %s", self.size, self.db_path)
+
+    async def _healthy(self, pc: _PooledConnection) -> bool:
+        try:
+            async with pc.conn.execute("SELECT 1") as cursor:
+                await cursor.fetchone()
+            pc.last_checked = time.monotonic()
+            return True
+        except Exception as e:
+            logger.warning("ConnectionPool: health check failed (%s), replacing connection", e)
+            return False
+
+    async def _replace(self, pc: _PooledConnection) -> _PooledConnection:
+        try:
+            await pc.conn.close()
+        except Exception:
+            pass
+
+        fresh = await self._connect()
+        self._all[self._all.index(pc)] = fresh
+        self.stats.replaced += 1
+        return fresh
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Check out a connection; it is returned to the pool on exit."""
+        await self.open()
+        assert self._idle is not None
+
+        start = time.perf_counter()
+        if self._idle.empty():
+            self.stats.waited += 1
+
+        try:
+            pc = await asyncio.wait_for(self._idle.get(), timeout=self.timeout)
+        except TimeoutError:
+            raise TimeoutError(
+                f"ConnectionPool: no connection available after {self.timeout:.1f}s "
+                f"(size={self.size}, in_use={self.stats.in_use})"
+            ) from None
+
+        waited = time.perf_counter() - start
+        self.stats.checkouts += 1
+        self.stats.total_wait_s += waited
+        self.stats.max_wait_s = max(self.stats.max_wait_s, waited)
+        self.stats.in_use += 1
+
+        try:
+            if time.monotonic() - pc.last_checked > DB_POOL_HEALTHCHECK_SECONDS:
+                if not await self._healthy(pc):
+                    pc = await self._replace(pc)
+
+            try:
+                yield pc.conn
+            except Exception:
+                # force a health check before the next checkout
+                pc.last_checked = 0.0
+                raise
+        finally:
+            self.stats.in_use -= 1
+            if self._closed:
+                await pc.conn.close()
+            else:
+                self._idle.put_nowait(pc)
+
+    async def close(self) -> None:
+        """Close idle connections now; checked-out ones close when released."""
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._idle is None:
+            return
+
+        while not self._idle.empty():
+            pc = self._idle.get_nowait()
+            await pc.conn.close()
+
+        logger.info("ConnectionPool: closed %s (%s)", self.db_path, self.stats.as_dict())
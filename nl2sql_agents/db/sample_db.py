@@ -0,0 +1,350 @@
+"""
+SAMPLE DATABASE - small, FK-consistent copy of the database to execute candidates on
+
+- schema replayed from the database's own sqlite_master DDL (db/schema_clone.py)
+- rows: the source is ATTACHed read-only and the tables are filled parents first
+  (foreign key order), at most SAMPLE_DB_ROWS rows each, preferring child rows that
+  reference the sampled parents so joins return rows; then every parent row a
+  sampled child references is copied as well (repeated up the FK chain), so no
+  foreign key dangles
+- the sample holds REAL rows of the source database: with SAMPLE_DB_PERSIST (default)
+  it is a plaintext file in SAMPLE_DB_DIR, one per database (the previous schema
+  version's file is removed when a new one is built), rebuilt after CACHE_TTL_HOURS;
+  SAMPLE_DB_PERSIST=false keeps it in memory only (rebuilt per process), for databases
+  whose rows must not be copied to disk (EXECUTION_VALIDATOR_ENABLED=false: no sample)
+- execute(sql): a fresh read-only connection per query, stopped by SQLite's progress
+  handler after EXECUTION_TIMEOUT_MS or EXECUTION_MAX_STEPS VM steps; the first
+  EXECUTION_MAX_ROWS rows are hashed order-insensitively (same rows -> same digest,
+  whatever the column names or row order)
+"""
+
+import os
+import glob
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+from dataclasses import dataclass
+from typing import Optional, Union
+from urllib.request import pathname2url
+
+from nl2sql_agents.db.ddl import quote_identifier
+from nl2sql_agents.db.connector import DatabaseConnector
+from nl2sql_agents.db.schema_clone import DDL_QUERY, replay_ddl
+from nl2sql_agents.config.settings import (
+    SAMPLE_DB_DIR, SAMPLE_DB_ROWS, SAMPLE_DB_PERSIST, CACHE_TTL_HOURS,
+    EXECUTION_TIMEOUT_MS, EXECUTION_MAX_STEPS, EXECUTION_MAX_ROWS
+)
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_STEPS = 1000   # VM instructions between progress handler calls
+
+@dataclass
+class ExecutionResult:
+    status: str                    # "ok" | "empty" | "error" | "timeout"
+    rows: int = 0
+    digest: Optional[str] = None   # result-set hash ("ok" / "empty")
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+    truncated: bool = False        # more than EXECUTION_MAX_ROWS rows
+
+def _normalize(value):
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else round(value, 6)
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+def result_digest(rows: list[tuple]) -> str:
+    """order-insensitive hash of a result set"""
+    normalized = sorted(json.dumps([_normalize(v) for v in row], default=str) for row in rows)
+    return hashlib.sha1("\n".join(normalized).encode()).hexdigest()
+
+def _uri(path: str, mode: str = "ro") -> str:
+    return f"file:{pathname2url(os.path.abspath(path))}?mode={mode}"
+
+class SampleDatabase:
+    def __init__(
+            self,
+            connector: DatabaseConnector,
+            rows_per_table: int = SAMPLE_DB_ROWS,
+            timeout_ms: int = EXECUTION_TIMEOUT_MS,
+            max_steps: int = EXECUTION_MAX_STEPS,
+            max_rows: int = EXECUTION_MAX_ROWS,
+            directory: str = SAMPLE_DB_DIR,
+            persist: bool = SAMPLE_DB_PERSIST
+    ) -> None:
+        self.connector = connector
+        self.rows_per_table = rows_per_table
+        self.timeout_ms = timeout_ms
+        self.max_steps = max_steps
+        self.max_rows = max_rows
+        self.directory = directory
+        self.persist = persist
+
+        self._built: set[str] = set()
+        self._images: dict[str, bytes] = {}   # path -> serialized sample (persist=False)
+        self._build_lock = asyncio.Lock()
+
+        self.stats = {"builds": 0, "removed": 0, "executions": 0, "errors": 0, "timeouts": 0, "empty": 0}
+
+    # --- build --- #
+
+    def _prefix(self) -> str:
+        return hashlib.sha1(os.path.abspath(self.connector.db_path).encode()).hexdigest()[:12]
+
+    def _path(self, schema_version: Optional[str]) -> str:
+        key = hashlib.sha1(f"{schema_version}|{self.rows_per_table}".encode()).hexdigest()[:12]
+        return os.path.join(self.directory, f"{self._prefix()}-{key}.sqlite")
+
+    def _fresh(self, path: str, schema_version: Optional[str]) -> bool:
+        if path in self._built:
+            return True
+        if schema_version is None or not self.persist:   # build once per process
+            return False
+        try:
+            return time.time() - os.path.getmtime(path) < CACHE_TTL_HOURS * 3600
+        except OSError:
+            return False
+
+    @staticmethod
+    def _columns(db: sqlite3.Connection, table: str) -> list[str]:
+        """insertable columns (no generated / hidden ones)"""
+        return [
+            row[1] for row in db.execute(f"PRAGMA main.table_xinfo({quote_identifier(table)})") if row[6] == 0
+        ]
+
+    @staticmethod
+    def _foreign_keys(db: sqlite3.Connection, table: str) -> list[tuple[str, list[tuple[str, str]]]]:
+        """[(parent, [(child column, parent column), ...]), ...]"""
+        grouped: dict[int, tuple[str, list[tuple[str, Optional[str]]]]] = {}
+        for fk_id, _, parent, column, target, *_ in db.execute(
+                f"PRAGMA main.foreign_key_list({quote_identifier(table)})"):
+            grouped.setdefault(fk_id, (parent, []))[1].append((column, target))
+
+        fks = []
+        for parent, pairs in grouped.values():
+            if any(target is None for _, target in pairs):   # REFERENCES parent -> its primary key
+                pk = [r[1] for r in sorted(db.execute(f"PRAGMA main.table_info({quote_identifier(parent)})"),
+                                           key=lambda r: r[5]) if r[5]]
+                if len(pk) != len(pairs):
+                    continue
+                pairs = [(column, pk[i]) for i, (column, _) in enumerate(pairs)]
+            fks.append((parent, pairs))
+        return fks
+
+    @staticmethod
+    def _parents_first(tables: list[str], fks: dict[str, list]) -> list[str]:
+        order: list[str] = []
+        visiting: set[str] = set()
+
+        def visit(table: str) -> None:
+            if table in order or table in visiting:   # cycles are cut anywhere
+                return
+            visiting.add(table)
+            for parent, _ in fks.get(table, []):
+                if parent in fks:
+                    visit(parent)
+            visiting.discard(table)
+            order.append(table)
+
+        for table in tables:
+            visit(table)
+        return order
+
+    def _sample(self, db: sqlite3.Connection, table: str, fks: list, sampled: set[str]) -> None:
+        qt = quote_identifier(table)
+        cols = ", ".join(quote_identifier(c) for c in self._columns(db, table))
+
+        # child rows that join to the parents already sampled, topped up with any rows
+        condition = next((
+            " AND ".join(
+                f"{quote_identifier(c)} IN (SELECT {quote_identifier(p)} FROM main.{quote_identifier(parent)})"
+                for c, p in pairs
+            )
+            for parent, pairs in fks if parent != table and parent in sampled
+        ), None)
+
+        n = self.rows_per_table
+        if condition is not None:
+            n -= db.execute(
+                f"INSERT INTO main.{qt} ({cols}) SELECT {cols} FROM src.{qt} WHERE {condition} LIMIT ?", (n,)
+            ).rowcount
+            where = f"WHERE ({condition}) IS NOT 1"
+        else:
+            where = ""
+        if n > 0:
+            db.execute(f"INSERT INTO main.{qt} ({cols}) SELECT {cols} FROM src.{qt} {where} LIMIT ?", (n,))
+        sampled.add(table)
+
+    def _close_references(self, db: sqlite3.Connection, tables: list[str], fks: dict[str, list]) -> int:
+        """copy the parent rows sampled children reference, up the FK chain"""
+        added = 0
+        for _ in range(len(tables) + 1):
+            changed = 0
+            for child in tables:
+                for parent, pairs in fks[child]:
+                    if parent not in fks:
+                        continue
+                    qp = quote_identifier(parent)
+                    columns = self._columns(db, parent)
+                    names = ", ".join(quote_identifier(c) for c in columns)
+                    cols = ", ".join(f"p.{quote_identifier(c)}" for c in columns)
+                    join = " AND ".join(f"p.{quote_identifier(p)} = c.{quote_identifier(c)}" for c, p in pairs)
+                    present = " AND ".join(f"q.{quote_identifier(p)} = p.{quote_identifier(p)}" for _, p in pairs)
+                    changed += db.execute(
+                        f"INSERT INTO main.{qp} ({names}) SELECT DISTINCT {cols} FROM main.{quote_identifier(child)} c "
+                        f"JOIN src.{qp} p ON {join} WHERE NOT EXISTS (SELECT 1 FROM main.{qp} q WHERE {present})"
+                    ).rowcount
+            added += changed
+            if not changed:
+                break
+        return added
+
+    def _fill(self, db: sqlite3.Connection, ddl: list[dict]) -> tuple[int, int]:
+        """(tables, referenced rows added) - replays the schema and samples the source into `db`"""
+        replayed = replay_ddl(db, ddl)
+        db.execute("ATTACH DATABASE ? AS src", (_uri(self.connector.db_path),))
+
+        # tables created by their own statement (not virtual-table shadow tables)
+        tables = [
+            name for (name,) in db.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")
+            if name in replayed
+        ]
+        fks = {t: self._foreign_keys(db, t) for t in tables}
+
+        sampled: set[str] = set()
+        for table in self._parents_first(tables, fks):
+            try:
+                self._sample(db, table, fks[table], sampled)
+            except sqlite3.Error as e:
+                logger.warning("SampleDatabase: table %s left empty (%s)", table, e)
+                fks[table] = []
+        added = self._close_references(db, tables, fks)
+
+        db.commit()
+        db.execute("DETACH DATABASE src")
+        return len(tables), added
+
+    def _remove_stale(self, path: str) -> None:
+        """earlier samples of the same database (other schema versions / sizes)"""
+        for stale in glob.glob(os.path.join(self.directory, f"{self._prefix()}-*.sqlite")):
+            if stale == path:
+                continue
+            try:
+                os.remove(stale)
+                self.stats["removed"] += 1
+            except OSError as e:
+                logger.debug("SampleDatabase: cannot remove %s (%s)", stale, e)
+
+    def _build(self, path: str, ddl: list[dict]) -> Optional[bytes]:
+        """writes the sample to `path`, or returns it serialized when not persisted"""
+        if not self.persist:
+            db = sqlite3.connect("file::memory:", uri=True)
+            try:
+                tables, added = self._fill(db, ddl)
+                image = db.serialize()
+            finally:
+                db.close()
+            logger.info(
+                "SampleDatabase: %d tables x <= %d rows (+%d referenced rows) in memory",
+                tables, self.rows_per_table, added
+            )
+            return image
+
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+        db = sqlite3.connect(_uri(tmp, "rwc"), uri=True)
+        try:
+            tables, added = self._fill(db, ddl)
+            logger.info(
+                "SampleDatabase: %d tables x <= %d rows (+%d referenced rows) -> %s",
+                tables, self.rows_per_table, added, path
+            )
+        finally:
+            db.close()
+        os.replace(tmp, path)
+        self._remove_stale(path)
+        return None
+
+    async def _ensure(self, schema_version: Optional[str]) -> Union[str, bytes]:
+        """the sample's path, or its serialized image when not persisted"""
+        path = self._path(schema_version)
+        if self._fresh(path, schema_version):
+            return self._images.get(path, path)
+
+        async with self._build_lock:
+            if self._fresh(path, schema_version):
+                return self._images.get(path, path)
+            ddl = await self.connector.fetch_all(DDL_QUERY)
+            image = await asyncio.to_thread(self._build, path, ddl)
+            if image is not None:
+                self._images = {path: image}   # only the current schema version
+                self._built = {path}
+            else:
+                self._built.add(path)
+            self.stats["builds"] += 1
+        return self._images.get(path, path)
+
+    # --- execute --- #
+
+    @staticmethod
+    def _connect(sample: Union[str, bytes]) -> sqlite3.Connection:
+        if isinstance(sample, bytes):
+            db = sqlite3.connect(":memory:")
+            db.deserialize(sample)   # a private copy, read-only like the file
+            db.execute("PRAGMA query_only = ON")
+            return db
+        return sqlite3.connect(_uri(sample), uri=True)
+
+    def _execute(self, sample: Union[str, bytes], sql: str) -> ExecutionResult:
+        db = self._connect(sample)
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.timeout_ms / 1000
+        steps = 0
+
+        def progress() -> int:
+            nonlocal steps
+            steps += PROGRESS_STEPS
+            return steps > self.max_steps or time.monotonic() > deadline
+
+        db.set_progress_handler(progress, PROGRESS_STEPS)
+        try:
+            rows = db.execute(sql.strip().rstrip(";")).fetchmany(self.max_rows + 1)
+        except sqlite3.OperationalError as e:
+            elapsed = (time.perf_counter() - start) * 1000
+            if str(e) == "interrupted":
+                limit = f"{self.max_steps:,} VM steps" if steps > self.max_steps else f"{self.timeout_ms} ms"
+                return ExecutionResult(status="timeout", error=f"stopped at the {limit} limit", elapsed_ms=elapsed)
+            return ExecutionResult(status="error", error=str(e), elapsed_ms=elapsed)
+        except (sqlite3.Error, sqlite3.Warning) as e:
+            return ExecutionResult(status="error", error=str(e), elapsed_ms=(time.perf_counter() - start) * 1000)
+        finally:
+            db.close()
+
+        truncated = len(rows) > self.max_rows
+        rows = rows[:self.max_rows]
+        return ExecutionResult(
+            status="ok" if rows else "empty",
+            rows=len(rows),
+            digest=result_digest(rows),
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+            truncated=truncated
+        )
+
+    async def execute(self, sql: str, schema_version: Optional[str] = None) -> ExecutionResult:
+        sample = await self._ensure(schema_version)
+        result = await asyncio.to_thread(self._execute, sample, sql)
+
+        self.stats["executions"] += 1
+        if result.status in ("error", "empty"):
+            self.stats["errors" if result.status == "error" else "empty"] += 1
+        elif result.status == "timeout":
+            self.stats["timeouts"] += 1
+        return result
@@ -0,0 +1,153 @@
+"""
+SCHEMA CLONE - schema-only, in-memory SQLite copy of the database
+
+- built from the database's own sqlite_master DDL (tables, indexes, views), so
+  every check sees exactly the real schema; a statement that cannot be replayed
+  (e.g. a virtual table whose module is not loaded) falls back to the DDL
+  rendered from TableMetaData (db/ddl.py)
+- one clone per schema version, rebuilt when the version changes
+- check(sql): `EXPLAIN <sql>` compiles the statement against the schema without
+  running it (no data, no I/O) -> None, or SQLite's own error message
+  ("no such column: s.nmae", "near \"FORM\": syntax error", ...) with the closest
+  known names appended for unknown tables / columns
+"""
+
+import re
+import asyncio
+import difflib
+import logging
+import sqlite3
+import threading
+from typing import Optional
+
+from nl2sql_agents.db.ddl import render_table
+from nl2sql_agents.db.connector import DatabaseConnector
+from nl2sql_agents.models.schemas import TableMetaData
+
+logger = logging.getLogger(__name__)
+
+_UNKNOWN = re.compile(r"^no such (table|column): (.+)$")
+
+# tables first, then what depends on them
+DDL_QUERY = """
+    SELECT type, name, sql FROM sqlite_master
+    WHERE sql IS NOT NULL
+        AND name NOT LIKE 'sqlite_%'
+        AND type IN ('table', 'index', 'view')
+    ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END
+"""
+
+def replay_ddl(db: sqlite3.Connection, ddl: list[dict]) -> set[str]:
+    """run DDL_QUERY rows on `db`; returns the names whose statement succeeded"""
+    replayed: set[str] = set()
+    for row in ddl:
+        try:
+            db.execute(row["sql"])
+            replayed.add(row["name"])
+        except sqlite3.Error as e:
+            logger.debug("cannot replay %s %s (%s)", row["type"], row["name"], e)
+    return replayed
+
+class SchemaClone:
+    def __init__(self, connector: DatabaseConnector) -> None:
+        self.connector = connector
+
+        self._version: Optional[str] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._names: tuple[list[str], list[str]] = ([], [])   # (tables, columns) for hints
+        self._build_lock = asyncio.Lock()
+        self._db_lock = threading.Lock()
+
+        self.stats = {"builds": 0, "checks": 0, "errors": 0, "fallback_tables": 0}
+
+    # --- build --- #
+
+    def _build(self, ddl: list[dict], tables: list[TableMetaData]) -> sqlite3.Connection:
+        db = sqlite3.connect(":memory:", check_same_thread=False)
+        replay_ddl(db, ddl)
+
+        # includes tables created implicitly, e.g. the shadow tables of a virtual table
+        created = {name for (name,) in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+        for table in tables:
+            if table.table_name in created:
+                continue
+            try:
+                db.execute(render_table(table))
+                self.stats["fallback_tables"] += 1
+            except sqlite3.Error as e:
+                logger.warning("SchemaClone: table %s left out (%s)", table.table_name, e)
+
+        db.execute("PRAGMA query_only = ON")
+        return db
+
+    async def _clone(self, tables: list[TableMetaData], schema_version: Optional[str]) -> sqlite3.Connection:
+        if self._db is not None and schema_version is not None and schema_version == self._version:
+            return self._db
+
+        async with self._build_lock:
+            if self._db is not None and schema_version is not None and schema_version == self._version:
+                return self._db
+
+            try:
+                ddl = await self.connector.fetch_all(DDL_QUERY)
+            except Exception as e:
+                logger.warning("SchemaClone: sqlite_master unavailable (%s), using rendered DDL", e)
+                ddl = []
+
+            db = await asyncio.to_thread(self._build, ddl, tables)
+            self.stats["builds"] += 1
+            logger.info("SchemaClone: built for schema version %s (%d tables)", schema_version, len(tables))
+
+            with self._db_lock:
+                old, self._db, self._version = self._db, db, schema_version
+                self._names = (
+                    [t.table_name for t in tables],
+                    sorted({c.column_name for t in tables for c in t.columns})
+                )
+            if old is not None:
+                old.close()
+            return db
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+                self._version = None
+
+    # --- check --- #
+
+    def _hint(self, message: str) -> str:
+        m = _UNKNOWN.match(message)
+        if m is None:
+            return message
+
+        kind, name = m.groups()
+        known = self._names[0] if kind == "table" else self._names[1]
+        bare = name.rsplit(".", 1)[-1]
+        close = difflib.get_close_matches(bare, known, n=3, cutoff=0.6)
+        return f"{message} (did you mean: {', '.join(close)}?)" if close else message
+
+    def _explain(self, db: sqlite3.Connection, sql: str) -> Optional[str]:
+        with self._db_lock:
+            try:
+                db.execute(f"EXPLAIN {sql.strip().rstrip(';')}").fetchall()
+                return None
+            except (sqlite3.Error, sqlite3.Warning) as e:
+                return self._hint(str(e))
+
+    async def check(
+            self,
+            sql: str,
+            tables: list[TableMetaData],
+            schema_version: Optional[str] = None
+    ) -> Optional[str]:
+        """None if `sql` compiles against the schema, else the error message"""
+        db = await self._clone(tables, schema_version)
+        error = self._explain(db, sql)
+
+        self.stats["checks"] += 1
+        if error is not None:
+            self.stats["errors"] += 1
+        return error
@@ -0,0 +1,145 @@
+"""
+SCHEMA PACKER
+- Sits between the Gate and the Schema Formatter
+- Fits the gated tables into a token budget (SCHEMA_TOKEN_BUDGET, llm/tokens.py estimate)
+1. core columns per table: PK, FK and columns matched by the question (always kept)
+2. tables, greedily by discovery score + FK links to the tables already packed, at core size
+3. remaining columns while the budget allows: by discovery column score when available,
+   else best table first in column order
+4. reports the dropped tables / columns
+"""
+
+import logging
+from collections import defaultdict
+
+from nl2sql_agents.llm.tokens import count_tokens
+from nl2sql_agents.db.ddl import render_column, render_table
+from nl2sql_agents.config.settings import SCHEMA_TOKEN_BUDGET
+from nl2sql_agents.agents.discovery.keyword_agent import extract_keywords
+from nl2sql_agents.models.schemas import TableMetaData, ColumnMetaData, SchemaPack
+
+logger = logging.getLogger(__name__)
+
+FK_LINK_BONUS = 0.1
+SEPARATOR_TOKENS = 1  # "\n\n" between fragments, ",\n  " between columns
+
+def matched_columns(table: TableMetaData, keywords: list[str]) -> set[str]:
+    """Columns whose name contains a question keyword, or a name part the question uses"""
+    matched = set()
+    for col in table.columns:
+        name = col.column_name.lower()
+        parts = [p for p in name.replace("_", " ").split() if len(p) > 2]
+        if any(kw in name or any(p in kw for p in parts) for kw in keywords):
+            matched.add(col.column_name)
+    return matched
+
+class SchemaPacker:
+    def __init__(self, budget: int = SCHEMA_TOKEN_BUDGET) -> None:
+        self.budget = budget
+
+    def _fk_links(self, tables: list[TableMetaData]) -> dict[str, dict[str, int]]:
+        """links[a][b] = number of FK columns between a and b (either direction)"""
+        names = {t.table_name for t in tables}
+        links: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for t in tables:
+            for col in t.columns:
+                if col.is_foreign_key and col.reference_table in names and col.reference_table != t.table_name:
+                    links[t.table_name][col.reference_table] += 1
+                    links[col.reference_table][t.table_name] += 1
+        return links
+
+    def pack(
+            self,
+            tables: list[TableMetaData],
+            user_query: str,
+            scores: dict[str, float] | None = None,
+            matched: dict[str, set[str]] | None = None,
+            column_scores: dict[str, dict[str, float]] | None = None
+    ) -> SchemaPack:
+        """
+        `tables` in rank order; `scores` = discovery score per table;
+        `matched` = columns to keep per table (derived from the question when None);
+        `column_scores` = discovery score per column, orders the column fill
+        """
+        if self.budget <= 0 or not tables:
+            content = "\n\n".join(render_table(t) for t in tables)
+            return SchemaPack(tables=list(tables), token_estimate=count_tokens(content))
+
+        scores = scores or {}
+        keywords = extract_keywords(user_query)
+        links = self._fk_links(tables)
+
+        core: dict[str, list[ColumnMetaData]] = {}
+        for t in tables:
+            keep = matched.get(t.table_name, set()) if matched is not None else matched_columns(t, keywords)
+            cols = [c for c in t.columns if c.is_primary_key or c.is_foreign_key or c.column_name in keep]
+            core[t.table_name] = cols or t.columns[:1]
+
+        # 2. tables at core size
+        rank = {t.table_name: i for i, t in enumerate(tables)}
+        remaining = list(tables)
+        selected: list[TableMetaData] = []
+        dropped_tables: list[str] = []
+        used = 0
+
+        while remaining:
+            picked = {t.table_name for t in selected}
+            best = max(
+                remaining,
+                key=lambda t: (
+                    scores.get(t.table_name, 0.0)
+                    + FK_LINK_BONUS * sum(n for other, n in links[t.table_name].items() if other in picked),
+                    -rank[t.table_name]
+                )
+            )
+            remaining.remove(best)
+
+            cost = count_tokens(render_table(best, core[best.table_name])) + SEPARATOR_TOKENS
+            if used + cost <= self.budget or not selected:
+                selected.append(best)
+                used += cost
+            else:
+                dropped_tables.append(best.table_name)
+
+        # 3. fill in the other columns
+        kept: dict[str, set[str]] = {t.table_name: {c.column_name for c in core[t.table_name]} for t in selected}
+        dropped_columns: dict[str, list[str]] = {}
+
+        fill = [
+            (t, col, -(column_scores or {}).get(t.table_name, {}).get(col.column_name, 0.0), ti, ci)
+            for ti, t in enumerate(selected)
+            for ci, col in enumerate(t.columns)
+            if col.column_name not in kept[t.table_name]
+        ]
+        fill.sort(key=lambda x: x[2:])
+
+        for t, col, *_ in fill:
+            inline_pk = sum(c.is_primary_key for c in t.columns) == 1
+            cost = count_tokens(render_column(col, inline_pk)) + SEPARATOR_TOKENS
+            if used + cost <= self.budget:
+                kept[t.table_name].add(col.column_name)
+                used += cost
+            else:
+                dropped_columns.setdefault(t.table_name, []).append(col.column_name)
+
+        packed = []
+        for t in selected:
+            if t.table_name in dropped_columns:
+                t = t.model_copy(update={"columns": [c for c in t.columns if c.column_name in kept[t.table_name]]})
+            packed.append(t)
+
+        token_estimate = count_tokens("\n\n".join(render_table(t) for t in packed))
+
+        if dropped_tables or dropped_columns:
+            logger.info(
+                "SchemaPacker: ~%d/%d tokens, dropped tables=%s, dropped columns=%s",
+                token_estimate, self.budget, dropped_tables,
+                {name: len(cols) for name, cols in dropped_columns.items()}
+            )
+
+        return SchemaPack(
+            tables=packed,
+            token_estimate=token_estimate,
+            dropped_tables=dropped_tables,
+            dropped_columns=dropped_columns
+        )
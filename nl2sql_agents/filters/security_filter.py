@@ -3,7 +3,8 @@ SECURITY FILTER
 - selects which tables the current user/connection has SELECt access to.
 - SQLite: pass-through (all tables accessible, no privilege system)
 - Extensible: override _fetch_privileged_tables() for other DB backends
-Runs in PARALLEL alongside Discovery Agent.
+Runs before the question cache: the approved table names are part of the cache
+scope, so a cached answer is only served to connections with the same privileges.
 """
 
 import logging
@@ -0,0 +1,70 @@
+"""
+LLM CLIENT REGISTRY
+
+- one ChatOpenAI per (provider, model), created on first use and shared by every agent
+- one process-wide keep-alive httpx.AsyncClient behind all of them: connections
+  (and their TLS sessions) are reused across calls instead of one client per call
+- sampling params (temperature, max_tokens) are bound per call, not per client
+"""
+
+import logging
+import httpx
+from typing import Any
+from langchain_openai import ChatOpenAI
+
+from nl2sql_agents.config.settings import (
+    LLMProvider, LLM_HTTP_MAX_CONNECTIONS, LLM_HTTP_KEEPALIVE_EXPIRY, LLM_HTTP_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+_http_client: httpx.AsyncClient | None = None
+_models: dict[tuple[LLMProvider, str], ChatOpenAI] = {}
+
+stats = {"clients_created": 0, "calls": 0}
+
+def shared_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(LLM_HTTP_TIMEOUT),
+        )
+    return _http_client
+
+def chat_model(provider: LLMProvider, model: str | None = None) -> ChatOpenAI:
+    """Shared client for (provider, model); sampling params come from bind() per call"""
+    key = (provider, model or provider.default_model)
+    llm = _models.get(key)
+    if llm is None:
+        llm = _models[key] = provider.chat_model(
+            temperature=None,
+            max_tokens=None,
+            model=key[1],
+            http_async_client=shared_http_client(),
+            max_retries=0,  # retries/backoff are owned by llm/scheduler.py
+        )
+        stats["clients_created"] += 1
+        logger.debug("LLM client registry: new client for %s", key[1])
+    return llm
+
+def bound_chat_model(
+        provider: LLMProvider,
+        temperature: float,
+        max_tokens: int,
+        model: str | None = None
+) -> Any:
+    stats["calls"] += 1
+    return chat_model(provider, model).bind(temperature=temperature, max_tokens=max_tokens)
+
+async def close_clients() -> None:
+    """Close the shared HTTP pool (clients are re-created on next use)"""
+    global _http_client
+    _models.clear()
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
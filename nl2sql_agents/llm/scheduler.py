@@ -0,0 +1,211 @@
+"""
+LLM SCHEDULER - one per provider, in the BaseAgent.call_llm path
+
+- concurrency limit (LLMProvider.max_concurrency)
+- token buckets for requests/min (rpm) and tokens/min (tpm); the token estimate
+  (prompt + max_tokens) is settled against the reported usage after the call
+- waiters are served by priority class, FIFO within a class:
+  generation (HIGH) > validation (NORMAL) > explanation (LOW)
+- 429 / transient errors are retried with jittered exponential backoff,
+  honouring Retry-After when the provider sends one
+"""
+
+import time
+import heapq
+import random
+import asyncio
+import logging
+import itertools
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, TypeVar
+
+import openai
+
+from nl2sql_agents.config.settings import (
+    LLMProvider, LLM_MAX_RETRIES, LLM_BACKOFF_BASE, LLM_BACKOFF_MAX
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class Priority(IntEnum):
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,   # includes APITimeoutError
+    openai.InternalServerError,
+)
+
+class TokenBucket:
+    """`rate` units per minute, burst up to one minute's worth; rate <= 0 = unlimited"""
+
+    def __init__(self, rate: int) -> None:
+        self.rate = rate
+        self.capacity = float(rate)
+        self.level = float(rate)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) * 60 / self.rate
+
+    def take(self, amount: float) -> None:
+        if self.rate > 0:
+            self._refill()
+            self.level -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        if self.rate > 0 and amount > 0:
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+
+def _retry_after(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+class LLMScheduler:
+    def __init__(
+            self,
+            name: str,
+            max_concurrency: int,
+            rpm: int = 0,
+            tpm: int = 0,
+            max_retries: int = LLM_MAX_RETRIES,
+            backoff_base: float = LLM_BACKOFF_BASE,
+            backoff_max: float = LLM_BACKOFF_MAX
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max_concurrency if max_concurrency > 0 else float("inf")
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._active = 0
+        self._waiters: list[tuple[int, int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "failed": 0, "wait_ms": 0.0, "max_queue": 0}
+
+    # --- admission --- #
+
+    def _dispatch(self) -> None:
+        while self._waiters and self._active < self.max_concurrency:
+            priority, _, tokens, fut = self._waiters[0]
+            if fut.done():  # cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if wait > 0:
+                # head of line waits for the buckets, lower priorities do not overtake it
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(wait, self._on_timer)
+                return
+
+            heapq.heappop(self._waiters)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self._active += 1
+            fut.set_result(None)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    async def _acquire(self, priority: int, tokens: int) -> None:
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), tokens, fut))
+        self.stats["max_queue"] = max(self.stats["max_queue"], len(self._waiters))
+        self._dispatch()
+
+        start = time.perf_counter()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():  # slot granted just before cancellation
+                self._release()
+            raise
+        finally:
+            self.stats["wait_ms"] += (time.perf_counter() - start) * 1000
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Give back the part of the TPM estimate the call did not use"""
+        self.tokens.refund(estimated_tokens - actual_tokens)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = _retry_after(error)
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        delay = random.uniform(ceiling / 2, ceiling)  # jitter: no synchronized retry waves
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    # --- public --- #
+
+    async def run(
+            self,
+            call: Callable[[], Awaitable[T]],
+            priority: int = Priority.NORMAL,
+            tokens: int = 0
+    ) -> T:
+        """Run `call` once admitted; retried on rate limits / transient errors"""
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(priority, tokens)
+            try:
+                self.stats["calls"] += 1
+                return await call()
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, openai.RateLimitError):
+                    self.stats["rate_limited"] += 1
+                if attempt == self.max_retries:
+                    self.stats["failed"] += 1
+                    raise
+                delay = self._backoff(attempt, e)
+                self.stats["retries"] += 1
+                logger.warning(
+                    "LLMScheduler[%s]: %s, retry %d/%d in %.2fs",
+                    self.name, type(e).__name__, attempt + 1, self.max_retries, delay
+                )
+            finally:
+                self._release()
+
+            await asyncio.sleep(delay)
+
+        raise AssertionError("unreachable")
+
+_schedulers: dict[LLMProvider, LLMScheduler] = {}
+
+def scheduler_for(provider: LLMProvider) -> LLMScheduler:
+    scheduler = _schedulers.get(provider)
+    if scheduler is None:
+        scheduler = _schedulers[provider] = LLMScheduler(
+            name=provider.default_model,
+            max_concurrency=provider.max_concurrency,
+            rpm=provider.rpm,
+            tpm=provider.tpm,
+        )
+    return scheduler
+
+def scheduler_stats() -> dict[str, dict[str, Any]]:
+    return {s.name: dict(s.stats, active=s._active, queued=len(s._waiters)) for s in _schedulers.values()}
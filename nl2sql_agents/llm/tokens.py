@@ -0,0 +1,73 @@
+"""
+TOKEN COUNTING - local prompt-size estimates
+
+- tiktoken (optional) with the model's encoding, o200k_base for unknown models
+- falls back to ~4 characters per token when tiktoken or its encoding files
+  are unavailable (e.g. offline, first download fails)
+- the encoding is loaded in a background thread on first use (tiktoken downloads
+  its files synchronously, which would block the event loop); counts use the
+  chars/token estimate until it is ready. load_encoding() waits for it.
+"""
+
+import math
+import logging
+import threading
+from typing import Any
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+from nl2sql_agents.config.settings import PRIMARY_PROVIDER
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+DEFAULT_ENCODING = "o200k_base"
+
+_encodings: dict[str, Any | None] = {}
+_loaders: dict[str, threading.Thread] = {}
+_lock = threading.Lock()
+
+def _load(model: str) -> None:
+    name = model.split("/")[-1]  # "openai/gpt-4o-mini" -> "gpt-4o-mini"
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(name)
+        except KeyError:
+            encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logger.warning("tiktoken unavailable for %s (%s), estimating %d chars/token", model, e, CHARS_PER_TOKEN)
+        encoding = None
+    _encodings[model] = encoding
+
+def _loader(model: str) -> threading.Thread:
+    with _lock:
+        thread = _loaders.get(model)
+        if thread is None:
+            thread = threading.Thread(target=_load, args=(model,), name=f"tiktoken-{model}", daemon=True)
+            _loaders[model] = thread
+            thread.start()
+        return thread
+
+def _encoding(model: str) -> Any | None:
+    """the model's encoding once loaded, None meanwhile (never blocks)"""
+    if tiktoken is None:
+        return None
+    if model not in _encodings:
+        _loader(model)
+    return _encodings.get(model)
+
+def load_encoding(model: str = PRIMARY_PROVIDER.default_model, timeout: float | None = None) -> Any | None:
+    """wait for the model's encoding (scripts that need exact counts from the first call)"""
+    if tiktoken is None:
+        return None
+    _loader(model).join(timeout)
+    return _encodings.get(model)
+
+def count_tokens(text: str, model: str = PRIMARY_PROVIDER.default_model) -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
@@ -4,13 +4,17 @@ Models/State for data flowing between all pipeline components.
 from __future__ import annotations
 
 import operator
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Annotated
 from typing_extensions import TypedDict
 
 # --- Database/Schema --- #
 
+# frozen: one instance is shared by every request (see cache/schema_registry.py)
+
 class ColumnMetaData(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     column_name: str
     data_type: str
     nullable: bool = True
@@ -20,12 +24,39 @@ class ColumnMetaData(BaseModel):
     reference_column: Optional[str] = None
 
 class TableMetaData(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     table_name: str
     schema_name: str
     rows_count: Optional[int] = None
     columns: list[ColumnMetaData] = Field(default_factory=list)
     comments: Optional[str] = None
 
+# --- Schema Cache --- #
+
+class DBFingerprint(BaseModel):
+    file_size: int
+    mtime_ns: int
+    inode: int = 0
+    wal_size: int = 0
+    wal_mtime_ns: int = 0
+    schema_version: Optional[int] = None
+
+    def same_file_state(self, other: DBFingerprint) -> bool:
+        return (
+            self.file_size == other.file_size
+            and self.mtime_ns == other.mtime_ns
+            and self.inode == other.inode
+            and self.wal_size == other.wal_size
+            and self.wal_mtime_ns == other.wal_mtime_ns
+        )
+
+class SchemaCacheEntry(BaseModel):
+    timestamp: float
+    fingerprint: Optional[DBFingerprint] = None
+    ddl_hashes: dict[str, str] = Field(default_factory=dict)
+    tables: list[TableMetaData] = Field(default_factory=list)
+
 class GateResult(BaseModel):
     passed: bool
     tables: list[TableMetaData]
@@ -37,6 +68,7 @@ class ScoredTable(BaseModel):
     table: TableMetaData
     score: float
     found_by: list[str] = Field(default_factory=list)
+    column_scores: dict[str, float] = Field(default_factory=dict)
 
 class DiscoveryResult(BaseModel):
     top_tables: list[TableMetaData]
@@ -44,10 +76,18 @@ class DiscoveryResult(BaseModel):
 
 # --- Schema Formatter --- #
 
+class SchemaPack(BaseModel):
+    tables: list[TableMetaData]
+    token_estimate: int
+    dropped_tables: list[str] = Field(default_factory=list)
+    dropped_columns: dict[str, list[str]] = Field(default_factory=dict)
+
 class FormattedSchema(BaseModel):
     content: str
     table_names: list[str]
     token_estimate: int
+    dropped_tables: list[str] = Field(default_factory=list)
+    dropped_columns: dict[str, list[str]] = Field(default_factory=dict)
 
 # --- Query Generation --- #
 
@@ -78,6 +118,8 @@ class ValidationResult(BaseModel):
     all_results: list[CandidateValidationResult]
     passed: bool
     retry_context: Optional[str] = None
+    llm_calls_saved: int = 0
+    prompt_tokens_saved: int = 0
 
 # --- Explainer Output --- #
 class ExplainerOutput(BaseModel):
@@ -92,6 +134,7 @@ class FinalOutput(BaseModel):
     safety_report: str
     optimization_hints: str
     candidate_scores: list[CandidateValidationResult]
+    cached: bool = False
 
 class ChatMessage(TypedDict):
     role: str
@@ -102,8 +145,10 @@ class ChatMessage(TypedDict):
 class GraphState(TypedDict, total=False):
     user_query: str
     tables: list[TableMetaData]
+    schema_version: str
+    cache_hit: Optional[str]  # "question" | "template" | None
 
-    # written by security_filter and discovery node (parallel branches)
+    # written by security_filter (before the question cache) and discovery node
     security_passed: Annotated[set[str], operator.or_]
     discovery_result: DiscoveryResult
 
@@ -1,13 +1,24 @@
 import logging
 
+from langgraph.graph import END
+
 from nl2sql_agents.filters.gate import GateLayer
+from nl2sql_agents.llm.clients import close_clients
+from nl2sql_agents.llm.scheduler import scheduler_stats
+from nl2sql_agents.cache.llm_cache import get_response_cache
+from nl2sql_agents.cache.question_cache import QuestionCache, question_scope
+from nl2sql_agents.cache.question_template import TemplateCache
+from nl2sql_agents.filters.schema_packer import SchemaPacker
 from nl2sql_agents.db.connector import DatabaseConnector
 from nl2sql_agents.cache.schema_cache import SchemaCache
+from nl2sql_agents.cache.schema_registry import SchemaRegistry
 from nl2sql_agents.filters.security_filter import SecurityFilter
-from nl2sql_agents.models.schemas import GraphState, FinalOutput
+from nl2sql_agents.models.schemas import (
+    GraphState, FinalOutput, ChatMessage, SQLCandidate, GenerationResult, ValidationResult
+)
 from nl2sql_agents.agents.query_generator import QueryGeneratorAgent
 from nl2sql_agents.agents.schema_formatter import SchemaFormatterAgent
-from nl2sql_agents.config.settings import DB_PATH, DB_TYPE, MAX_RETRIES
+from nl2sql_agents.config.settings import DB_PATH, DB_TYPE, MAX_RETRIES, QUESTION_CACHE_ENABLED, QUESTION_TEMPLATES_ENABLED
 from nl2sql_agents.agents.discovery.discovery_agent import DiscoveryAgent
 from nl2sql_agents.agents.validator.validator_agent import ValidatorAgent
 from nl2sql_agents.agents.explainer.explainer_agent import ExplainerAgent
@@ -17,27 +28,101 @@ logger = logging.getLogger(__name__)
 
 cache = SchemaCache()
 gate_layer = GateLayer()
+schema_packer = SchemaPacker()
 connector = DatabaseConnector()
 security_filter=SecurityFilter(connector)
+schema_registry = SchemaRegistry(connector, cache)
 
 # --- 5 agents --- # 
 discovery_agent = DiscoveryAgent()
 formatter_agent = SchemaFormatterAgent()
 generator_agent = QueryGeneratorAgent()
-validator_agent = ValidatorAgent()
+validator_agent = ValidatorAgent(connector)
 explainer_agent = ExplainerAgent()
 
+question_cache = QuestionCache(embed=discovery_agent.semantic_agent.embed_query)
+template_cache = TemplateCache(probe=connector.fetch_all)
+
+async def shutdown() -> None:
+    """Release long-lived resources (DB connection pool, shared LLM HTTP pool)"""
+    logger.info("Connection pool stats: %s", connector.pool_stats())
+    logger.info("LLM scheduler stats: %s", scheduler_stats())
+    logger.info("LLM response cache stats: %s", get_response_cache().stats)
+    logger.info(
+        "Validator stats: %s, schema clone: %s, plan analyzer: %s, sample db: %s", validator_agent.stats,
+        validator_agent.schema_clone.stats if validator_agent.schema_clone is not None else None,
+        validator_agent.plan_analyzer.stats if validator_agent.plan_analyzer is not None else None,
+        validator_agent.sample_db.stats if validator_agent.sample_db is not None else None
+    )
+    logger.info("Question cache stats: %s, templates: %s", question_cache.stats, template_cache.stats)
+    await connector.close()
+    await close_clients()
+    get_response_cache().close()
+    question_cache.close()
+    template_cache.close()
+    if validator_agent.schema_clone is not None:
+        validator_agent.schema_clone.close()
+
 async def load_schema(state: GraphState) -> dict:
-    """Load Tables from cache or Introspect the database"""
-    tables = cache.get(DB_PATH)
-    
-    if tables is None:
-        tables = await connector.introspect()
-        cache.set(DB_PATH, tables)
+    """Load Tables from the in-memory registry (backed by the disk cache / DB introspection)"""
+    snapshot = await schema_registry.get()
+
+    return {"tables": snapshot.tables, "schema_version": snapshot.version, "attempt": 1}
+
+def _with_turn(state: GraphState, sql: str) -> list[ChatMessage]:
+    history = list(state.get('chat_history') or [])
+    history.append({"role": "user", "content": state['user_query']})
+    history.append({"role": "assistant", "content": sql})
+    return history
 
-    return {"tables": tables, "attempt": 1}
+async def question_cache_node(state: GraphState) -> dict:
+    """
+    Serve a question already answered for this database / schema version, or
+    reuse the SQL of a question that differs only in a literal (local checks only)
+    """
+    scope = question_scope(
+        connector.db_path, state.get('schema_version'), state.get('chat_history'), state.get('security_passed')
+    )
+
+    if QUESTION_CACHE_ENABLED:
+        output = await question_cache.get(state['user_query'], scope)
+        if output is not None:
+            logger.info("QuestionCacheNode: cache hit, skipping the pipeline")
+            return {
+                "cache_hit": "question",
+                "output": output,
+                "chat_history": _with_turn(state, output.sql),
+            }
+
+    if QUESTION_TEMPLATES_ENABLED:
+        matched = await template_cache.match(state['user_query'], scope, tables=state['tables'])
+        if matched is not None:
+            sql, template = matched
+            candidate = SQLCandidate(sql=sql, temperature=0.0, prompt_variant="template")
+            validation = await validator_agent.validate_local(
+                candidate, reused_checks=template.checks,
+                tables=state['tables'], schema_version=state.get('schema_version')
+            )
+            if validation.passed:
+                logger.info("QuestionCacheNode: template hit, skipping generation and validation")
+                return {
+                    "cache_hit": "template",
+                    "generation": GenerationResult(candidates=[candidate]),
+                    "validation": validation,
+                }
+            logger.warning("QuestionCacheNode: templated SQL failed local checks: %s", validation.retry_context)
+
+    return {"cache_hit": None}
+
+def route_question_cache(state: GraphState) -> str | list[str]:
+    if state.get('cache_hit') == "question":
+        return END
+    if state.get('cache_hit') == "template":
+        return "explain"
+    return "discovery"
 
 async def security_filter_node(state: GraphState) -> dict:
+    """Runs before the question cache: the approved tables are part of the cache scope"""
     approved = await security_filter.filter(state["tables"])
     approved_names = {t.table_name for t in approved}
 
@@ -48,7 +133,9 @@ async def security_filter_node(state: GraphState) -> dict:
     }
 
 async def discovery_node(state: GraphState) -> dict:
-    result = await discovery_agent.run(state['tables'], state['user_query'])
+    result = await discovery_agent.run(
+        state['tables'], state['user_query'], schema_version=state.get('schema_version')
+    )
     
     return {
         "discovery_result": result
@@ -69,7 +156,16 @@ async def gate_node(state: GraphState) -> dict:
     }
 
 async def format_schema_node(state: GraphState) -> dict:
-    formatted = await formatter_agent.format(state['gated_tables'])
+    scored = state['discovery_result'].scored_tables
+    pack = schema_packer.pack(
+        state['gated_tables'], state['user_query'],
+        scores={st.table.table_name: st.score for st in scored},
+        column_scores={st.table.table_name: st.column_scores for st in scored}
+    )
+
+    formatted = await formatter_agent.format(pack.tables, schema_version=state.get('schema_version'))
+    formatted.dropped_tables = pack.dropped_tables
+    formatted.dropped_columns = pack.dropped_columns
     return {
         'formatted_schema': formatted
     }
@@ -90,9 +186,36 @@ async def generate_sql_node(state: GraphState) -> dict:
         'generation':generation
     }
 
+async def generate_and_validate_node(state: GraphState) -> dict:
+    """STREAMING: each candidate is validated as soon as it is generated, stops early"""
+
+    logger.info("Generation Attempt: %d of %d (streaming)", state['attempt'], MAX_RETRIES)
+
+    stream = generator_agent.stream(
+        state['formatted_schema'],
+        state['user_query'],
+        retry_context=state.get('retry_context'),
+        chat_history=state.get('chat_history'),
+    )
+    validation = await validator_agent.validate_stream(
+        stream, state['user_query'],
+        tables=state['tables'], schema_version=state.get('schema_version')
+    )
+
+    return {
+        'generation': GenerationResult(candidates=[r.candidate for r in validation.all_results]),
+        **_validation_update(state, validation)
+    }
+
 async def validate_node(state: GraphState) -> dict:
-    validation = await validator_agent.validate(state['generation'], state['user_query'])
+    validation = await validator_agent.validate(
+        state['generation'], state['user_query'],
+        tables=state['tables'], schema_version=state.get('schema_version')
+    )
+
+    return _validation_update(state, validation)
 
+def _validation_update(state: GraphState, validation: ValidationResult) -> dict:
     if not validation.passed:
         return {
             'validation': validation,
@@ -126,17 +249,25 @@ async def explain_node(state: GraphState) -> dict:
         state['user_query'],
     )
 
-    history = list(state.get('chat_history') or [])
-    history.append({"role": "user", "content": state['user_query']})
-    history.append({"role": "assistant", "content": best.sql})
+    final = FinalOutput(
+        sql=best.sql,
+        explanation=output.explanation,
+        safety_report=output.safety_report,
+        optimization_hints=output.optimization_hints,
+        candidate_scores=state["validation"].all_results,
+    )
+
+    if state['validation'].passed:
+        scope = question_scope(
+            connector.db_path, state.get('schema_version'), state.get('chat_history'), state.get('security_passed')
+        )
+        if QUESTION_CACHE_ENABLED:
+            await question_cache.set(state['user_query'], scope, final)
+        if QUESTION_TEMPLATES_ENABLED and best.prompt_variant != "template":
+            winner = next(r for r in state['validation'].all_results if r.candidate.sql == best.sql)
+            await template_cache.learn(state['user_query'], scope, best.sql, winner.checks)
 
     return {
-        'output': FinalOutput(
-            sql=best.sql,
-            explanation=output.explanation,
-            safety_report=output.safety_report,
-            optimization_hints=output.optimization_hints,
-            candidate_scores=state["validation"].all_results,
-        ),
-        'chat_history': history,
+        'output': final,
+        'chat_history': _with_turn(state, best.sql),
     }
@@ -2,15 +2,21 @@
 ORCHESTRATOR - LANGGRAPH
 
 - load schema       -> introspect DB or read from cache
-- security_filter 
-- discovery         -> PARALLEL
+- security_filter   -> before the caches: the approved tables are part of their scope,
+                       so a hit never bypasses the per-connection privileges
+- question_cache    -> repeated question: cached FinalOutput, straight to END
+                       same question with other literals: templated SQL, straight to explain
+- discovery
 - gate
 - format_schema
 - generate_sql      -> PARALLEL
 - validate          -> PARALLEL
+  (PIPELINE_MODE="streaming", opt-in: one generate_sql node streams candidates
+   into validation and stops early, no separate validate node)
 - explain           -> PARALLEL
 """
 
+from nl2sql_agents.config.settings import PIPELINE_MODE
 from nl2sql_agents.models.schemas import GraphState
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
@@ -19,10 +25,13 @@ from .nodes import gate_node
 from .nodes import load_schema
 from .nodes import explain_node
 from .nodes import should_retry
+from .nodes import question_cache_node
+from .nodes import route_question_cache
 from .nodes import validate_node
 from .nodes import discovery_node
 from .nodes import format_schema_node
 from .nodes import generate_sql_node
+from .nodes import generate_and_validate_node
 from .nodes import security_filter_node
 
 def build_graph() -> StateGraph:
@@ -30,32 +39,38 @@ def build_graph() -> StateGraph:
 
     # - nodes - #
     builder.add_node("load_schema", load_schema)
+    builder.add_node("question_cache", question_cache_node)
     builder.add_node("security_filter", security_filter_node)
     builder.add_node("discovery", discovery_node)
     builder.add_node("gate", gate_node)
     builder.add_node("format_schema", format_schema_node)
-    builder.add_node("generate_sql", generate_sql_node)
-    builder.add_node("validate", validate_node)
+    streaming = PIPELINE_MODE == "streaming"
+    builder.add_node("generate_sql", generate_and_validate_node if streaming else generate_sql_node)
+    if not streaming:
+        builder.add_node("validate", validate_node)
     builder.add_node("explain", explain_node)
 
     # - edges - #
     builder.set_entry_point('load_schema')
 
-    # parallel
-    builder.add_edge("load_schema", 'security_filter')
-    builder.add_edge("load_schema", 'discovery')
+    builder.add_edge("load_schema", "security_filter")
+    builder.add_edge("security_filter", "question_cache")
+
+    # cache hit -> END, template hit -> explain, miss -> discovery
+    builder.add_conditional_edges(
+        "question_cache", route_question_cache, ["discovery", "explain", END]
+    )
 
-    # both branches converge at gate (LangGraph waits for both)
-    builder.add_edge("security_filter", "gate")
     builder.add_edge("discovery", "gate")
 
     # sequential flow
     builder.add_edge("gate", 'format_schema')
     builder.add_edge("format_schema", 'generate_sql')
-    builder.add_edge("generate_sql", 'validate')
+    if not streaming:
+        builder.add_edge("generate_sql", 'validate')
 
     # conditional retyr loop
-    builder.add_conditional_edges("validate", should_retry, {
+    builder.add_conditional_edges("generate_sql" if streaming else "validate", should_retry, {
         'generate_sql': "generate_sql",
         "explain": "explain"
     })
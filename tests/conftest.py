@@ -0,0 +1,57 @@
+import os
+import sys
+import json
+import asyncio
+import tempfile
+
+import pytest
+
+# settings builds the LLM providers and cache paths at import time
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ["HOME"] = tempfile.mkdtemp(prefix="nl2sql-tests-")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class FakeLLM:
+    """BaseAgent.call_llm stand-in: records (agent class, prompt) and answers PASS
+    (every candidate PASS for a batch review) unless `respond` says otherwise"""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, str]] = []
+        self.cancelled = 0
+        self.respond = None   # (agent, prompt) -> str | None, may raise
+        self.delay = 0.0      # seconds, or (agent, prompt) -> seconds
+
+    async def __call__(self, agent, messages, temperature=0.3, max_tokens=2048) -> str:
+        prompt = messages[-1]["content"]
+        self.calls.append((type(agent).__name__, prompt))
+        delay = self.delay(agent, prompt) if callable(self.delay) else self.delay
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        answer = self.respond(agent, prompt) if self.respond is not None else None
+        if answer is not None:
+            return answer
+        if type(agent).__name__ == "BatchValidator":
+            n = prompt.count("\nCandidate ") + 1
+            return json.dumps({"candidates": [
+                {"id": i, "syntax": "PASS", "logic": "PASS", "performance": "PASS"} for i in range(1, n + 1)
+            ]})
+        return "PASS"
+
+    def count(self, agent: str) -> int:
+        return sum(name == agent for name, _ in self.calls)
+
+@pytest.fixture
+def llm(monkeypatch):
+    from nl2sql_agents.agents.base_agent import BaseAgent
+
+    fake = FakeLLM()
+
+    async def call_llm(agent, messages, temperature=0.3, max_tokens=2048) -> str:
+        return await fake(agent, messages, temperature, max_tokens)
+
+    monkeypatch.setattr(BaseAgent, "call_llm", call_llm)
+    return fake
@@ -0,0 +1,134 @@
+import json
+
+import pytest
+
+from nl2sql_agents.agents.validator.batch_validator import BatchValidator
+from nl2sql_agents.agents.validator.validator_agent import ValidatorAgent
+from nl2sql_agents.models.schemas import GenerationResult, SQLCandidate
+
+FRENCH = "SELECT name FROM singer WHERE country = 'France'"
+SPANISH = "SELECT name FROM singer WHERE country = 'Spain'"
+QUESTION = "French singers"
+
+# --- BatchValidator.parse_response --- #
+
+@pytest.fixture
+def batch():
+    return BatchValidator()
+
+def answer(*items: dict) -> str:
+    return json.dumps({"candidates": list(items)})
+
+def test_parse_fenced_json(batch):
+    raw = 'Here you go:\n```json\n' + answer({"id": 1, "logic": "PASS", "performance": "WARN: SELECT *"}) + '\n```'
+    assert batch.parse_response(raw) == {1: {"logic": "PASS", "performance": "WARN: SELECT *"}}
+
+def test_parse_string_ids_and_key_case(batch):
+    raw = answer({"id": "2", "Logic": " FAIL: wrong table ", "comment": "ignored"}, {"id": "two", "logic": "PASS"})
+    assert batch.parse_response(raw) == {2: {"logic": "FAIL: wrong table"}}
+
+@pytest.mark.parametrize("raw", [
+    '{"candidates": [{"id": 1, "logic": "PASS"}, {"id": 2, "lo',   # cut off mid-answer
+    "PASS",
+    '{"verdicts": []}',
+    "[1, 2]",
+])
+def test_parse_unusable(batch, raw):
+    assert batch.parse_response(raw) is None
+
+async def test_review_drops_candidates_missing_a_criterion(batch, llm):
+    llm.respond = lambda agent, prompt: answer(
+        {"id": 1, "logic": "PASS", "performance": "PASS"},
+        {"id": 2, "logic": "PASS", "performance": ""},
+        {"id": 4, "logic": "PASS", "performance": "PASS"},
+    )
+    verdicts = await batch.review([FRENCH, SPANISH, FRENCH], QUESTION, ["logic", "performance"])
+    assert verdicts == [{"logic": "PASS", "performance": "PASS"}, None, None]
+
+# --- ValidatorAgent._validate_batch --- #
+
+@pytest.fixture
+def validator():
+    agent = ValidatorAgent()   # no connector: every soft check is an LLM call
+    assert agent.batch is not None and agent.llm_checks == 3
+    return agent
+
+def generation(*sqls: str) -> GenerationResult:
+    return GenerationResult(candidates=[
+        SQLCandidate(sql=sql, temperature=0.3, prompt_variant=f"v{i}") for i, sql in enumerate(sqls)
+    ])
+
+def tokens(validator, *fallback: str) -> tuple[int, int]:
+    """(prompt tokens of one call per candidate per check, of the batch prompt)"""
+    per_check = sum(validator._per_check_tokens(sql, QUESTION) for sql in (FRENCH, SPANISH))
+    batch = validator._prompt_tokens(
+        validator.batch, sqls=[FRENCH, SPANISH], user_query=QUESTION, criteria=validator.llm_criteria
+    )
+    return per_check, batch + sum(validator._per_check_tokens(sql, QUESTION) for sql in fallback)
+
+def per_check_calls(llm) -> int:
+    return sum(llm.count(name) for name in ("SyntaxValidator", "LogicValidator", "PerformanceValidator"))
+
+async def test_one_call_for_all_candidates(validator, llm):
+    result = await validator.validate(generation(FRENCH, SPANISH), QUESTION)
+
+    assert llm.count("BatchValidator") == 1 and per_check_calls(llm) == 0
+    per_check, batch = tokens(validator)
+    assert result.llm_calls_saved == 2 * 3 - 1
+    assert result.prompt_tokens_saved == per_check - batch > 0
+    assert validator.stats["batch_calls"] == 1 and validator.stats["batch_fallbacks"] == 0
+
+async def test_verdicts_are_parsed_per_check(validator, llm):
+    def respond(agent, prompt):
+        if type(agent).__name__ == "BatchValidator":
+            return answer(
+                {"id": 1, "syntax": "PASS", "logic": "PASS", "performance": "PASS"},
+                {"id": 2, "syntax": "PASS", "logic": "FAIL: asks for French singers", "performance": "WARN: no index"},
+            )
+    llm.respond = respond
+
+    result = await validator.validate(generation(FRENCH, SPANISH), QUESTION)
+    checks = {c.check_name: c for c in result.all_results[1].checks}
+    assert not checks["logic"].passed and checks["performance"].score < 1.0
+    assert result.best_candidate.sql == FRENCH
+
+async def test_unparsable_response_falls_back_for_everyone(validator, llm):
+    llm.respond = lambda agent, prompt: "I cannot review these." if type(agent).__name__ == "BatchValidator" else None
+
+    result = await validator.validate(generation(FRENCH, SPANISH), QUESTION)
+
+    assert llm.count("BatchValidator") == 1 and per_check_calls(llm) == 2 * 3
+    per_check, batch = tokens(validator, FRENCH, SPANISH)
+    assert result.llm_calls_saved == -1   # the batch call was wasted
+    assert result.prompt_tokens_saved == per_check - batch < 0
+    assert validator.stats["batch_fallbacks"] == 2
+    assert result.passed
+
+async def test_missing_candidate_falls_back_alone(validator, llm):
+    def respond(agent, prompt):
+        if type(agent).__name__ == "BatchValidator":
+            return answer({"id": 1, "syntax": "PASS", "logic": "PASS", "performance": "PASS"})
+    llm.respond = respond
+
+    result = await validator.validate(generation(FRENCH, SPANISH), QUESTION)
+
+    assert llm.count("BatchValidator") == 1 and per_check_calls(llm) == 3
+    assert all(SPANISH in prompt for name, prompt in llm.calls if name != "BatchValidator")
+    per_check, batch = tokens(validator, SPANISH)
+    assert result.llm_calls_saved == 2 * 3 - 1 - 3
+    assert result.prompt_tokens_saved == per_check - batch
+    assert validator.stats["batch_fallbacks"] == 1
+
+async def test_extra_candidates_in_the_response_are_ignored(validator, llm):
+    def respond(agent, prompt):
+        if type(agent).__name__ == "BatchValidator":
+            return answer(*[
+                {"id": i, "syntax": "PASS", "logic": "PASS", "performance": "PASS"} for i in range(1, 4)
+            ])
+    llm.respond = respond
+
+    result = await validator.validate(generation(FRENCH, SPANISH), QUESTION)
+
+    assert per_check_calls(llm) == 0
+    assert result.llm_calls_saved == 2 * 3 - 1
+    assert validator.stats["batch_fallbacks"] == 0
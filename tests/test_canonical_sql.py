@@ -0,0 +1,60 @@
+import pytest
+
+from nl2sql_agents.agents.validator.canonical_sql import canonical_sql
+
+@pytest.mark.parametrize("a, b", [
+    # whitespace, case, trailing semicolon, comments
+    ("SELECT name FROM singer WHERE age > 30;", "select   name\nfrom Singer where AGE>30"),
+    ("SELECT name FROM singer -- all of them", "SELECT name FROM singer"),
+    # optional AS, function name case and spacing
+    ("SELECT COUNT (*) AS n FROM singer", "select count(*) n from singer"),
+    # operator keywords
+    ("SELECT name FROM singer WHERE name LIKE 'a%'", "SELECT name FROM singer WHERE name like 'a%'"),
+    ("SELECT name FROM singer WHERE name NOT LIKE 'a%'", "SELECT name FROM singer WHERE name not  like 'a%'"),
+    ("SELECT name FROM singer WHERE age IN (30, 40)", "SELECT name FROM singer WHERE age in(30,40)"),
+    ("SELECT name FROM singer WHERE age NOT IN (30)", "SELECT name FROM singer WHERE age not in (30)"),
+    ("SELECT name FROM singer WHERE age BETWEEN 30 AND 40", "SELECT name FROM singer WHERE age between 30 and 40"),
+    ("SELECT name FROM singer WHERE EXISTS (SELECT 1)", "SELECT name FROM singer WHERE exists(select 1)"),
+    ("SELECT name FROM singer WHERE age IS NOT NULL", "SELECT name FROM singer WHERE age is not null"),
+    # single table: qualifiers dropped, alias or not
+    ("SELECT s.name FROM singer AS s WHERE s.country = 'France'", "SELECT name FROM singer WHERE country = 'France'"),
+    ("SELECT singer.name FROM singer", "SELECT name FROM singer"),
+    # several tables: aliases replaced by the table name
+    ("SELECT s.name, c.year FROM singer s JOIN concert c ON c.singer_id = s.singer_id",
+     "SELECT singer.name, concert.year FROM singer JOIN concert ON concert.singer_id = singer.singer_id"),
+    ("SELECT x.name FROM singer x, stadium y WHERE x.id = y.id",
+     "SELECT a.name FROM singer AS a, stadium AS b WHERE a.id = b.id"),
+])
+def test_same(a, b):
+    assert canonical_sql(a) == canonical_sql(b)
+
+@pytest.mark.parametrize("a, b", [
+    # string literals keep their case
+    ("SELECT name FROM singer WHERE country = 'France'", "SELECT name FROM singer WHERE country = 'france'"),
+    # ORDER BY / LIMIT change the result
+    ("SELECT name FROM singer ORDER BY age LIMIT 5", "SELECT name FROM singer ORDER BY age DESC LIMIT 5"),
+    ("SELECT name FROM singer ORDER BY age LIMIT 5", "SELECT name FROM singer ORDER BY age LIMIT 10"),
+    ("SELECT name FROM singer ORDER BY age", "SELECT name FROM singer ORDER BY name"),
+    ("SELECT name FROM singer", "SELECT DISTINCT name FROM singer"),
+])
+def test_different(a, b):
+    assert canonical_sql(a) != canonical_sql(b)
+
+@pytest.mark.parametrize("sql, expected", [
+    # an alias that is another table's name
+    ("SELECT singer.x FROM concert singer, singer c", "SELECT singer.x FROM concert singer, singer c"),
+    # the same table twice (self join)
+    ("SELECT a.x FROM t AS a JOIN t AS b ON a.id = b.id", "SELECT a.x FROM t a JOIN t b ON a.id = b.id"),
+    # more than one SELECT
+    ("SELECT c.x FROM concert c UNION SELECT c.x FROM concert c",
+     "SELECT c.x FROM concert c UNION SELECT c.x FROM concert c"),
+    # quoted names
+    ('SELECT "s".name FROM singer s', 'SELECT "s".name FROM singer s'),
+])
+def test_aliases_kept_when_unsafe(sql, expected):
+    assert canonical_sql(sql) == expected
+
+def test_functions_lower_operators_upper():
+    assert canonical_sql("select SUM (age), max(age) from singer where name like 'a%' and age in (1, 2)") == (
+        "SELECT sum(age), max(age) FROM singer WHERE name LIKE 'a%' AND age IN(1, 2)"
+    )
@@ -0,0 +1,84 @@
+import pytest
+
+from nl2sql_agents.db.sample_db import ExecutionResult
+from nl2sql_agents.agents.validator.execution_validator import ExecutionValidator
+
+def ok(digest: str) -> ExecutionResult:
+    return ExecutionResult(status="ok", rows=3, digest=digest)
+
+@pytest.fixture
+def validator():
+    return ExecutionValidator(sample_db=None, vote_min=2)
+
+def test_distinct_queries_agree(validator):
+    checks, consensus = validator.vote(
+        {0: ok("a"), 1: ok("a"), 2: ok("b")},
+        {0: "SELECT name FROM singer", 1: "SELECT s.name FROM singer s WHERE 1", 2: "SELECT 1"}
+    )
+    assert consensus == {0, 1}
+    assert checks[0].score == checks[1].score == 1.0
+    assert checks[0].details.startswith("2 of 3 distinct queries")
+    assert checks[2].score == 0.5 and checks[2].passed
+
+def test_identical_queries_do_not_agree(validator):
+    checks, consensus = validator.vote(
+        {0: ok("a"), 1: ok("a")},
+        {0: "SELECT name FROM singer", 1: "select s.name from singer s;"}
+    )
+    assert consensus == set()
+    assert checks[0].details.startswith("Runs on the sample database")
+
+def test_tie_has_no_winner(validator):
+    _, consensus = validator.vote({0: ok("a"), 1: ok("a"), 2: ok("b"), 3: ok("b")})
+    assert consensus == set()
+
+def test_vote_min(validator):
+    validator.vote_min = 3
+    _, consensus = validator.vote({0: ok("a"), 1: ok("a"), 2: ok("b")})
+    assert consensus == set()
+
+def test_statuses(validator):
+    checks, consensus = validator.vote({
+        0: ExecutionResult(status="error", error="no such column: x"),
+        1: ExecutionResult(status="timeout", error="stopped at the 200 ms limit"),
+        2: ExecutionResult(status="empty", digest="e"),
+        3: ExecutionResult(status="empty", digest="e"),
+    })
+    assert consensus == set()   # empty results never agree
+    assert (checks[0].passed, checks[0].score) == (False, 0.0)
+    assert (checks[1].passed, checks[1].score) == (True, 0.5)
+    assert (checks[2].passed, checks[2].score) == (True, 1.0)
+    assert checks[2].details.startswith("Empty result")
+
+def test_empty_scores_like_a_result_outside_the_consensus(validator):
+    # a selective filter that matches nothing on the sample vs. an unfiltered query
+    checks, _ = validator.vote(
+        {0: ExecutionResult(status="empty", digest="e"), 1: ok("a")},
+        {0: "SELECT name FROM singer WHERE age > 50", 1: "SELECT name FROM singer"}
+    )
+    assert checks[0].score == checks[1].score == 1.0
+    assert checks[0].details.startswith("Empty result")
+
+    checks, consensus = validator.vote(
+        {0: ExecutionResult(status="empty", digest="e"), 1: ok("a"), 2: ok("a"), 3: ok("b")},
+        {0: "SELECT 0", 1: "SELECT 1", 2: "SELECT 2", 3: "SELECT 3"}
+    )
+    assert consensus == {1, 2}
+    assert checks[0].score == checks[3].score == 0.5
+
+async def test_unavailable_sample_is_inconclusive():
+    class Broken:
+        async def execute(self, sql, schema_version=None):
+            raise OSError("disk full")
+
+    result = await ExecutionValidator(Broken()).run("SELECT 1")
+    assert result.status == "timeout" and "disk full" in result.error
+
+def test_weights_only_break_ties(validator):
+    runs = {0: ok("a"), 1: ok("a"), 2: ok("b"), 3: ok("b")}
+    _, consensus = validator.vote(runs, weights={0: 1, 1: 1, 2: 2, 3: 1})
+    assert consensus == {2, 3}
+
+    # many variants of one query never make a consensus on their own
+    _, consensus = validator.vote({0: ok("a"), 1: ok("b")}, weights={0: 5, 1: 1})
+    assert consensus == set()
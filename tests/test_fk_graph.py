@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from nl2sql_agents.agents.discovery.fk_graph_agent import FKGraph
+from nl2sql_agents.models.schemas import ColumnMetaData, TableMetaData
+
+def table(name: str, *parents: str) -> TableMetaData:
+    columns = [ColumnMetaData(column_name="id", data_type="INTEGER", is_primary_key=True)]
+    columns += [
+        ColumnMetaData(
+            column_name=f"{p}_id", data_type="INTEGER",
+            is_foreign_key=True, reference_table=p, reference_column="id"
+        )
+        for p in parents
+    ]
+    return TableMetaData(table_name=name, schema_name="main", columns=columns)
+
+def star(leaves: int) -> list[TableMetaData]:
+    """hub <- leaf_i, plus a chain leaf_0 <- detail <- line"""
+    return [table("hub")] + [table(f"leaf_{i}", "hub") for i in range(leaves)] + [
+        table("detail", "leaf_0"), table("line", "detail")
+    ]
+
+def scores(graph: FKGraph, *names: str) -> dict[str, float]:
+    return graph.distance_scores(np.asarray(sorted(graph.positions[n] for n in names), dtype=np.int64))
+
+def test_rings_skip_hubs():
+    graph = FKGraph(star(50), hub_degree=10)
+    assert graph.hubs[graph.positions["hub"]]
+    assert sum(len(r.indices) for r in graph.rings) < 50 * 50
+
+@pytest.mark.parametrize("seeds", [("leaf_3",), ("hub",), ("detail",), ("line",), ("leaf_1", "line")])
+def test_hub_scores_match_full_expansion(seeds):
+    capped = FKGraph(star(50), hub_degree=10)
+    full = FKGraph(star(50), hub_degree=0)
+    assert not full.hubs.any()
+    assert scores(capped, *seeds) == scores(full, *seeds)
+
+def test_distances():
+    graph = FKGraph(star(3), hub_degree=2)
+    result = scores(graph, "line")
+    assert result == {"line": 1.0, "detail": 0.5, "leaf_0": 0.25}
+    result = scores(graph, "leaf_1")
+    assert result["leaf_1"] == 1.0 and result["hub"] == 0.5 and result["leaf_2"] == 0.25
+    assert "detail" not in result
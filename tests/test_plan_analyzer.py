@@ -0,0 +1,122 @@
+import sqlite3
+
+import pytest
+
+from nl2sql_agents.db.connector import DatabaseConnector
+from nl2sql_agents.db.plan_analyzer import PlanAnalyzer, table_aliases
+
+SCHEMA = """
+    CREATE TABLE singer (singer_id INTEGER PRIMARY KEY, name TEXT, country TEXT, age INT);
+    CREATE TABLE concert (concert_id INTEGER PRIMARY KEY, singer_id INT REFERENCES singer(singer_id), year INT, venue TEXT);
+    CREATE INDEX concert_year ON concert(year);
+    CREATE TABLE tiny (id INTEGER PRIMARY KEY, label TEXT);
+    INSERT INTO singer VALUES (1, 'a', 'France', 30), (2, 'b', 'Spain', 40);
+    INSERT INTO concert VALUES (1, 1, 2000, 'x'), (2, 2, 2001, 'y');
+    INSERT INTO tiny VALUES (1, 'a');
+    ANALYZE;
+    -- sizes of the real thing: the planner and the analyzer both read sqlite_stat1
+    DELETE FROM sqlite_stat1;
+    INSERT INTO sqlite_stat1 VALUES
+        ('singer', NULL, '50000'), ('concert', NULL, '300000'),
+        ('concert', 'concert_year', '300000 8572'), ('tiny', NULL, '5');
+"""
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("plan") / "concerts.sqlite")
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    db.commit()
+    db.close()
+    return path
+
+@pytest.fixture
+async def analyzer(db_path):
+    connector = DatabaseConnector(db_path, pool_size=1)
+    yield PlanAnalyzer(connector, warn_rows=100_000, fail_rows=10_000_000)
+    await connector.close()
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT * FROM singer", {"singer": "singer"}),
+    ("SELECT * FROM singer s JOIN concert AS c ON c.singer_id = s.singer_id", {"s": "singer", "c": "concert"}),
+    ("SELECT * FROM Singer S, concert", {"s": "Singer", "concert": "concert"}),
+    ("SELECT * FROM (SELECT * FROM concert) t JOIN singer s ON s.age = t.year", {"concert": "concert", "s": "singer"}),
+    ("SELECT name FROM singer WHERE singer_id IN (SELECT singer_id FROM concert c)", {"singer": "singer", "c": "concert"}),
+])
+def test_table_aliases(sql, expected):
+    assert table_aliases(sql) == expected
+
+async def test_primary_key_search(analyzer):
+    result = await analyzer.analyze("SELECT name FROM singer WHERE singer_id = 3", "v1")
+    assert (result.verdict, result.rows_examined, result.findings) == ("PASS", 1, [])
+
+async def test_index_search_uses_stat1(analyzer):
+    result = await analyzer.analyze("SELECT * FROM concert WHERE year = 2000", "v1")
+    assert result.verdict == "PASS"
+    assert result.rows_examined == 8572
+
+async def test_nested_scan(analyzer):
+    result = await analyzer.analyze("SELECT * FROM tiny t JOIN singer s ON s.name > t.label", "v1")
+    assert result.rows_examined == 5 + 5 * 50_000
+    assert any("no usable join constraint on singer AS s" in f for f in result.findings)
+    assert result.verdict == "WARN"
+
+async def test_automatic_index(analyzer):
+    result = await analyzer.analyze("SELECT * FROM singer s JOIN concert c ON c.venue = s.name", "v1")
+    assert any("automatic index" in f for f in result.findings)
+    assert result.verdict == "WARN"
+
+async def test_temp_btree(analyzer):
+    result = await analyzer.analyze("SELECT * FROM concert ORDER BY venue", "v1")
+    assert "temp b-tree for ORDER BY over ~300,000 rows" in result.findings
+
+async def test_correlated_subquery_runs_per_outer_row(analyzer):
+    result = await analyzer.analyze(
+        "SELECT name, (SELECT count(*) FROM concert c WHERE c.year = s.age) FROM singer s", "v1"
+    )
+    assert result.rows_examined == 50_000 + 50_000 * 8572
+    assert result.verdict == "FAIL"
+
+async def test_uncorrelated_subquery_runs_once(analyzer):
+    result = await analyzer.analyze("SELECT name, (SELECT count(*) FROM tiny) FROM singer", "v1")
+    assert result.rows_examined == 50_000 + 5
+
+async def test_materialized_cte_is_sized_from_its_loops(analyzer):
+    result = await analyzer.analyze(
+        "WITH x AS MATERIALIZED (SELECT * FROM concert WHERE year > 5) SELECT count(*) FROM x", "v1"
+    )
+    assert result.rows_examined == 2 * 75_000   # the index range, then the scan of its ~75,000 rows
+    assert result.verdict == "PASS"
+
+async def test_fail_threshold(analyzer):
+    result = await analyzer.analyze("SELECT * FROM singer s, concert c", "v1")
+    assert result.rows_examined == 50_000 + 50_000 * 300_000
+    assert result.verdict == "FAIL"
+    assert result.findings[0] == "over the 10,000,000-row budget"
+
+    analyzer.fail_rows = 10 ** 12
+    assert (await analyzer.analyze("SELECT * FROM singer s, concert c", "v1")).verdict == "WARN"
+
+async def test_statistics_follow_data_writes(tmp_path):
+    path = str(tmp_path / "grow.sqlite")
+    db = sqlite3.connect(path)
+    db.executescript("""
+        CREATE TABLE grow (id INTEGER PRIMARY KEY, label TEXT);
+        INSERT INTO grow (label) VALUES ('a'), ('b');
+    """)
+    db.commit()
+
+    connector = DatabaseConnector(path, pool_size=1)
+    try:
+        analyzer = PlanAnalyzer(connector, warn_rows=100_000, fail_rows=10_000_000)
+        before = await analyzer.analyze("SELECT * FROM grow", "v1")
+        assert (before.verdict, before.rows_examined) == ("PASS", 2)
+
+        # same schema version, more rows
+        db.execute("INSERT INTO grow (label) SELECT 'x' FROM (WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 200000) SELECT i FROM n)")
+        db.commit()
+        after = await analyzer.analyze("SELECT * FROM grow", "v1")
+        assert (after.verdict, after.rows_examined) == ("WARN", 200_002)
+    finally:
+        db.close()
+        await connector.close()
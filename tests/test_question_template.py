@@ -0,0 +1,150 @@
+import sqlite3
+
+import pytest
+
+from nl2sql_agents.cache.question_cache import question_scope
+from nl2sql_agents.cache.question_template import TemplateCache, extract_template
+from nl2sql_agents.models.schemas import ColumnMetaData, TableMetaData, ValidatorCheckResult
+
+CHECKS = [ValidatorCheckResult(check_name="logic", passed=True, score=1.0, details="ok")]
+
+def template(question: str, sql: str):
+    t = extract_template(question, sql, CHECKS)
+    assert t is not None
+    return t
+
+@pytest.mark.parametrize("learned, sql, asked, expected", [
+    # casing of the SQL literal is re-applied
+    ("How many singers are from France?", "SELECT count(*) FROM singer WHERE country = 'France'",
+     "how many singers are from germany", "SELECT count(*) FROM singer WHERE country = 'Germany'"),
+    ("Songs by ADELE", "SELECT song FROM singer WHERE name = 'ADELE'",
+     "songs by muse", "SELECT song FROM singer WHERE name = 'MUSE'"),
+    # multi-word slot, quote escaped
+    ("Concerts in New York", "SELECT * FROM concert WHERE city = 'New York'",
+     "concerts in Rio Grande", "SELECT * FROM concert WHERE city = 'Rio Grande'"),
+    ("Singers named Bob", "SELECT * FROM singer WHERE name = 'Bob'",
+     "singers named O'Hara", "SELECT * FROM singer WHERE name = 'O''Hara'"),
+    # LIKE wildcards stay in the SQL
+    ("Songs containing love", "SELECT song FROM singer WHERE song LIKE '%love%'",
+     "songs containing rain", "SELECT song FROM singer WHERE song LIKE '%rain%'"),
+    # number slots
+    ("Singers older than 30", "SELECT name FROM singer WHERE age > 30",
+     "singers older than 41.5", "SELECT name FROM singer WHERE age > 41.5"),
+    # slots follow question order, not SQL order
+    ("Singers from France older than 30",
+     "SELECT name FROM singer WHERE age > 30 AND country = 'France'",
+     "singers from Spain older than 25",
+     "SELECT name FROM singer WHERE age > 25 AND country = 'Spain'"),
+])
+def test_fill(learned, sql, asked, expected):
+    assert template(learned, sql).fill(asked) == expected
+
+def test_question_order_template():
+    t = template("Singers from France older than 30", "SELECT name FROM singer WHERE age > 30 AND country = 'France'")
+    assert t.question == "singers from {s} older than {n}"
+    assert [s.kind for s in t.slots] == ["string", "number"]
+
+@pytest.mark.parametrize("asked", [
+    "how many singers are from the",       # structural
+    "how many singers are from all",
+    "how many singers are from missing",   # asks for IS NULL
+    "how many singers are from Unknown",
+    "how many singers are from none",
+    "how many singers are from two countries",   # word count differs
+    "how many singers are there",
+])
+def test_fill_rejects(asked):
+    t = template("How many singers are from France?", "SELECT count(*) FROM singer WHERE country = 'France'")
+    assert t.fill(asked) is None
+
+def test_number_slot_needs_a_number():
+    t = template("Singers older than 30", "SELECT name FROM singer WHERE age > 30")
+    assert t.fill("singers older than thirty") is None
+
+def test_no_literal_in_question():
+    assert extract_template("All singers", "SELECT * FROM singer", CHECKS) is None
+    assert extract_template("Singers from there", "SELECT * FROM singer WHERE country = 'France'", CHECKS) is None
+
+@pytest.mark.parametrize("sql, column", [
+    ("SELECT * FROM singer WHERE country = 'France'", "singer.country"),
+    ("SELECT * FROM singer s WHERE s.country = 'France'", "singer.country"),
+    ("SELECT * FROM singer WHERE country IN ('Spain', 'France')", "singer.country"),
+    ("SELECT * FROM singer s JOIN concert c ON c.singer_id = s.singer_id WHERE country = 'France'", "country"),
+    ("SELECT * FROM singer WHERE lower(country) = 'france'", None),
+])
+def test_compared_column(sql, column):
+    t = template("Singers from France", sql)
+    assert t.slots[0].column == column
+
+# --- TemplateCache with a value lookup --- #
+
+TABLES = [
+    TableMetaData(table_name="singer", schema_name="main", columns=[
+        ColumnMetaData(column_name="singer_id", data_type="INTEGER", is_primary_key=True),
+        ColumnMetaData(column_name="country", data_type="TEXT"),
+    ]),
+    TableMetaData(table_name="concert", schema_name="main", columns=[
+        ColumnMetaData(column_name="singer_id", data_type="INTEGER"),
+        ColumnMetaData(column_name="city", data_type="TEXT"),
+    ]),
+]
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("""
+        CREATE TABLE singer (singer_id INTEGER PRIMARY KEY, country TEXT);
+        CREATE TABLE concert (singer_id INTEGER, city TEXT);
+        INSERT INTO singer VALUES (1, 'France'), (2, 'Germany'), (3, NULL);
+        INSERT INTO concert VALUES (1, 'Paris'), (2, 'Berlin');
+    """)
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def cache(db, tmp_path):
+    queries = []
+
+    async def probe(query: str, params: tuple) -> list:
+        queries.append((query, params))
+        return db.execute(query, params).fetchall()
+
+    cache = TemplateCache(path=str(tmp_path / "templates.sqlite"), probe=probe)
+    cache.queries = queries
+    yield cache
+    cache.close()
+
+async def test_match_confirms_values(cache):
+    await cache.learn("Singers from France", "scope", "SELECT * FROM singer WHERE country = 'France'", CHECKS)
+
+    matched = await cache.match("singers from Germany", "scope", TABLES)
+    assert matched is not None and matched[0] == "SELECT * FROM singer WHERE country = 'Germany'"
+    assert cache.queries[-1] == ("SELECT 1 FROM singer WHERE country = ? LIMIT 1", ("Germany",))
+
+    assert await cache.match("singers from Narnia", "scope", TABLES) is None
+    assert cache.stats["unconfirmed"] == 1
+
+async def test_match_resolves_unqualified_columns(cache):
+    sql = "SELECT * FROM singer s JOIN concert c ON c.singer_id = s.singer_id WHERE city = 'Paris'"
+    await cache.learn("Singers who played in Paris", "scope", sql, CHECKS)
+    assert await cache.match("singers who played in Berlin", "scope", TABLES) is not None
+    assert await cache.match("singers who played in Tokyo", "scope", TABLES) is None
+
+async def test_unresolved_column_is_not_served(cache):
+    await cache.learn("Singers from france", "scope", "SELECT * FROM singer WHERE lower(country) = 'france'", CHECKS)
+    assert await cache.match("singers from germany", "scope", TABLES) is None
+
+async def test_slots_survive_reload(cache, tmp_path):
+    await cache.learn("Singers from France", "scope", "SELECT * FROM singer WHERE country = 'France'", CHECKS)
+    reloaded = TemplateCache(path=cache.path, probe=cache.probe)
+    try:
+        matched = await reloaded.match("singers from Germany", "scope", TABLES)
+        assert matched is not None and matched[1].slots[0].column == "singer.country"
+    finally:
+        reloaded.close()
+
+def test_scope_includes_approved_tables():
+    scope = question_scope("db.sqlite", "v1", None, {"singer", "concert"})
+    assert scope == question_scope("db.sqlite", "v1", None, ["concert", "singer"])
+    assert scope != question_scope("db.sqlite", "v1", None, {"singer"})
+    assert scope != question_scope("db.sqlite", "v1", None)
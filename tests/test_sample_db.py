@@ -0,0 +1,123 @@
+import os
+import sqlite3
+
+import pytest
+
+from nl2sql_agents.db.connector import DatabaseConnector
+from nl2sql_agents.db.sample_db import SampleDatabase, result_digest
+
+SCHEMA = """
+    CREATE TABLE country (country_id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE singer (singer_id INTEGER PRIMARY KEY, name TEXT, country_id INT REFERENCES country(country_id));
+    CREATE TABLE concert (concert_id INTEGER PRIMARY KEY, year INT);
+    CREATE TABLE singer_in_concert (
+        concert_id INT REFERENCES concert,
+        singer_id INT REFERENCES singer(singer_id),
+        PRIMARY KEY (concert_id, singer_id)
+    );
+"""
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("source") / "concerts.sqlite")
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    db.executemany("INSERT INTO country VALUES (?, ?)", [(i, f"country {i}") for i in range(1, 101)])
+    # the first singers all come from the last countries: a plain LIMIT would leave them dangling
+    db.executemany("INSERT INTO singer VALUES (?, ?, ?)", [(i, f"singer {i}", 100 - i % 7) for i in range(1, 1001)])
+    db.executemany("INSERT INTO concert VALUES (?, ?)", [(i, 2000 + i % 20) for i in range(1, 501)])
+    db.executemany(
+        "INSERT INTO singer_in_concert VALUES (?, ?)",
+        [(c, s) for c in range(500, 0, -1) for s in (c * 2 % 1000 + 1, (c * 7 + 3) % 1000 + 1)]
+    )
+    db.commit()
+    db.close()
+    return path
+
+@pytest.fixture
+async def connector(db_path):
+    connector = DatabaseConnector(db_path, pool_size=1)
+    yield connector
+    await connector.close()
+
+def sample(connector, tmp_path, **kwargs) -> SampleDatabase:
+    return SampleDatabase(connector, rows_per_table=20, directory=str(tmp_path / "samples"), **kwargs)
+
+async def test_sample_is_fk_closed(connector, tmp_path):
+    db = sample(connector, tmp_path)
+    path = await db._ensure("v1")
+
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+        assert 0 < conn.execute("SELECT count(*) FROM singer").fetchone()[0] <= 20 + 20
+        # child rows were picked to join the sampled parents
+        joined = conn.execute(
+            "SELECT count(*) FROM singer_in_concert sc JOIN singer s USING (singer_id) JOIN concert c USING (concert_id)"
+        ).fetchone()[0]
+        assert joined == conn.execute("SELECT count(*) FROM singer_in_concert").fetchone()[0] > 0
+    finally:
+        conn.close()
+
+async def test_execute(connector, tmp_path):
+    db = sample(connector, tmp_path)
+    ok = await db.execute("SELECT name FROM country ORDER BY name", "v1")
+    assert ok.status == "ok" and ok.rows > 0 and ok.digest
+
+    assert (await db.execute("SELECT * FROM country WHERE name = 'nowhere'", "v1")).status == "empty"
+    error = await db.execute("SELECT nope FROM country", "v1")
+    assert error.status == "error" and "nope" in error.error
+    assert (await db.execute("DELETE FROM country", "v1")).status == "error"   # read-only
+    assert db.stats["builds"] == 1
+
+INFINITE = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+
+async def test_step_limit(connector, tmp_path):
+    db = sample(connector, tmp_path, max_steps=20_000, timeout_ms=60_000)
+    result = await db.execute(INFINITE, "v1")
+    assert (result.status, result.error) == ("timeout", "stopped at the 20,000 VM steps limit")
+
+async def test_timeout(connector, tmp_path):
+    db = sample(connector, tmp_path, max_steps=10 ** 12, timeout_ms=50)
+    result = await db.execute(INFINITE, "v1")
+    assert (result.status, result.error) == ("timeout", "stopped at the 50 ms limit")
+    assert result.elapsed_ms < 5_000
+
+async def test_truncated(connector, tmp_path):
+    db = sample(connector, tmp_path, max_rows=5)
+    result = await db.execute("SELECT * FROM singer", "v1")
+    assert result.rows == 5 and result.truncated
+
+async def test_new_version_removes_the_old_sample(connector, tmp_path):
+    db = sample(connector, tmp_path)
+    old = await db._ensure("v1")
+    new = await db._ensure("v2")
+    assert os.listdir(db.directory) == [os.path.basename(new)]
+    assert not os.path.exists(old) and db.stats["removed"] == 1
+
+async def test_not_persisted(connector, tmp_path):
+    db = sample(connector, tmp_path, persist=False)
+    result = await db.execute("SELECT count(*) FROM singer", "v1")
+    assert result.status == "ok"
+    assert (await db.execute("DELETE FROM singer", "v1")).status == "error"
+    assert (await db.execute("SELECT count(*) FROM singer", "v1")).digest == result.digest
+    assert not os.path.exists(db.directory)
+    assert db.stats["builds"] == 1
+
+@pytest.mark.parametrize("a, b", [
+    ([(1, "x"), (2, "y")], [(2, "y"), (1, "x")]),   # row order
+    ([(1.0, "x")], [(1, "x")]),                     # 1.0 == 1
+    ([(0.1 + 0.2,)], [(0.3,)]),                     # float noise
+    ([(b"\x01",)], [(b"\x01",)]),
+])
+def test_result_digest_equal(a, b):
+    assert result_digest(a) == result_digest(b)
+
+@pytest.mark.parametrize("a, b", [
+    ([(1, "x")], [(1, "x"), (1, "x")]),   # duplicates count
+    ([(1, "x")], [("x", 1)]),             # column order matters
+    ([(1,)], [("1",)]),
+    ([], [(None,)]),
+])
+def test_result_digest_differs(a, b):
+    assert result_digest(a) != result_digest(b)
@@ -0,0 +1,188 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from nl2sql_agents.llm import scheduler
+from nl2sql_agents.llm.scheduler import LLMScheduler, Priority
+
+class FakeTime:
+    """Frozen clock for the token buckets; the event loop keeps its own"""
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(scheduler, "time", fake)
+    return fake
+
+def rate_limited(retry_after: str | None = None) -> openai.RateLimitError:
+    headers = {"retry-after": retry_after} if retry_after is not None else {}
+    response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "http://llm"))
+    return openai.RateLimitError("slow down", response=response, body=None)
+
+def recorder(order: list[str], name: str):
+    async def call():
+        order.append(name)
+        return name
+    return call
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+async def test_priority_order(clock):
+    s = LLMScheduler("test", max_concurrency=1)
+    order = []
+
+    await s._acquire(Priority.NORMAL, 0)
+    tasks = [
+        asyncio.create_task(s.run(recorder(order, name), priority=priority))
+        for name, priority in [
+            ("explain", Priority.LOW), ("validate", Priority.NORMAL),
+            ("generate-1", Priority.HIGH), ("generate-2", Priority.HIGH),
+        ]
+    ]
+    await settle()
+    assert order == [] and len(s._waiters) == 4
+
+    s._release()
+    await asyncio.gather(*tasks)
+    assert order == ["generate-1", "generate-2", "validate", "explain"]
+    assert s._active == 0
+
+async def test_head_of_line_waits_for_tokens(clock):
+    s = LLMScheduler("test", max_concurrency=4, tpm=1000)
+    order = []
+
+    await s.run(recorder(order, "first"), tokens=900)
+    big = asyncio.create_task(s.run(recorder(order, "big"), priority=Priority.HIGH, tokens=500))
+    small = asyncio.create_task(s.run(recorder(order, "small"), priority=Priority.LOW, tokens=10))
+    await settle()
+
+    # 100 tokens left: "small" would fit but must not overtake the blocked head
+    assert order == ["first"]
+    assert s._timer is not None
+
+    clock.now += 30  # +500 tokens at 1000/min: room for both
+    s._timer.cancel()
+    s._on_timer()
+    await asyncio.gather(big, small)
+    assert order == ["first", "big", "small"]
+
+async def test_rpm_bucket(clock):
+    s = LLMScheduler("test", max_concurrency=4, rpm=2)
+    order = []
+
+    await s.run(recorder(order, "a"))
+    await s.run(recorder(order, "b"))
+    third = asyncio.create_task(s.run(recorder(order, "c")))
+    await settle()
+    assert order == ["a", "b"]
+
+    clock.now += 30
+    s._timer.cancel()
+    s._on_timer()
+    await third
+    assert order == ["a", "b", "c"]
+
+async def test_slot_granted_during_cancellation_is_released(clock):
+    s = LLMScheduler("test", max_concurrency=1)
+    order = []
+
+    await s._acquire(Priority.NORMAL, 0)
+    cancelled = asyncio.create_task(s.run(recorder(order, "cancelled")))
+    after = asyncio.create_task(s.run(recorder(order, "after")))
+    await settle()
+
+    s._release()       # grants the slot to `cancelled` ...
+    cancelled.cancel()  # ... which is cancelled before it gets to run
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    await asyncio.wait_for(after, 1)  # a leaked slot would block it forever
+    assert order == ["after"]
+    assert s._active == 0
+
+async def test_cancelled_while_queued(clock):
+    s = LLMScheduler("test", max_concurrency=1)
+
+    await s._acquire(Priority.NORMAL, 0)
+    queued = asyncio.create_task(s.run(recorder([], "queued")))
+    await settle()
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+
+    s._release()
+    assert s._active == 0 and not s._waiters
+
+async def test_retry_honours_retry_after(clock, monkeypatch):
+    s = LLMScheduler("test", max_concurrency=1, max_retries=3, backoff_base=0.1, backoff_max=1.0)
+    delays = []
+    backoff = s._backoff
+    monkeypatch.setattr(s, "_backoff", lambda attempt, e: delays.append(backoff(attempt, e)) or 0.0)
+
+    errors = [rate_limited("7"), rate_limited()]
+
+    async def call():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert await s.run(call) == "ok"
+    assert delays[0] == 7.0
+    assert 0.1 <= delays[1] <= 0.2  # jittered within [ceiling/2, ceiling], ceiling = 0.1 * 2
+    assert s.stats["retries"] == 2 and s.stats["rate_limited"] == 2 and s.stats["calls"] == 3
+    assert s._active == 0
+
+def test_backoff_is_capped(clock):
+    s = LLMScheduler("test", max_concurrency=1, backoff_base=1.0, backoff_max=4.0)
+    assert all(2.0 <= s._backoff(10, rate_limited()) <= 4.0 for _ in range(20))
+
+async def test_retries_exhausted(clock, monkeypatch):
+    s = LLMScheduler("test", max_concurrency=1, max_retries=2)
+    monkeypatch.setattr(s, "_backoff", lambda attempt, e: 0.0)
+
+    async def call():
+        raise rate_limited()
+
+    with pytest.raises(openai.RateLimitError):
+        await s.run(call)
+    assert s.stats["calls"] == 3 and s.stats["failed"] == 1
+    assert s._active == 0
+
+async def test_other_errors_are_not_retried(clock):
+    s = LLMScheduler("test", max_concurrency=1, max_retries=3)
+
+    async def call():
+        raise ValueError("bad prompt")
+
+    with pytest.raises(ValueError):
+        await s.run(call)
+    assert s.stats["calls"] == 1 and s.stats["retries"] == 0
+    assert s._active == 0
+
+async def test_settle_refunds_unused_tokens(clock):
+    s = LLMScheduler("test", max_concurrency=4, tpm=1000)
+    order = []
+
+    await s.run(recorder(order, "estimated"), tokens=800)
+    assert s.tokens.wait_time(600) > 0
+
+    s.settle(800, 300)
+    assert s.tokens.level == 700
+    await s.run(recorder(order, "refunded"), tokens=600)
+    assert order == ["estimated", "refunded"]
+
+    s.settle(600, 5000)  # used more than estimated: nothing to give back
+    s.settle(10_000, 0)  # never above one minute's worth
+    assert s.tokens.level == 1000
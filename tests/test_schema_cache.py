@@ -0,0 +1,27 @@
+import time
+
+import pytest
+
+from nl2sql_agents.cache.schema_cache import SchemaCache
+from nl2sql_agents.models.schemas import SchemaCacheEntry, DBFingerprint
+
+LIVE = DBFingerprint(file_size=4096, mtime_ns=1, schema_version=3)
+
+@pytest.fixture
+def cache(tmp_path):
+    return SchemaCache(str(tmp_path))
+
+@pytest.mark.parametrize("stored, live, fresh", [
+    (LIVE, LIVE, True),
+    (LIVE, LIVE.model_copy(update={"mtime_ns": 2}), False),
+    (None, LIVE, False),
+    (LIVE, None, True),
+    (None, None, True),
+])
+def test_is_fresh(cache, stored, live, fresh):
+    entry = SchemaCacheEntry(timestamp=time.time(), fingerprint=stored)
+    assert cache.is_fresh(entry, live) is fresh
+
+def test_expired(cache):
+    entry = SchemaCacheEntry(timestamp=time.time() - 10 * 24 * 3600, fingerprint=LIVE)
+    assert not cache.is_fresh(entry, LIVE)
@@ -0,0 +1,53 @@
+import sqlite3
+
+import pytest
+
+from nl2sql_agents.db.connector import DatabaseConnector
+from nl2sql_agents.cache.schema_cache import SchemaCache
+from nl2sql_agents.cache.schema_registry import SchemaRegistry
+
+@pytest.fixture
+async def registry(tmp_path):
+    path = str(tmp_path / "db.sqlite")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE singer (singer_id INTEGER PRIMARY KEY, name TEXT)")
+    db.commit()
+    db.close()
+
+    connector = DatabaseConnector(path, pool_size=1)
+    yield SchemaRegistry(connector, SchemaCache(str(tmp_path / "cache")))
+    await connector.close()
+
+def execute(path: str, sql: str) -> None:
+    db = sqlite3.connect(path)
+    db.execute(sql)
+    db.commit()
+    db.close()
+
+async def test_data_writes_skip_the_shard(registry):
+    first = await registry.get()
+    assert registry.stats["shard_writes"] == 1
+
+    for i in range(3):
+        execute(registry.connector.db_path, f"INSERT INTO singer (name) VALUES ('s{i}' || zeroblob(5000))")
+        snap = await registry.get()
+        assert snap.version == first.version
+        assert snap.tables is first.tables
+
+    assert registry.stats["refreshes"] == 3
+    assert registry.stats["shard_writes"] == 1
+
+    # the moved fingerprint is trusted again without another refresh
+    await registry.get()
+    assert registry.stats["memory_hits"] == 1
+
+async def test_ddl_change_writes_the_shard(registry):
+    first = await registry.get()
+    execute(registry.connector.db_path, "CREATE TABLE concert (concert_id INTEGER PRIMARY KEY)")
+
+    snap = await registry.get()
+    assert snap.version != first.version
+    assert registry.stats["shard_writes"] == 2
+
+    entry = await registry.cache.get_entry(registry.connector.db_path)
+    assert sorted(entry.ddl_hashes) == ["concert", "singer"]
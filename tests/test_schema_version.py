@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+from nl2sql_agents.db.connector import DatabaseConnector
+from nl2sql_agents.cache.schema_registry import schema_version_stamp
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "db.sqlite")
+    with sqlite3.connect(path) as db:
+        db.executescript("""
+            CREATE TABLE singer (singer_id INTEGER PRIMARY KEY, name TEXT UNIQUE, country TEXT);
+            CREATE TABLE concert (concert_id INTEGER PRIMARY KEY, singer_id INTEGER REFERENCES singer);
+        """)
+    db.close()
+    return path
+
+async def stamp(path: str) -> tuple[str, dict[str, str]]:
+    connector = DatabaseConnector(path, pool_size=1)
+    try:
+        await connector.introspect()
+        return schema_version_stamp(connector.ddl_hashes), connector.ddl_hashes
+    finally:
+        await connector.close()
+
+def execute(path: str, sql: str) -> None:
+    db = sqlite3.connect(path)
+    db.execute(sql)
+    db.commit()
+    db.close()
+
+async def test_stable(db_path):
+    assert await stamp(db_path) == await stamp(db_path)
+
+@pytest.mark.parametrize("ddl, changed", [
+    ("CREATE INDEX singer_country ON singer(country)", {"singer"}),
+    ("CREATE VIEW french AS SELECT * FROM singer WHERE country = 'France'", {"french"}),
+    ("CREATE TABLE stadium (stadium_id INTEGER PRIMARY KEY)", {"stadium"}),
+])
+async def test_indexes_and_views_change_the_version(db_path, ddl, changed):
+    before, hashes = await stamp(db_path)
+    execute(db_path, ddl)
+    after, new_hashes = await stamp(db_path)
+
+    assert after != before
+    assert {name for name, h in new_hashes.items() if hashes.get(name) != h} == changed
+
+async def test_refresh_keeps_view_out_of_tables(db_path):
+    connector = DatabaseConnector(db_path, pool_size=1)
+    try:
+        tables = await connector.introspect()
+        version, hashes = connector.schema_version, dict(connector.ddl_hashes)
+        execute(db_path, "CREATE VIEW french AS SELECT * FROM singer WHERE country = 'France'")
+        execute(db_path, "CREATE INDEX concert_singer ON concert(singer_id)")
+
+        refreshed = await connector.refresh(tables, hashes, version)
+        assert sorted(t.table_name for t in refreshed) == ["concert", "singer"]
+        assert "french" in connector.ddl_hashes
+    finally:
+        await connector.close()
+
+async def test_refresh_many_tables(db_path):
+    db = sqlite3.connect(db_path)
+    db.executescript("".join(f"CREATE TABLE t{i} (a INTEGER);" for i in range(2100)))
+    db.close()
+
+    connector = DatabaseConnector(db_path, pool_size=1)
+    try:
+        tables = await connector.introspect()
+        version, hashes = connector.schema_version, dict(connector.ddl_hashes)
+        db = sqlite3.connect(db_path)
+        db.executescript("".join(f"ALTER TABLE t{i} ADD COLUMN b TEXT;" for i in range(1000)))
+        db.close()
+
+        refreshed = {t.table_name: t for t in await connector.refresh(tables, hashes, version)}
+        assert len(refreshed) == 2102
+        assert [c.column_name for c in refreshed["t999"].columns] == ["a", "b"]
+        assert [c.column_name for c in refreshed["t1000"].columns] == ["a"]
+    finally:
+        await connector.close()
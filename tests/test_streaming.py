@@ -0,0 +1,153 @@
+import time
+import asyncio
+
+import pytest
+
+from nl2sql_agents.agents.query_generator import QueryGeneratorAgent, PROMPT_VARIENT
+from nl2sql_agents.agents.validator.validator_agent import ValidatorAgent
+from nl2sql_agents.models.schemas import FormattedSchema, SQLCandidate
+
+SCHEMA = FormattedSchema(
+    content="CREATE TABLE singer (singer_id INTEGER PRIMARY KEY, name TEXT, country TEXT);",
+    table_names=["singer"],
+    token_estimate=20
+)
+FRENCH = "SELECT name FROM singer WHERE country = 'France'"
+SPANISH = "SELECT name FROM singer WHERE country = 'Spain'"
+
+# --- QueryGeneratorAgent.stream --- #
+
+def by_variant(table: dict[str, object]):
+    """value for the prompt variant (conservative / creative / rephrased) in the prompt"""
+    def pick(agent, prompt):
+        return next(v for variant, v in zip(PROMPT_VARIENT, table.values()) if variant in prompt)
+    return pick
+
+async def test_stream_yields_in_completion_order(llm):
+    llm.delay = by_variant({"conservative": 0.15, "creative": 0.01, "rephrased": 0.08})
+    llm.respond = lambda agent, prompt: FRENCH
+    variants = [c.prompt_variant async for c in QueryGeneratorAgent().stream(SCHEMA, "French singers")]
+    assert variants == ["creative", "rephrased", "conservative"]
+
+async def test_closing_the_stream_cancels_calls_in_flight(llm):
+    llm.delay = by_variant({"conservative": 0.01, "creative": 5, "rephrased": 5})
+    llm.respond = lambda agent, prompt: FRENCH
+    stream = QueryGeneratorAgent().stream(SCHEMA, "French singers")
+
+    first = await anext(stream)
+    await stream.aclose()
+    assert first.prompt_variant == "conservative"
+    assert llm.cancelled == 2
+
+async def test_stream_error_cancels_the_other_calls(llm):
+    def respond(agent, prompt):
+        if PROMPT_VARIENT[1] in prompt:
+            raise RuntimeError("provider down")
+        return FRENCH
+
+    llm.delay = by_variant({"conservative": 0.01, "creative": 0.05, "rephrased": 5})
+    llm.respond = respond
+    received = []
+    with pytest.raises(RuntimeError, match="provider down"):
+        async for candidate in QueryGeneratorAgent().stream(SCHEMA, "French singers"):
+            received.append(candidate.prompt_variant)
+    assert received == ["conservative"]
+    assert llm.cancelled == 1
+
+# --- ValidatorAgent.validate_stream (no connector: syntax, logic, performance are LLM checks) --- #
+
+class Feed:
+    """async generator of candidates, each after a delay; records whether it was closed"""
+    def __init__(self, *items, error: Exception | None = None) -> None:
+        self.items = items
+        self.error = error
+        self.closed = False
+
+    async def __aiter__(self):
+        try:
+            for i, (delay, sql) in enumerate(self.items):
+                await asyncio.sleep(delay)
+                yield SQLCandidate(sql=sql, temperature=0.3, prompt_variant=f"v{i}")
+            if self.error is not None:
+                await asyncio.sleep(0.02)
+                raise self.error
+        finally:
+            self.closed = True
+
+    def stream(self):
+        return self.__aiter__()
+
+@pytest.fixture
+def validator():
+    agent = ValidatorAgent()
+    agent.stats = dict.fromkeys(agent.stats, 0)
+    return agent
+
+def slow_for(sql: str, seconds: float):
+    return lambda agent, prompt: seconds if sql in prompt else 0.01
+
+async def test_early_stop_closes_the_generator(validator, llm):
+    feed = Feed((0, FRENCH), (1.0, SPANISH))
+    start = time.perf_counter()
+    result = await validator.validate_stream(feed.stream(), "French singers", wait_for=1)
+
+    assert time.perf_counter() - start < 0.5
+    assert result.passed and result.best_candidate.sql == FRENCH
+    assert len(result.all_results) == 1
+    assert feed.closed
+    assert validator.stats["early_stops"] == 1
+
+async def test_early_stop_cancels_validations_in_flight(validator, llm):
+    llm.delay = slow_for(SPANISH, 5)
+    feed = Feed((0, SPANISH), (0.01, FRENCH))
+    result = await validator.validate_stream(feed.stream(), "French singers", wait_for=1)
+
+    assert result.best_candidate.sql == FRENCH
+    assert [r.candidate.sql for r in result.all_results] == [FRENCH]
+    assert llm.cancelled >= 1
+
+async def test_early_stop_with_a_performance_warning(validator, llm):
+    llm.respond = lambda agent, prompt: "WARN: no LIMIT" if type(agent).__name__ == "PerformanceValidator" else None
+    feed = Feed((0, FRENCH), (1.0, SPANISH))
+    result = await validator.validate_stream(feed.stream(), "French singers", wait_for=1)
+
+    perf = next(c for c in result.all_results[0].checks if c.check_name == "performance")
+    assert perf.score < 1.0
+    assert [r.candidate.sql for r in result.all_results] == [FRENCH]
+    assert feed.closed
+    assert validator.stats["early_stops"] == 1
+
+async def test_no_early_stop_without_logic_pass(validator, llm):
+    def respond(agent, prompt):
+        if type(agent).__name__ == "LogicValidator" and FRENCH in prompt:
+            return "FAIL: the question asks for Spanish singers"
+    llm.respond = respond
+    feed = Feed((0, FRENCH), (0.05, SPANISH))
+    result = await validator.validate_stream(feed.stream(), "Spanish singers", wait_for=1)
+
+    assert [r.candidate.sql for r in result.all_results] == [FRENCH, SPANISH]
+    assert result.best_candidate.sql == SPANISH
+    assert validator.stats["early_stops"] == 1
+
+async def test_duplicate_arriving_during_validation_is_fanned_out(validator, llm):
+    llm.delay = 0.1
+    duplicate = "select s.name from singer s where s.country = 'France';"
+    feed = Feed((0, FRENCH), (0.01, duplicate))
+    result = await validator.validate_stream(feed.stream(), "French singers", wait_for=2)
+
+    assert [r.candidate.sql for r in result.all_results] == [FRENCH, duplicate]
+    assert result.all_results[0].checks == result.all_results[1].checks
+    assert llm.count("LogicValidator") == 1
+    assert result.llm_calls_saved == validator.llm_checks
+    assert validator.stats["duplicates"] == 1
+
+async def test_generator_error_mid_stream(validator, llm):
+    llm.delay = 5
+    feed = Feed((0, FRENCH), error=RuntimeError("provider down"))
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError, match="provider down"):
+        await validator.validate_stream(feed.stream(), "French singers")
+
+    assert time.perf_counter() - start < 1
+    assert feed.closed
+    assert llm.cancelled >= 1   # the validation in flight was cancelled, not left running
@@ -0,0 +1,48 @@
+import time
+import threading
+
+import pytest
+
+from nl2sql_agents.llm import tokens
+
+class SlowTiktoken:
+    """encoding_for_model blocks until released, like a first download"""
+    def __init__(self) -> None:
+        self.release = threading.Event()
+
+    def encoding_for_model(self, name: str):
+        self.release.wait(5)
+        return self
+
+    def encode(self, text: str, disallowed_special=()) -> list[str]:
+        return text.split()
+
+@pytest.fixture
+def slow(monkeypatch):
+    fake = SlowTiktoken()
+    monkeypatch.setattr(tokens, "tiktoken", fake)
+    monkeypatch.setattr(tokens, "_encodings", {})
+    monkeypatch.setattr(tokens, "_loaders", {})
+    yield fake
+    fake.release.set()
+
+def test_count_does_not_wait_for_the_encoding(slow):
+    start = time.perf_counter()
+    assert tokens.count_tokens("a" * 40, "m") == 10
+    assert time.perf_counter() - start < 1
+
+    slow.release.set()
+    assert tokens.load_encoding("m", timeout=5) is slow
+    assert tokens.count_tokens("one two three", "m") == 3
+
+def test_loaded_once(slow):
+    for _ in range(5):
+        tokens.count_tokens("x", "m")
+    assert len(tokens._loaders) == 1
+
+def test_failed_load_falls_back(monkeypatch, slow):
+    def offline(name):
+        raise OSError("no network")
+    monkeypatch.setattr(slow, "encoding_for_model", offline)
+    assert tokens.load_encoding("m", timeout=5) is None
+    assert tokens.count_tokens("a" * 9, "m") == 3
@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+from nl2sql_agents.db.connector import DatabaseConnector
+from nl2sql_agents.agents.validator.validator_agent import ValidatorAgent
+from nl2sql_agents.models.schemas import GenerationResult, SQLCandidate
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("validator") / "singers.sqlite")
+    db = sqlite3.connect(path)
+    db.executescript("""
+        CREATE TABLE singer (singer_id INTEGER PRIMARY KEY, name TEXT, country TEXT, age INT);
+        INSERT INTO singer VALUES (1, 'Ann', 'France', 30), (2, 'Bob', 'Spain', 41), (3, 'Eve', 'France', 25);
+    """)
+    db.commit()
+    db.close()
+    return path
+
+@pytest.fixture
+async def validator(db_path, tmp_path):
+    connector = DatabaseConnector(db_path, pool_size=1)
+    agent = ValidatorAgent(connector)
+    agent.sample_db.directory = str(tmp_path / "samples")
+    yield agent
+    if agent.schema_clone is not None:
+        agent.schema_clone.close()
+    await connector.close()
+
+def generation(*sqls: str) -> GenerationResult:
+    return GenerationResult(candidates=[
+        SQLCandidate(sql=sql, temperature=0.3, prompt_variant=f"v{i}") for i, sql in enumerate(sqls)
+    ])
+
+def logic(result, i: int = 0):
+    return next(c for c in result.all_results[i].checks if c.check_name == "logic")
+
+async def test_identical_variants_do_not_confirm_themselves(validator, llm):
+    sql = "SELECT name FROM singer WHERE country = 'France'"
+    result = await validator.validate(
+        generation(sql, sql + ";", "select s.name from singer s where s.country = 'France'"), "French singers", schema_version="v1"
+    )
+    assert result.passed
+    assert llm.count("LogicValidator") + llm.count("BatchValidator") == 1
+    assert not logic(result).details.startswith("Confirmed by result voting")
+    assert validator.stats["consensus"] == 0 and validator.stats["duplicates"] == 2
+
+async def test_distinct_queries_agreeing_skip_the_logic_check(validator, llm):
+    result = await validator.validate(generation(
+        "SELECT name FROM singer WHERE country = 'France'",
+        "SELECT name FROM singer WHERE country IN ('France')",
+    ), "French singers", schema_version="v1")
+    assert result.passed
+    assert llm.calls == []
+    assert logic(result).details.startswith("Confirmed by result voting")
+    assert validator.stats["consensus"] == 2
+
+async def test_selective_candidate_is_not_penalised_for_an_empty_sample(validator, llm):
+    selective = "SELECT name FROM singer WHERE country = 'France' AND age > 50"
+    result = await validator.validate(generation(
+        "SELECT name FROM singer WHERE country = 'France'", selective,
+    ), "French singers over 50", schema_version="v1")
+
+    unfiltered, filtered = result.all_results
+    assert next(c for c in filtered.checks if c.check_name == "execution").details.startswith("Empty result")
+    assert filtered.total_score == unfiltered.total_score